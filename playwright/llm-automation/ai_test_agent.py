@@ -1,9 +1,17 @@
-import os
 import json
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
-from openai import OpenAI
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Any
+from dataclasses import dataclass, asdict, replace
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from llm_providers import LLMProvider, get_async_openai_client, get_llm_provider
+from locator_repair import LocatorRepairer
+from plan_cache import PlanCache, normalize_url
+from settle import SettleStrategy
+from screenshot_policy import ScreenshotPolicy
+from artifact_store import ArtifactHandle, ArtifactStore, get_artifact_store
+from tracing import current_span, get_tracer
 
 # Load environment variables
 load_dotenv()
@@ -19,12 +27,71 @@ class TestAction:
     wait_timeout: int = 5000  # ms
     timeout: int = 30000  # Default timeout in ms for actions
 
+class StepError(Exception):
+    """A failed step; `screenshot` is the handle of the failure screenshot, if one was taken"""
+
+    def __init__(self, message: str, screenshot: Optional[ArtifactHandle] = None):
+        super().__init__(message)
+        self.screenshot = screenshot
+
+class ActionStreamParser:
+    """Incrementally extracts complete action objects from a streamed JSON response.
+
+    Tracks string/escape state and container nesting across chunks, so an
+    object is returned as soon as its closing brace arrives. Only objects
+    directly inside an array (the plan itself, or ``{"actions": [...]}``) are
+    emitted; markdown fences and other text around the JSON are ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[tuple] = []  # (container char, start offset)
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume the next chunk and return any action objects it completed"""
+        self.buffer += text
+        completed = []
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._stack:
+                self._in_string = True
+            elif char in '[{':
+                self._stack.append((char, self._pos))
+            elif char in ']}' and self._stack:
+                opener, start = self._stack.pop()
+                if opener == '{' and self._stack and self._stack[-1][0] == '[':
+                    try:
+                        obj = json.loads(self.buffer[start:self._pos + 1])
+                    except json.JSONDecodeError:
+                        obj = None
+                    if isinstance(obj, dict) and 'action_type' in obj:
+                        completed.append(obj)
+            self._pos += 1
+        return completed
+
 class AITestAgent:
     """AI-powered test agent that converts natural language to Playwright actions"""
     
-    def __init__(self, model: str = "gpt-4-turbo-preview"):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(
+        self,
+        model: str = "gpt-4-turbo-preview",
+        plan_cache: Optional[PlanCache] = None,
+        provider: Optional[LLMProvider] = None
+    ):
         self.model = model
+        self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        # Chat backend; LLM_PROVIDER=rules/replay/record runs without a live model
+        self.provider = provider or get_llm_provider()
         self.system_prompt = """
         You are an AI test automation expert that converts natural language instructions into executable Playwright test steps.
         
@@ -43,6 +110,7 @@ class AITestAgent:
         - Hover: Use 'hover' for any mouseover interactions
         - Keyboard: Use 'press' for keyboard inputs
         - Waits: Include 'wait_for_selector' when elements need to load
+        - Fixed pauses: Use 'wait' (value in seconds) only when the user explicitly asks to pause; the executor already waits for the page to settle after every action
         - Verification: Use 'assert' for any validation or verification steps
         - Screenshot: Use 'screenshot' for capturing the current state
         
@@ -57,70 +125,142 @@ class AITestAgent:
         EXAMPLE INPUT: "Go to example.com and log in with test@example.com"
         """
 
-    async def generate_test_actions(self, test_description: str) -> List[TestAction]:
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Async client shared by every agent on the current event loop"""
+        return get_async_openai_client()
+
+    def _plan_cache_key(self, test_description: str, target_url: Optional[str] = None) -> str:
+        # Replays return what the model answered, so they share its cached plans; other providers don't
+        model = self.model if self.provider.name in ('openai', 'replay') else f"{self.provider.name}:{self.model}"
+        return self.plan_cache.make_key(test_description, model, self.system_prompt, target_url)
+
+    def _messages(self, test_description: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self._build_prompt(test_description)}
+        ]
+
+    def invalidate_cached_plan(self, test_description: str, target_url: Optional[str] = None) -> bool:
+        """Drop the cached plan for a description so the next run asks the model again"""
+        return self.plan_cache.invalidate(self._plan_cache_key(test_description, target_url))
+
+    def update_cached_plan(self, test_description: str, actions: List[TestAction], target_url: Optional[str] = None):
+        """Replace the cached plan for a description, e.g. with repaired selectors"""
+        self.plan_cache.put(
+            self._plan_cache_key(test_description, target_url),
+            [asdict(action) for action in actions],
+            description=test_description,
+            model=self.model,
+            target_url=target_url
+        )
+
+    def _build_prompt(self, test_description: str) -> str:
+        """User prompt asking the model for a JSON array of actions"""
+        # Enhanced prompt for better natural language understanding
+        return f"""
+        Convert the following instruction into a sequence of Playwright test steps:
+        
+        INSTRUCTION: {test_description}
+        
+        GUIDELINES:
+        - Understand the user's intent even if phrased differently
+        - Choose the most appropriate action type based on context
+        - Use semantic selectors when possible (prefer text, aria-labels, etc.)
+        - Include necessary waits for page transitions or element loading
+        - Be explicit about what each step is trying to accomplish
+        
+        RESPONSE FORMAT (JSON array):
+        [
+            {{
+                // Required: Type of action (navigate, click, fill, etc.)
+                "action_type": "navigate",
+                
+                // Required: Human-readable description matching user's intent
+                "description": "Navigate to example.com",
+                
+                // Required for element interactions: CSS, text, or other selector
+                "selector": "https://example.com",
+                
+                // For inputs, selections, or assertions
+                "value": "example@test.com",
+                
+                // Optional: Wait for element before action (prevents flakiness)
+                "wait_for_selector": ".login-form",
+                
+                // Optional: Additional parameters as needed
+                "timeout": 10000
+            }}
+        ]
+        
+        Return ONLY the JSON array, with no additional text or formatting.
+        """
+
+    @staticmethod
+    def _action_from_data(action_data: Dict[str, Any]) -> TestAction:
+        """Build a TestAction from one parsed action object"""
+        # Create a copy of action_data to avoid modifying the original
+        action_kwargs = dict(action_data)
+        # Handle timeout parameter - map it to the appropriate field
+        if 'timeout' in action_kwargs and action_kwargs.get('action_type') == 'wait_for_selector':
+            action_kwargs['wait_timeout'] = action_kwargs.pop('timeout')
+        return TestAction(**action_kwargs)
+
+    def _actions_from_data(self, actions_data: Any) -> List[TestAction]:
+        """Build TestActions from a parsed response (array, {"actions": [...]} or a single action)"""
+        if isinstance(actions_data, dict):
+            if 'actions' in actions_data and isinstance(actions_data['actions'], list):
+                actions_data = actions_data['actions']
+            else:
+                # If it's a dict but doesn't have 'actions', try to use it as a single action
+                actions_data = [actions_data]
+        elif not isinstance(actions_data, list):
+            raise ValueError(f"Unexpected response format: {type(actions_data)}")
+
+        test_actions = []
+        for i, action_data in enumerate(actions_data, 1):
+            try:
+                test_actions.append(self._action_from_data(action_data))
+            except Exception as e:
+                print(f"Error creating TestAction from action {i}: {e}")
+                print(f"Action data: {action_data}")
+                raise
+        return test_actions
+
+    async def generate_test_actions(
+        self,
+        test_description: str,
+        target_url: Optional[str] = None,
+        use_cache: bool = True
+    ) -> List[TestAction]:
         """Generate a list of test actions from a natural language description"""
+        with get_tracer().span('llm.plan', model=self.model, provider=self.provider.name, streaming=False) as span:
+            test_actions = await self._generate_test_actions(test_description, target_url, use_cache)
+            span.set(actions=len(test_actions))
+            return test_actions
+
+    async def _generate_test_actions(
+        self,
+        test_description: str,
+        target_url: Optional[str],
+        use_cache: bool
+    ) -> List[TestAction]:
+        cache_key = self._plan_cache_key(test_description, target_url)
+        if use_cache:
+            cached = self.plan_cache.get(cache_key)
+            if cached is not None:
+                print(f"Using cached plan ({len(cached)} actions) for: {test_description[:80]}")
+                span = current_span()
+                if span is not None:
+                    span.set(cached=True)
+                return [TestAction(**action_data) for action_data in cached]
+
         try:
-            # Enhanced prompt for better natural language understanding
-            prompt = f"""
-            Convert the following instruction into a sequence of Playwright test steps:
-            
-            INSTRUCTION: {test_description}
-            
-            GUIDELINES:
-            - Understand the user's intent even if phrased differently
-            - Choose the most appropriate action type based on context
-            - Use semantic selectors when possible (prefer text, aria-labels, etc.)
-            - Include necessary waits for page transitions or element loading
-            - Be explicit about what each step is trying to accomplish
-            
-            RESPONSE FORMAT (JSON array):
-            [
-                {{
-                    // Required: Type of action (navigate, click, fill, etc.)
-                    "action_type": "navigate",
-                    
-                    // Required: Human-readable description matching user's intent
-                    "description": "Navigate to example.com",
-                    
-                    // Required for element interactions: CSS, text, or other selector
-                    "selector": "https://example.com",
-                    
-                    // For inputs, selections, or assertions
-                    "value": "example@test.com",
-                    
-                    // Optional: Wait for element before action (prevents flakiness)
-                    "wait_for_selector": ".login-form",
-                    
-                    // Optional: Additional parameters as needed
-                    "timeout": 10000
-                }}
-            ]
-            
-            Return ONLY the JSON array, with no additional text or formatting.
-            """
-            
             # Print debug info
-            print(f"Sending request to OpenAI with model: {self.model}")
+            print(f"Sending request to {self.provider.name} with model: {self.model}")
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2
-            )
-            
-            if not response or not hasattr(response, 'choices') or not response.choices:
-                raise ValueError("Invalid response format from OpenAI API")
-                
-            # Extract and clean the response
-            content = response.choices[0].message.content
+            content = await self.provider.complete(self._messages(test_description), self.model, temperature=0.2)
             print(f"Raw response content: {content[:200]}...")  # Print first 200 chars for debugging
-            
-            # Clean up the response
-            if not content:
-                raise ValueError("Empty response from OpenAI API")
                 
             # Try to extract JSON from markdown code blocks if present
             if '```json' in content:
@@ -137,51 +277,18 @@ class AITestAgent:
                 raise
                 
             # Convert to TestAction objects
-            test_actions = []
-            if isinstance(actions_data, list):
-                for i, action_data in enumerate(actions_data, 1):
-                    try:
-                        # Create a copy of action_data to avoid modifying the original
-                        action_kwargs = action_data.copy()
-                        
-                        # Handle timeout parameter - map it to the appropriate field
-                        if 'timeout' in action_kwargs:
-                            if action_kwargs['action_type'] == 'wait_for_selector':
-                                action_kwargs['wait_timeout'] = action_kwargs.pop('timeout')
-                            else:
-                                action_kwargs['timeout'] = action_kwargs['timeout']
-                                
-                        test_actions.append(TestAction(**action_kwargs))
-                    except Exception as e:
-                        print(f"Error creating TestAction from action {i}: {e}")
-                        print(f"Action data: {action_data}")
-                        raise
-            elif isinstance(actions_data, dict):
-                if 'actions' in actions_data and isinstance(actions_data['actions'], list):
-                    for i, action_data in enumerate(actions_data['actions'], 1):
-                        try:
-                            action_kwargs = action_data.copy()
-                            if 'timeout' in action_kwargs:
-                                if action_kwargs['action_type'] == 'wait_for_selector':
-                                    action_kwargs['wait_timeout'] = action_kwargs.pop('timeout')
-                            test_actions.append(TestAction(**action_kwargs))
-                        except Exception as e:
-                            print(f"Error creating TestAction from action {i}: {e}")
-                            print(f"Action data: {action_data}")
-                            raise
-                else:
-                    # If it's a dict but doesn't have 'actions', try to use it as a single action
-                    try:
-                        test_actions.append(TestAction(**actions_data))
-                    except Exception as e:
-                        print(f"Error creating TestAction from dict: {e}")
-                        print(f"Action data: {actions_data}")
-                        raise
-            else:
-                raise ValueError(f"Unexpected response format: {type(actions_data)}")
+            test_actions = self._actions_from_data(actions_data)
                 
             if not test_actions:
                 print("Warning: No valid actions were generated")
+            elif use_cache:
+                self.plan_cache.put(
+                    cache_key,
+                    [asdict(action) for action in test_actions],
+                    description=test_description,
+                    model=self.model,
+                    target_url=target_url
+                )
                 
             return test_actions
             
@@ -189,25 +296,211 @@ class AITestAgent:
             print(f"Error generating test actions: {str(e)}")
             return []
 
+    async def stream_test_actions(
+        self,
+        test_description: str,
+        target_url: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[TestAction]:
+        """Yield test actions as soon as each one is complete in the streamed completion.
+
+        Lets callers start executing step 1 while the model is still writing
+        the rest of the plan. Falls back to parsing the whole response when it
+        did not contain an array of actions (e.g. a single action object).
+        """
+        # Not made current: the span stays open across yields to the caller
+        span = get_tracer().start('llm.plan', model=self.model, provider=self.provider.name, streaming=True)
+        count = 0
+        try:
+            async for action in self._stream_test_actions(test_description, target_url, use_cache):
+                if count == 0:
+                    span.set(first_action_ms=round(span.duration_ms, 2))
+                count += 1
+                yield action
+        finally:
+            span.set(actions=count)
+            span.end()
+
+    async def _stream_test_actions(
+        self,
+        test_description: str,
+        target_url: Optional[str],
+        use_cache: bool
+    ) -> AsyncIterator[TestAction]:
+        cache_key = self._plan_cache_key(test_description, target_url)
+        if use_cache:
+            cached = self.plan_cache.get(cache_key)
+            if cached is not None:
+                print(f"Using cached plan ({len(cached)} actions) for: {test_description[:80]}")
+                for action_data in cached:
+                    yield TestAction(**action_data)
+                return
+
+        parser = ActionStreamParser()
+        test_actions: List[TestAction] = []
+        try:
+            print(f"Streaming request to {self.provider.name} with model: {self.model}")
+            async for delta in self.provider.stream(self._messages(test_description), self.model, temperature=0.2):
+                for action_data in parser.feed(delta):
+                    action = self._action_from_data(action_data)
+                    test_actions.append(action)
+                    yield action
+
+            if not test_actions:
+                content = parser.buffer
+                if '```json' in content:
+                    content = content.split('```json')[1].split('```')[0].strip()
+                elif '```' in content:
+                    content = content.split('```')[1].split('```')[0].strip()
+                for action in self._actions_from_data(json.loads(content)):
+                    test_actions.append(action)
+                    yield action
+        except Exception as e:
+            print(f"Error streaming test actions: {str(e)}")
+            if test_actions:
+                # The caller already has part of the plan; don't let it pass as complete
+                raise
+            return
+
+        if not test_actions:
+            print("Warning: No valid actions were generated")
+        elif use_cache:
+            self.plan_cache.put(
+                cache_key,
+                [asdict(action) for action in test_actions],
+                description=test_description,
+                model=self.model,
+                target_url=target_url
+            )
+
+    async def generate_test_plans(
+        self,
+        test_descriptions: List[str],
+        target_url: Optional[str] = None,
+        max_concurrency: int = 5
+    ) -> List[List[TestAction]]:
+        """Generate plans for several descriptions concurrently on the current event loop"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate(description: str) -> List[TestAction]:
+            async with semaphore:
+                return await self.generate_test_actions(description, target_url=target_url)
+
+        return await asyncio.gather(*(generate(d) for d in test_descriptions))
+
+class PlanStream:
+    """Consumes stream_test_actions in a background task so parsing keeps up while steps execute.
+
+    Iterate it like the generator; ``total`` is the number of actions known so
+    far, plus one while the model is still writing. If the stream fails after
+    some actions, iteration ends early and ``error`` holds the exception.
+    """
+
+    def __init__(self, actions: AsyncIterator[TestAction]):
+        self.received = 0
+        self.finished = False
+        self.error: Optional[Exception] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._pump(actions))
+
+    async def _pump(self, actions: AsyncIterator[TestAction]):
+        try:
+            async for action in actions:
+                self.received += 1
+                await self._queue.put(action)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+            await self._queue.put(None)
+
+    @property
+    def total(self) -> int:
+        return self.received if self.finished else self.received + 1
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> TestAction:
+        action = await self._queue.get()
+        if action is None:
+            raise StopAsyncIteration
+        return action
+
+    async def aclose(self):
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
 class TestExecutor:
     """Executes test actions using Playwright"""
     
-    def __init__(self, page):
+    def __init__(
+        self,
+        page,
+        settle: Optional[SettleStrategy] = None,
+        screenshot_policy: Optional[ScreenshotPolicy] = None,
+        artifact_store: Optional[ArtifactStore] = None,
+        repairer: Optional[LocatorRepairer] = None
+    ):
         self.page = page
+        self.settle = settle or SettleStrategy()
+        self.settle.attach(page)
+        self.screenshot_policy = screenshot_policy or ScreenshotPolicy.from_env()
+        self.artifact_store = artifact_store or get_artifact_store()
+        self.repairer = repairer or LocatorRepairer.from_env()
+        self.tracer = get_tracer()
+        self.step_number = 0
+        self._preloaded: Optional[tuple] = None
+
+    async def preload(self, url: str):
+        """Open `url` ahead of the plan so a matching first 'navigate' step can skip the reload"""
+        url = url if '://' in url else f'https://{url}'
+        with self.tracer.span('navigate', url=url, preload=True):
+            await self.page.goto(url, timeout=60000, wait_until='domcontentloaded')
+        self._preloaded = (normalize_url(url), self.page.url)
+
+    def consume_preloaded(self, url: str) -> bool:
+        """True if the page is still where preload() left it for `url`; only usable once"""
+        preloaded, self._preloaded = self._preloaded, None
+        return preloaded is not None and preloaded == (normalize_url(url), self.page.url)
         
-    async def execute_action(self, action: TestAction):
-        """Execute a single test action with improved error handling and logging"""
+    async def execute_action(self, action: TestAction) -> Dict[str, Any]:
+        """Execute a single test action with improved error handling and logging.
+
+        The step is traced as a 'step' span; the result's 'phases' maps each
+        phase (navigate, wait, action, settle, screenshot, artifact.write)
+        to the milliseconds spent in it.
+        """
+        with self.tracer.span(
+            'step',
+            step=self.step_number + 1,
+            action_type=action.action_type,
+            selector=action.selector or ''
+        ) as span:
+            result = await self._execute_action(action)
+            result['phases'] = span.phases()
+            return result
+
+    async def _execute_action(self, action: TestAction) -> Dict[str, Any]:
+        self.step_number += 1
+        start_time = time.time()
         try:
             print(f"\n=== Executing: {action.description} ===")
             print(f"Action type: {action.action_type}")
-            
-            # Add a small delay between actions to prevent rate limiting
-            await self.page.wait_for_timeout(500)
+            previous_url = self.page.url
             
             if action.action_type == 'navigate':
                 url = action.selector if '://' in action.selector else f'https://{action.selector}'
-                print(f"Navigating to: {url}")
-                await self.page.goto(url, timeout=60000)
+                if self.consume_preloaded(url):
+                    print(f"Already on {url} (opened while the plan was generated)")
+                else:
+                    print(f"Navigating to: {url}")
+                    with self.tracer.span('navigate', url=url):
+                        await self.page.goto(url, timeout=60000)
                 print(f"Page title: {await self.page.title()}")
                 
             elif action.action_type == 'click':
@@ -215,86 +508,163 @@ class TestExecutor:
                 print(f"Clicking on: {selector}")
                 
                 # Wait for element to be visible and clickable
-                element = await self.page.wait_for_selector(
-                    selector,
-                    state='visible',
-                    timeout=10000  # 10 seconds timeout
-                )
-                await element.scroll_into_view_if_needed()
-                await element.click(delay=100)  # Add small delay to mimic human behavior
+                with self.tracer.span('wait'):
+                    element = await self.page.wait_for_selector(
+                        selector,
+                        state='visible',
+                        timeout=10000  # 10 seconds timeout
+                    )
+                with self.tracer.span('action'):
+                    await element.scroll_into_view_if_needed()
+                    await element.click(delay=100)  # Add small delay to mimic human behavior
                 print("Click successful")
                 
             elif action.action_type == 'fill':
                 print(f"Filling field {action.selector} with: {action.value}")
-                await self.page.fill(action.selector, str(action.value))
+                with self.tracer.span('action'):
+                    await self.page.fill(action.selector, str(action.value))
                 
             elif action.action_type == 'select':
                 print(f"Selecting option {action.value} from {action.selector}")
-                await self.page.select_option(action.selector, value=str(action.value))
+                with self.tracer.span('action'):
+                    await self.page.select_option(action.selector, value=str(action.value))
                 
             elif action.action_type == 'wait':
+                # Explicit fixed sleep, only when the plan asks for one
                 seconds = int(action.value) if action.value else 1
                 print(f"Waiting for {seconds} seconds...")
-                await asyncio.sleep(seconds)
+                with self.tracer.span('sleep', seconds=seconds):
+                    await asyncio.sleep(seconds)
                 
             elif action.action_type == 'screenshot':
                 filename = action.value or f'screenshot_{int(time.time())}.png'
                 print(f"Taking screenshot: {filename}")
-                await self.page.screenshot(path=filename, full_page=True)
+                with self.tracer.span('screenshot', path=filename):
+                    await self.page.screenshot(path=filename, full_page=True)
                 
             elif action.action_type == 'scroll':
                 print("Scrolling the page")
-                await self.page.evaluate('window.scrollBy(0, window.innerHeight)')
+                with self.tracer.span('action'):
+                    await self.page.evaluate('window.scrollBy(0, window.innerHeight)')
+                
+            elif action.action_type in ('check', 'uncheck'):
+                print(f"{'Checking' if action.action_type == 'check' else 'Unchecking'}: {action.selector}")
+                with self.tracer.span('action'):
+                    await getattr(self.page, action.action_type)(action.selector)
+                
+            elif action.action_type == 'hover':
+                print(f"Hovering over: {action.selector}")
+                with self.tracer.span('action'):
+                    await self.page.hover(action.selector)
+                
+            elif action.action_type == 'press':
+                key = str(action.value or 'Enter')
+                print(f"Pressing {key} on {action.selector or 'body'}")
+                with self.tracer.span('action'):
+                    await self.page.press(action.selector or 'body', key)
+                
+            elif action.action_type == 'wait_for_selector':
+                selector = action.selector or action.wait_for_selector
+                print(f"Waiting for: {selector}")
+                with self.tracer.span('wait'):
+                    await self.page.wait_for_selector(selector, state='visible', timeout=action.wait_timeout)
+                
+            elif action.action_type == 'assert':
+                selector = action.selector or 'body'
+                print(f"Verifying {selector}" + (f" contains: {action.value}" if action.value else " is visible"))
+                with self.tracer.span('wait'):
+                    element = await self.page.wait_for_selector(selector, state='visible', timeout=10000)
+                if action.value:
+                    text = ' '.join((await element.inner_text()).split())
+                    expected = ' '.join(str(action.value).split())
+                    if expected.lower() not in text.lower():
+                        raise AssertionError(f"Expected {selector} to contain {expected!r}")
                 
-            # Add more action types as needed
+            else:
+                # Passing an unknown step would report a check that never ran as green
+                raise ValueError(f"Unsupported action type '{action.action_type}'")
+            
+            # Wait only until navigation, network and DOM activity settle
+            with self.tracer.span('settle'):
+                waited = await self.settle.settle(self.page, previous_url=previous_url)
+            print(f"Page settled in {waited * 1000:.0f}ms")
             
-            # Take a screenshot after each action for debugging
+            # Take a screenshot after the action if the policy asks for one
+            screenshot = None
             try:
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                os.makedirs('screenshots', exist_ok=True)
-                await self.page.screenshot(path=f'screenshots/step_{timestamp}.png')
+                screenshot_bytes = await self.screenshot_policy.capture(self.page, step=self.step_number)
+                if screenshot_bytes:
+                    screenshot = await self.artifact_store.store(screenshot_bytes, self.screenshot_policy.extension)
             except Exception as e:
                 print(f"Warning: Could not take screenshot: {e}")
-                
-            # Small delay to allow page to update
-            await self.page.wait_for_timeout(1000)
+            
+            return {
+                'description': action.description,
+                'action_type': action.action_type,
+                'selector': action.selector,
+                'value': action.value,
+                'status': 'passed',
+                'screenshot': screenshot,
+                'duration': time.time() - start_time
+            }
             
         except Exception as e:
             error_msg = f"Error executing action '{action.description}': {str(e)}"
             print(f"\n!!! ERROR: {error_msg}")
             
-            # Take a screenshot on error
+            # Take a screenshot on error and hand it to the caller with the error
+            screenshot = None
             try:
-                os.makedirs('error_screenshots', exist_ok=True)
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                await self.page.screenshot(
-                    path=f'error_screenshots/error_{timestamp}.png',
-                    full_page=True
-                )
-                print(f"Screenshot saved to error_screenshots/error_{timestamp}.png")
+                screenshot_bytes = await self.screenshot_policy.capture(self.page, step=self.step_number, failed=True)
+                if screenshot_bytes:
+                    screenshot = await self.artifact_store.store(screenshot_bytes, self.screenshot_policy.extension)
+                    print(f"Screenshot saved to {screenshot.path}")
             except Exception as screenshot_error:
                 print(f"Could not take error screenshot: {screenshot_error}")
                 
-            raise Exception(error_msg) from e
+            raise StepError(error_msg, screenshot) from e
             
+    async def _execute_with_repair(self, action: TestAction) -> Optional[str]:
+        """Run one action; if its selector fails, retry once with a repaired one and return it"""
+        try:
+            await self.execute_action(action)
+            return None
+        except Exception as e:
+            if not self.repairer.can_repair(action):
+                raise
+            selector = await self.repairer.repair(self.page, action, str(e))
+            if selector is None:
+                raise
+        # The retry is the same plan step: keep screenshot numbering, every_n and spans aligned
+        self.step_number -= 1
+        await self.execute_action(replace(action, selector=selector))
+        return selector
+
     async def execute_test(self, actions: List[TestAction]):
-        """Execute a sequence of test actions"""
+        """Execute a sequence of test actions.
+
+        With locator repair enabled, a step that fails on its selector is
+        retried in place with a repaired one; its result then carries
+        'repaired_selector' (see locator_repair.apply_repairs).
+        """
         results = []
         for i, action in enumerate(actions, 1):
             try:
-                await self.execute_action(action)
+                repaired_selector = await self._execute_with_repair(action)
                 results.append({
                     'step': i,
                     'description': action.description,
                     'status': 'passed',
-                    'error': None
+                    'error': None,
+                    'repaired_selector': repaired_selector
                 })
             except Exception as e:
                 results.append({
                     'step': i,
                     'description': action.description,
                     'status': 'failed',
-                    'error': str(e)
+                    'error': str(e),
+                    'screenshot': getattr(e, 'screenshot', None)
                 })
                 break  # Stop on first failure
                 
@@ -1,7 +1,7 @@
 import streamlit as st
 import os
-import asyncio
 import sys
+import time
 from pathlib import Path
 
 # Add the project root to the path
@@ -9,6 +9,7 @@ sys.path.append(str(Path(__file__).parent))
 
 # Import the HardeesTest class
 from program import HardeesTest, display_test_results
+from job_queue import get_job_manager, POLL_INTERVAL
 
 from dotenv import load_dotenv
 
@@ -59,6 +60,29 @@ if 'test_cases' not in st.session_state:
 if 'results' not in st.session_state:
     st.session_state.results = {}
 
+def sync_job_results():
+    """Copy finished background jobs into the session; returns True while any are still running"""
+    pending = False
+    for test_case in st.session_state.test_cases:
+        result = st.session_state.results.get(test_case["id"])
+        if not result or result["status"] != "running" or "job_id" not in result:
+            continue
+        job = get_job_manager().get(result["job_id"])
+        if job is None:
+            result.update(status="error", output="The test run was lost (server restarted?)")
+        elif not job.done:
+            pending = True
+            continue
+        elif job.status == "succeeded":
+            success, message, screenshots = job.result
+            result.update(status="completed" if success else "error", output=message, screenshots=screenshots)
+        else:
+            result.update(status="error", output=job.error or "Test was cancelled")
+        test_case["status"] = "Passed" if result["status"] == "completed" else "Failed"
+    return pending
+
+jobs_pending = sync_job_results()
+
 # Sidebar for API configuration
 with st.sidebar:
     st.title("⚙️ Configuration")
@@ -181,23 +205,9 @@ with tab1:
                             finally:
                                 await test.close()
                         
-                        success, message, screenshots = asyncio.run(run_test(headless))
-                        
-                        # Display screenshots in the UI
-                        if screenshots:
-                            st.subheader("Test Execution Screenshots")
-                            cols = st.columns(2)  # 2 columns for better layout
-                            
-                            for i, screenshot in enumerate(screenshots):
-                                with cols[i % 2]:  # Alternate between columns
-                                    st.image(screenshot, 
-                                            caption=os.path.basename(screenshot).replace('_', ' ').title(),
-                                            use_column_width=True)
-                                    st.caption(f"Step {i+1}: {os.path.splitext(os.path.basename(screenshot))[0]}")
-                        if success:
-                            st.success(message)
-                        else:
-                            st.error(message)
+                        # Run out of band so the session (and other users) stay responsive
+                        job = get_job_manager().submit(lambda job: run_test(headless), name=test_id)
+                        st.session_state.results[test_id]["job_id"] = job.id
                         
                         st.success("Test started! Check the 'Test Cases' tab for progress.")
                         
@@ -251,6 +261,8 @@ with tab3:
                 with st.spinner("Test in progress. This may take a few minutes..."):
                     st.progress(0, text="Executing test steps...")
                     st.info("Please wait while the test is being executed. This may take a few minutes.")
+                    if st.button("⏹️ Cancel Test", key=f"cancel_{test_id}"):
+                        get_job_manager().cancel(result.get("job_id"))
                     
             elif result["status"] == "error":
                 # Error details section
@@ -296,6 +308,18 @@ with tab3:
                     st.metric("Status", "✅ Passed")
                 with col2:
                     st.metric("Test Case", test_case["name"])
+            
+            # Display screenshots in the UI
+            if result.get("screenshots"):
+                st.subheader("Test Execution Screenshots")
+                cols = st.columns(2)  # 2 columns for better layout
+                
+                for i, screenshot in enumerate(result["screenshots"]):
+                    with cols[i % 2]:  # Alternate between columns
+                        st.image(screenshot, 
+                                caption=os.path.basename(screenshot).replace('_', ' ').title(),
+                                use_column_width=True)
+                        st.caption(f"Step {i+1}: {os.path.splitext(os.path.basename(screenshot))[0]}")
 
 # Add some spacing at the bottom
 st.markdown("---")
@@ -306,3 +330,8 @@ It leverages OpenAI's language models to generate and execute test cases based o
 
 **Note:** Make sure to have Node.js and npm installed for the MCP servers to work properly.
 """)
+
+# Keep polling while this session has tests running in the background
+if jobs_pending:
+    time.sleep(POLL_INTERVAL)
+    st.rerun()
@@ -0,0 +1,226 @@
+"""
+Content-addressed artifact store for screenshots and other binary evidence
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_DIR = os.getenv('ARTIFACT_DIR', 'artifacts')
+# Artifacts not stored again for this long are garbage collected; 0 keeps everything
+DEFAULT_MAX_AGE_DAYS = float(os.getenv('ARTIFACT_MAX_AGE_DAYS', '7'))
+
+MIME_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+class ArtifactHandle:
+    """Lightweight reference to a stored artifact; bytes are only loaded on demand"""
+    __slots__ = ('ref', 'store')
+
+    def __init__(self, ref: str, store: Optional['ArtifactStore'] = None):
+        self.ref = ref
+        self.store = store
+
+    def _store(self) -> 'ArtifactStore':
+        return self.store or get_artifact_store()
+
+    @property
+    def path(self) -> Path:
+        return self._store().path(self.ref)
+
+    @property
+    def extension(self) -> str:
+        return self.ref.rsplit('.', 1)[-1]
+
+    @property
+    def mime_type(self) -> str:
+        return MIME_TYPES.get(self.extension, 'application/octet-stream')
+
+    def read(self) -> bytes:
+        return self._store().get(self.ref)
+
+    async def aread(self) -> bytes:
+        return await self._store().aget(self.ref)
+
+    def save_to(self, destination) -> Path:
+        """Copy the artifact to `destination` without loading it into memory"""
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self.path, destination)
+        return destination
+
+    def __str__(self) -> str:
+        return self.ref
+
+    def __repr__(self) -> str:
+        return f"ArtifactHandle({self.ref!r})"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ArtifactHandle) and other.ref == self.ref
+
+    def __hash__(self) -> int:
+        return hash(self.ref)
+
+
+class ArtifactStore:
+    """Stores each unique blob once under its SHA-256 and writes off the event loop.
+
+    References look like ``<sha256>.<ext>`` and are stable across runs, so the
+    same frame captured twice (or by two workers) maps to one file on disk.
+    """
+
+    def __init__(self, root: str = DEFAULT_ARTIFACT_DIR, max_workers: int = 4):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='artifact-writer')
+        self._known: Set[str] = set()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {'stored': 0, 'deduplicated': 0, 'bytes_written': 0}
+
+    @staticmethod
+    def ref_for(data: bytes, extension: str = 'png') -> str:
+        return f"{hashlib.sha256(data).hexdigest()}.{extension.lstrip('.')}"
+
+    def path(self, ref: str) -> Path:
+        """On-disk location of a reference (sharded by the first two hex digits)"""
+        return self.root / ref[:2] / ref
+
+    def exists(self, ref: str) -> bool:
+        return ref in self._known or self.path(ref).exists()
+
+    def _submit(self, ref: str, data: bytes) -> Tuple[Optional[Future], bool]:
+        """The write of `ref` to wait on (None if it is already stored) and whether it was deduplicated.
+
+        A ref only becomes known once its file is on disk; a concurrent put of
+        the same bytes waits on the write already in flight instead of
+        returning a ref that cannot be read yet.
+        """
+        with self._lock:
+            if ref in self._known:
+                self.stats['deduplicated'] += 1
+                self._executor.submit(self._touch, ref)
+                return None, True
+            future = self._pending.get(ref)
+            if future is not None:
+                self.stats['deduplicated'] += 1
+                return future, True
+            future = self._executor.submit(self._write, ref, data)
+            self._pending[ref] = future
+        future.add_done_callback(lambda done: self._settle(ref, done))
+        return future, False
+
+    def _settle(self, ref: str, future: Future):
+        with self._lock:
+            self._pending.pop(ref, None)
+            if future.exception() is None:
+                self._known.add(ref)
+
+    def _write(self, ref: str, data: bytes):
+        path = self.path(ref)
+        if path.exists():
+            self._touch(ref)
+            with self._lock:
+                self.stats['deduplicated'] += 1
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)  # atomic, so readers never see partial files
+        with self._lock:
+            self.stats['stored'] += 1
+            self.stats['bytes_written'] += len(data)
+
+    async def put(self, data: bytes, extension: str = 'png') -> str:
+        """Store bytes without blocking the event loop and return their reference"""
+        with get_tracer().span('artifact.write', bytes=len(data)) as span:
+            ref = self.ref_for(data, extension)
+            future, deduplicated = self._submit(ref, data)
+            span.set(deduplicated=deduplicated)
+            if future is not None:
+                await asyncio.wrap_future(future)
+            return ref
+
+    async def store(self, data: bytes, extension: str = 'png') -> ArtifactHandle:
+        """Like put() but returns a lazy handle instead of the bare reference"""
+        return ArtifactHandle(await self.put(data, extension), self)
+
+    def handle(self, ref: str) -> ArtifactHandle:
+        return ArtifactHandle(ref, self)
+
+    def put_sync(self, data: bytes, extension: str = 'png') -> str:
+        ref = self.ref_for(data, extension)
+        future, _ = self._submit(ref, data)
+        if future is not None:
+            future.result()
+        return ref
+
+    def get(self, ref: str) -> bytes:
+        with open(self.path(ref), 'rb') as f:
+            return f.read()
+
+    async def aget(self, ref: str) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, ref)
+
+    def _touch(self, ref: str):
+        """Mark a reused artifact as fresh so prune() keeps it"""
+        try:
+            os.utime(self.path(ref))
+        except OSError:
+            pass
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete artifacts and thumbnails not written or reused within `max_age_seconds`.
+
+        Refs are shared by every session and job, so nothing is deleted on
+        behalf of one owner; unused blobs simply age out. Returns how many
+        files were removed.
+        """
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for path in self.root.rglob('*'):
+            try:
+                if not path.is_file() or path.stat().st_mtime >= cutoff:
+                    continue
+                path.unlink()
+            except OSError:
+                continue
+            with self._lock:
+                self._known.discard(path.name)
+            removed += 1
+        if removed:
+            logger.info(f"Pruned {removed} artifacts older than {max_age_seconds / 86400:g} days")
+        return removed
+
+    def clear(self):
+        """Delete every stored artifact"""
+        with self._lock:
+            self._known.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide artifact store rooted at $ARTIFACT_DIR; prunes artifacts older than $ARTIFACT_MAX_AGE_DAYS on creation"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+            if DEFAULT_MAX_AGE_DAYS > 0:
+                _store._executor.submit(_store.prune, DEFAULT_MAX_AGE_DAYS * 86400)
+        return _store
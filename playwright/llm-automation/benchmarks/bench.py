@@ -0,0 +1,394 @@
+"""
+Benchmark the executor hot path against the local fixture site
+
+    python benchmarks/bench.py                                 # run and print results
+    python benchmarks/bench.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench.py --baseline benchmarks/baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from playwright.async_api import async_playwright
+
+from ai_test_agent import AITestAgent, TestAction, TestExecutor
+from interstitials import InterstitialWatchdog
+from llm_providers import RuleBasedProvider
+from plan_cache import PlanCache
+from screenshot_policy import ScreenshotPolicy
+from selector_cache import SelectorCache
+from selector_probe import resolve_selector
+from simple_test_agent import SimpleTestAgent
+from test_playwright import PlaywrightTest
+from server import serve_fixtures
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class Fixture:
+    """What a scenario gets besides its page"""
+    base_url: str
+    selector_cache: SelectorCache  # shared across iterations, so warm runs show what the cache buys
+
+
+# A scenario drives one page and returns the latency of each step, in seconds
+Scenario = Callable[[object, Fixture], Awaitable[List[float]]]
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def executor_spa(page, fixture: Fixture) -> List[float]:
+    """TestExecutor through SPA route changes and a form"""
+    base_url = fixture.base_url
+    executor = TestExecutor(page, screenshot_policy=ScreenshotPolicy(mode='never'))
+    actions = [
+        TestAction('navigate', f"{base_url}/spa.html", description="Open the SPA"),
+        TestAction('click', 'a[data-route="products"]', description="Go to products"),
+        TestAction('click', 'a[data-route="settings"]', description="Go to settings"),
+        TestAction('fill', '#name', 'Benchmark', description="Fill the name"),
+        TestAction('select', '#size', 'l', description="Pick a size"),
+        TestAction('click', '#save', description="Save settings"),
+        TestAction('click', 'a[data-route="home"]', description="Back home"),
+    ]
+    return [await timed(executor.execute_action(action)) for action in actions]
+
+
+async def executor_slow_elements(page, fixture: Fixture) -> List[float]:
+    """TestExecutor waiting for late elements and a render-blocking stylesheet"""
+    base_url = fixture.base_url
+    executor = TestExecutor(page, screenshot_policy=ScreenshotPolicy(mode='never'))
+    actions = [
+        TestAction('navigate', f"{base_url}/slow.html?ms=400", description="Open the slow page"),
+        TestAction('click', '#late', description="Click the late button"),
+        TestAction('navigate', f"{base_url}/slow.html?ms=150", description="Reload with a faster button"),
+        TestAction('click', '#late', description="Click the late button again"),
+    ]
+    return [await timed(executor.execute_action(action)) for action in actions]
+
+
+async def simple_agent_steps(page, fixture: Fixture) -> List[float]:
+    """SimpleTestAgent's navigate/fill/click steps through a saucedemo-style login and cart"""
+    agent = SimpleTestAgent(page, base_url=f"{fixture.base_url}/sauce", screenshot_policy=ScreenshotPolicy(mode='never'),
+                            screenshots_dir=tempfile.gettempdir())
+    steps = [
+        agent.navigate(),
+        agent.fill("input[data-test='username']", "standard_user"),
+        agent.fill("input[data-test='password']", "secret_sauce"),
+        agent.click("input[data-test='login-button']"),
+        agent.click("button[data-test^='add-to-cart']"),
+    ]
+    latencies = []
+    for step in steps:
+        start = time.perf_counter()
+        result = await step
+        latencies.append(time.perf_counter() - start)
+        if not result.success:
+            raise RuntimeError(f"{result.message}: {result.error}")
+    return latencies
+
+
+async def simple_agent_plan(page, fixture: Fixture) -> List[float]:
+    """One full SimpleTestAgent 'add to cart' plan per sample"""
+    agent = SimpleTestAgent(page, base_url=f"{fixture.base_url}/sauce", screenshot_policy=ScreenshotPolicy(mode='never'),
+                            screenshots_dir=tempfile.gettempdir())
+    start = time.perf_counter()
+    results = await agent.execute_test_plan("Add to cart test")
+    if not all(result.success for result in results):
+        raise RuntimeError(next(result.error for result in results if not result.success))
+    return [time.perf_counter() - start]
+
+
+async def wait_and_click_menu(page, fixture: Fixture) -> List[float]:
+    """PlaywrightTest.wait_and_click on items deep in a 500-entry scrolling menu"""
+    test = PlaywrightTest(headless=True, timeout=10000)
+    test.page = page
+    await page.goto(f"{fixture.base_url}/menu.html")
+    latencies = []
+    for index in (5, 120, 250, 499):
+        start = time.perf_counter()
+        if not await test.wait_and_click(f'a.menu-item[data-index="{index}"]'):
+            raise RuntimeError(f"wait_and_click failed for menu item {index}")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# Candidate lists in the shape of the Hardee's flows; on the fixture the item and
+# add-to-cart candidates only match late in their lists
+BURGER_CATEGORIES = [
+    'a:has-text("Burgers")',
+    'a:has-text("Charbroiled Burgers")',
+    'a:has-text("Classic Burgers")',
+    'a:has-text("Burgers & Sandwiches")',
+    'a:has-text("Burgers & More")',
+]
+BURGER_ITEMS = [f'a:has-text("{name}"):visible' for name in
+                ('Double Cheeseburger', 'Frisco Burger', 'Thickburger', 'Bacon Burger', 'Cheeseburger')]
+ADD_BUTTONS = [
+    'button:has-text("Add to Order")',
+    'button:has-text("Add to Cart")',
+    'button[data-testid*="add-to-cart"]',
+    'button:contains("Add to Order")',
+    'button:has-text("Add")',
+    'button:has-text("Order Now")',
+    'button.primary',
+]
+
+
+async def hardees_fallbacks(page, fixture: Fixture) -> List[float]:
+    """Hardee's-style flow: late cookie banner, then fallback selector chains for category, item and cart"""
+    site = 'hardees-fixture'
+    cache = fixture.selector_cache
+    watchdog = InterstitialWatchdog()
+    await watchdog.attach(page.context)
+    latencies = []
+    try:
+        latencies.append(await timed(page.goto(f"{fixture.base_url}/hardees/menu.html", wait_until='domcontentloaded')))
+        for intent, candidates in (('burger_category', BURGER_CATEGORIES), ('burger_item', BURGER_ITEMS)):
+            start = time.perf_counter()
+            selector = await resolve_selector(page, site, intent, candidates, timeout=3000, cache=cache)
+            if not selector:
+                raise RuntimeError(f"No candidate matched for {intent}")
+            await page.click(selector)
+            latencies.append(time.perf_counter() - start)
+        await page.wait_for_url('**/hardees/item.html*', wait_until='domcontentloaded')
+        start = time.perf_counter()
+        selector = await resolve_selector(page, site, 'add_to_cart', ADD_BUTTONS, timeout=3000, cache=cache)
+        if not selector:
+            raise RuntimeError("No add-to-cart candidate matched")
+        await page.click(selector)
+        await page.wait_for_function("document.querySelector('.cart-count').textContent === '1'")
+        latencies.append(time.perf_counter() - start)
+    finally:
+        await watchdog.stop()
+    return latencies
+
+
+PLAN_DESCRIPTIONS = [
+    "Go to saucedemo.com, fill 'standard_user' into username, fill 'secret_sauce' into password and click the 'Login' button",
+    "Open example.com then click More information link and verify 'IANA' is shown",
+    "Navigate to hardees.com, click 'Menu', click 'Burgers' and take a screenshot",
+    "Visit the-internet.herokuapp.com/login, type tomsmith into username, type 'SuperSecretPassword!' into password, press enter",
+]
+
+
+async def plan_generation(page, fixture: Fixture) -> List[float]:
+    """AITestAgent plan generation and parsing with the offline rule-based provider (no browser work)"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        agent = AITestAgent(plan_cache=PlanCache(f"{cache_dir}/plans.sqlite3"), provider=RuleBasedProvider())
+        latencies = []
+        for i in range(50):
+            start = time.perf_counter()
+            actions = await agent.generate_test_actions(PLAN_DESCRIPTIONS[i % len(PLAN_DESCRIPTIONS)], use_cache=False)
+            latencies.append(time.perf_counter() - start)
+            if not actions:
+                raise RuntimeError("The rule-based provider returned an empty plan")
+        agent.plan_cache.close()
+    return latencies
+
+
+async def ai_pipeline(page, fixture: Fixture) -> List[float]:
+    """Streamed rule-based plan executed by TestExecutor on the SPA fixture, end to end"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        agent = AITestAgent(plan_cache=PlanCache(f"{cache_dir}/plans.sqlite3"), provider=RuleBasedProvider())
+        executor = TestExecutor(page, screenshot_policy=ScreenshotPolicy(mode='never'))
+        description = (f"Open {fixture.base_url}/spa.html, click Products, click Settings, "
+                       "type Benchmark into #name, select l from #size, click #save")
+        latencies = []
+        start = time.perf_counter()
+        async for action in agent.stream_test_actions(description, use_cache=False):
+            await executor.execute_action(action)
+            latencies.append(time.perf_counter() - start)
+            start = time.perf_counter()
+        agent.plan_cache.close()
+    return latencies
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    'executor_spa': executor_spa,
+    'executor_slow_elements': executor_slow_elements,
+    'simple_agent_steps': simple_agent_steps,
+    'simple_agent_plan': simple_agent_plan,
+    'wait_and_click_menu': wait_and_click_menu,
+    'hardees_fallbacks': hardees_fallbacks,
+    'plan_generation': plan_generation,
+    'ai_pipeline': ai_pipeline,
+}
+
+
+@dataclass
+class ScenarioStats:
+    steps: int
+    total_s: float
+    steps_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    js_heap_mb: Optional[float]
+    rss_mb: Optional[float]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+async def js_heap_mb(page) -> Optional[float]:
+    try:
+        used = await page.evaluate("performance.memory ? performance.memory.usedJSHeapSize : null")
+    except Exception:
+        return None
+    return round(used / (1024 * 1024), 2) if used else None
+
+
+async def run_scenario(browser, name: str, base_url: str, iterations: int, warmup: int, verbose: bool = False) -> ScenarioStats:
+    scenario = SCENARIOS[name]
+    fixture = Fixture(
+        base_url=base_url,
+        selector_cache=SelectorCache(path=str(Path(tempfile.mkdtemp()) / 'selectors.json'), autosave=False)
+    )
+    latencies: List[float] = []
+    heap = None
+    for iteration in range(warmup + iterations):
+        context = await browser.new_context()
+        page = await context.new_page()
+        try:
+            # The agents print every step; keep the report readable
+            with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+                steps = await scenario(page, fixture)
+            heap = await js_heap_mb(page)
+        finally:
+            await context.close()
+        if iteration >= warmup:
+            latencies.extend(steps)
+
+    total = sum(latencies)
+    return ScenarioStats(
+        steps=len(latencies),
+        total_s=round(total, 3),
+        steps_per_sec=round(len(latencies) / total, 2) if total else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 1),
+        p95_ms=round(percentile(latencies, 95) * 1000, 1),
+        max_ms=round(max(latencies) * 1000, 1),
+        js_heap_mb=heap,
+        rss_mb=max_rss_mb()
+    )
+
+
+def compare(results: Dict[str, ScenarioStats], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance` (a fraction) in p50/p95 latency or throughput"""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if base.get(metric) and getattr(stats, metric) > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {getattr(stats, metric)} vs baseline {base[metric]}")
+        if base.get('steps_per_sec') and stats.steps_per_sec < base['steps_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: steps_per_sec {stats.steps_per_sec} vs baseline {base['steps_per_sec']}")
+    return regressions
+
+
+def print_table(results: Dict[str, ScenarioStats], baseline: Dict[str, dict]):
+    header = f"{'scenario':<24}{'steps':>6}{'steps/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'heap MB':>9}{'Δp95':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, stats in results.items():
+        base_p95 = baseline.get(name, {}).get('p95_ms')
+        delta = f"{(stats.p95_ms / base_p95 - 1) * 100:+.0f}%" if base_p95 else ''
+        heap = f"{stats.js_heap_mb:.1f}" if stats.js_heap_mb is not None else '-'
+        print(f"{name:<24}{stats.steps:>6}{stats.steps_per_sec:>9.2f}{stats.p50_ms:>9.1f}"
+              f"{stats.p95_ms:>9.1f}{stats.max_ms:>9.1f}{heap:>9}{delta:>8}")
+    rss = next(iter(results.values())).rss_mb if results else None
+    if rss is not None:
+        print(f"\nPeak RSS of the benchmark process: {rss} MB")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the executor against local fixture pages")
+    parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--iterations', type=int, default=5, help="Measured iterations per scenario")
+    parser.add_argument('--warmup', type=int, default=1, help="Unmeasured iterations per scenario")
+    parser.add_argument('--headed', action='store_true', help="Show the browser window")
+    parser.add_argument('--baseline', help="Baseline JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed regression as a fraction")
+    parser.add_argument('--save-baseline', help="Write these results as a new baseline")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the agents' own output and logs")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+    names = args.scenarios or list(SCENARIOS)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('scenarios', {})
+
+    results: Dict[str, ScenarioStats] = {}
+    with serve_fixtures() as base_url:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=not args.headed)
+            try:
+                for name in names:
+                    print(f"Running {name}...", flush=True)
+                    results[name] = await run_scenario(browser, name, base_url, args.iterations, args.warmup, args.verbose)
+            finally:
+                await browser.close()
+
+    print()
+    print_table(results, baseline)
+
+    payload = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'iterations': args.iterations,
+        'scenarios': {name: asdict(stats) for name, stats in results.items()},
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        Path(path).write_text(json.dumps(payload, indent=2), encoding='utf-8')
+        print(f"Results written to {path}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
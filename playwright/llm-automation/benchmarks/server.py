@@ -0,0 +1,83 @@
+"""
+Threaded local HTTP server for the benchmark fixture pages
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# Longest artificial delay a request may ask for, in milliseconds
+MAX_DELAY_MS = 5000
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Static fixture files plus a small JSON API.
+
+    Any request may add ``?delay=<ms>`` to be answered that much later, which
+    is how fixtures model slow networks deterministically.
+    ``/api/view?name=<view>`` returns the view's JSON for the SPA fixture.
+    """
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        delay_ms = min(int(query.get('delay', ['0'])[0] or 0), MAX_DELAY_MS)
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        if parsed.path == '/api/view':
+            name = query.get('name', ['home'])[0]
+            body = json.dumps({
+                'name': name,
+                'title': name.replace('-', ' ').title(),
+                'items': [f"{name} item {i}" for i in range(20)],
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def end_headers(self):
+        # Keep every iteration identical: no browser caching between runs
+        if not self.path.startswith('/api/'):
+            self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_fixtures(host: str = '127.0.0.1', port: int = 0) -> Iterator[str]:
+    """Serve the fixtures on a background thread and yield the base URL"""
+    handler = partial(FixtureHandler, directory=str(FIXTURES_DIR))
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='fixture-server', daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join(timeout=5)
+
+
+if __name__ == '__main__':
+    with serve_fixtures(port=8765) as base_url:
+        print(f"Serving {FIXTURES_DIR} at {base_url} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
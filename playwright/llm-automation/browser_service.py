@@ -0,0 +1,178 @@
+"""
+Long-lived browser service that keeps Chromium warm across Streamlit reruns
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Coroutine, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from llm_providers import close_async_openai_client
+from tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAUNCH_ARGS = [
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-gpu',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--no-sandbox',
+    '--disable-web-security',
+]
+
+
+class BrowserService:
+    """Playwright and one Chromium running on a dedicated background event loop.
+
+    Streamlit re-executes the script and tears down its event loop on every
+    interaction, so the browser lives on its own loop thread instead. Callers
+    submit coroutines with ``submit()``/``run()``; each test borrows a fresh
+    context via ``new_context()``.
+    """
+
+    def __init__(self, launch_args: Optional[List[str]] = None):
+        self.launch_args = launch_args or DEFAULT_LAUNCH_ARGS
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.headless: Optional[bool] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        # Contexts left open on purpose ("keep browser open"), at most one per owner
+        self._kept: Dict[str, BrowserContext] = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='browser-service', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the service loop and return a thread-safe future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the service loop and block until it finishes"""
+        return self.submit(coro).result(timeout)
+
+    def is_healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    async def ensure_browser(self, headless: bool = True) -> Browser:
+        """Return the running browser, (re)launching it if missing, crashed or in the wrong mode"""
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+
+        async with self._launch_lock:
+            if self.is_healthy() and self.headless == headless:
+                return self.browser
+
+            if self.browser is not None:
+                logger.info("Relaunching browser (healthy=%s, headless %s -> %s)",
+                            self.is_healthy(), self.headless, headless)
+                await self._close_browser()
+
+            with get_tracer().span('browser.launch', headless=headless):
+                if self.playwright is None:
+                    self.playwright = await async_playwright().start()
+
+                self.browser = await self.playwright.chromium.launch(
+                    headless=headless,
+                    args=self.launch_args
+                )
+            self.headless = headless
+            self.browser.on('disconnected', self._on_disconnected)
+            logger.info("Browser launched (headless=%s)", headless)
+            return self.browser
+
+    def _on_disconnected(self, browser: Browser):
+        if browser is self.browser:
+            logger.warning("Browser disconnected; it will be relaunched on next use")
+            self.browser = None
+
+    async def new_context(self, headless: bool = True, **context_options) -> BrowserContext:
+        """Create a fresh isolated context on the warm browser"""
+        browser = await self.ensure_browser(headless=headless)
+        try:
+            with get_tracer().span('browser.context'):
+                return await browser.new_context(**context_options)
+        except Exception as e:
+            # The process may have died between the health check and the call
+            logger.warning(f"new_context failed ({e}); relaunching browser")
+            await self._close_browser()
+            browser = await self.ensure_browser(headless=headless)
+            return await browser.new_context(**context_options)
+
+    async def keep_context(self, owner: str, context: BrowserContext):
+        """Leave `context` open for `owner` (e.g. a Streamlit session), closing the one it kept before"""
+        previous = self._kept.get(owner)
+        self._kept[owner] = context
+        if previous is not None and previous is not context:
+            await self._close_context(previous)
+
+    async def release_context(self, owner: str):
+        """Close the context `owner` kept open, if any"""
+        context = self._kept.pop(owner, None)
+        if context is not None:
+            await self._close_context(context)
+
+    def release(self, owner: str):
+        """Thread-safe release_context() that does not wait, for session-end hooks"""
+        if owner in self._kept and not self._loop.is_closed():
+            self.submit(self.release_context(owner))
+
+    async def _close_context(self, context: BrowserContext):
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Error closing kept context: {e}")
+
+    async def _close_browser(self):
+        browser, self.browser = self.browser, None
+        try:
+            if browser is not None and browser.is_connected():
+                await browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing browser: {e}")
+
+    async def _shutdown(self):
+        self._kept.clear()  # closing the browser closes them
+        await close_async_openai_client()
+        await self._close_browser()
+        try:
+            if self.playwright is not None:
+                await self.playwright.stop()
+        except Exception as e:
+            logger.warning(f"Error stopping playwright: {e}")
+        finally:
+            self.playwright = None
+
+    def shutdown(self, timeout: float = 10):
+        """Close the browser and stop the service loop"""
+        try:
+            self.run(self._shutdown(), timeout=timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_service: Optional[BrowserService] = None
+_service_lock = threading.Lock()
+
+
+def get_browser_service() -> BrowserService:
+    """Process-wide browser service; module state survives Streamlit script reruns"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = BrowserService()
+        return _service
+
@@ -1,27 +1,39 @@
 # create_profile.py
-from pathlib import Path
 from playwright.sync_api import sync_playwright
- 
-PROFILE_DIR = Path("/Users/harshit/Downloads/final_web_testing_playwright-main/playwright/llm-automation/custom_chrome_profile").resolve()
- 
+from profile_manager import get_profile_manager
+
+manager = get_profile_manager()
+PROFILE_DIR = manager.source.resolve()
+
 with sync_playwright() as p:
     context = p.chromium.launch_persistent_context(
-        user_data_dir="/Users/harshit/Downloads/final_web_testing_playwright-main/playwright/llm-automation/custom_chrome_profile/",
+        user_data_dir=str(PROFILE_DIR),
         channel="chromium",      # use system Chrome
         headless=False,        # must be visible so you can interact
         viewport={"width": 1440, "height": 900},
     )
- 
+
     page = context.new_page()
     print("\nBrowser started with a fresh profile.")
     print("👉 Go to your site, enter location manually, then close the browser window.\n")
- 
+
     # Block until the browser window is closed
     try:
         if context.pages:
             context.pages[0].wait_for_event("close")
     except Exception:
         pass
- 
+
+    # Export cookies and local storage so runs can skip the profile entirely
+    try:
+        manager.storage_state_path.parent.mkdir(parents=True, exist_ok=True)
+        context.storage_state(path=str(manager.storage_state_path))
+        print(f"Storage state saved at: {manager.storage_state_path}")
+    except Exception as e:
+        print(f"Could not export storage state: {e}")
+    context.close()
+
     print(f"Profile saved at: {PROFILE_DIR}")
- 
\ No newline at end of file
+
+# Refresh the pruned snapshot that parallel runs clone from
+print(f"Golden snapshot at: {manager.snapshot(refresh=True)}")
@@ -4,15 +4,24 @@ import sys
 import subprocess
 import datetime
 import time
-import base64
+import uuid
+import weakref
 from typing import List, Dict, Any, Optional
-from ai_test_agent import AITestAgent, TestAction, TestExecutor
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
+from ai_test_agent import AITestAgent, TestAction, TestExecutor, PlanStream
+from screenshot_policy import ScreenshotPolicy, SCREENSHOT_MODES
+from network_profiles import NetworkBlocker
+from tracing import format_phases, get_tracer
+from artifact_store import ArtifactHandle
+from thumbnails import get_thumbnail_cache, load_full_resolution
+from log_panel import LogBuffer
+from playwright.async_api import Page, Browser, BrowserContext
 import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 import threading
+from browser_service import BrowserService, get_browser_service
+from job_queue import get_job_manager, POLL_INTERVAL
 from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
@@ -40,6 +49,18 @@ def create_sidebar():
             key="theme_selector"
         )
         
+        # Screenshot settings
+        st.selectbox(
+            "Screenshots",
+            SCREENSHOT_MODES,
+            index=0,
+            key="screenshot_mode",
+            help="always: every step, on_failure: failed steps only, every_n: every 5th step, "
+                 "diff_only: only when the viewport changed, never: no screenshots"
+        )
+        st.checkbox("Full-page screenshots", value=True, key="screenshot_full_page")
+        st.radio("Screenshot format", ["png", "jpeg"], horizontal=True, key="screenshot_format")
+        
         # Quick examples
         st.markdown("### Example Tests")
         examples = [
@@ -529,133 +550,145 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+class KeptContextOwner:
+    """Names a session's kept-open browser context and closes it when Streamlit drops the session"""
+
+    def __init__(self, browser_service: BrowserService):
+        self.key = uuid.uuid4().hex
+        weakref.finalize(self, browser_service.release, self.key)
+
+
 class EnhancedTestRunner:
     """Enhanced test runner with real-time updates and better performance"""
     
-    def __init__(self):
+    def __init__(self, browser_service: Optional[BrowserService] = None, owner: Optional[str] = None):
         self.ai_agent = AITestAgent()
+        # Key under which a context kept open is tracked, so the next run or session end can close it
+        self.owner = owner or uuid.uuid4().hex
+        self.browser_service = browser_service or get_browser_service()
         self.test_executor = None
-        self.playwright = None
-        self.browser = None
+        self.context = None
         self.current_step = 0
         self.total_steps = 0
         self.keep_browser_open = False  # Flag to control browser cleanup
+        self.screenshot_policy = ScreenshotPolicy.from_env()
+        self.network = NetworkBlocker.from_env(default='images,fonts')
         
     async def initialize_playwright(self, headless=False):
-        """Initialize Playwright with optimized settings"""
+        """Get a fresh context from the warm browser service"""
         try:
-            if self.playwright is None:
-                self.playwright = await async_playwright().start()
-            
-            if self.browser is None or not self.browser.is_connected():
-                # Optimized browser launch arguments
-                browser_args = [
-                    '--disable-dev-shm-usage',
-                    '--disable-extensions',
-                    '--disable-gpu',
-                    '--disable-background-timer-throttling',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-renderer-backgrounding',
-                    '--no-sandbox',
-                    '--disable-web-security',
-                ]
-                
-                self.browser = await self.playwright.chromium.launch(
-                    headless=headless,
-                    args=browser_args
-                )
-            
             # Optimized context settings
-            context = await self.browser.new_context(
+            self.context = await self.browser_service.new_context(
+                headless=headless,
                 viewport={'width': 1280, 'height': 800},
                 ignore_https_errors=True,
                 record_video_dir='videos/' if os.getenv('RECORD_VIDEO') else None
             )
             
             # Set up request interception for faster loading
-            await context.route("**/*.{png,jpg,jpeg,gif,svg,woff,woff2}", lambda route: route.abort())
+            await self.network.apply(self.context)
             
-            page = await context.new_page()
-            self.test_executor = TestExecutor(page)
+            page = await self.context.new_page()
+            self.test_executor = TestExecutor(page, screenshot_policy=self.screenshot_policy)
             
-            return self.browser, self.playwright
+            return self.browser_service.browser, self.browser_service.playwright
             
         except Exception as e:
-            st.error(f"❌ Failed to initialize browser: {str(e)}")
+            # Runs on the service thread, so report through the caller's log instead of st.error
+            print(f"❌ Failed to initialize browser: {str(e)}")
             await self.cleanup()
             raise
     
     async def cleanup(self):
-        """Enhanced cleanup with better error handling"""
-        # Skip browser cleanup if keep_browser_open is True
-        if not self.keep_browser_open:
-            try:
-                if hasattr(self, 'browser') and self.browser:
-                    await self.browser.close()
-                    self.browser = None
-            except Exception as e:
-                print(f"Error closing browser: {e}")
+        """Close this run's context; the browser itself stays warm in the service"""
+        if self.keep_browser_open and self.context:
+            await self.browser_service.keep_context(self.owner, self.context)
+            self.context = None
+            print("\n⚠️  Browser context kept open as requested.\n"
+                  "   It will be closed by the next run or when this session ends.\n"
+                  "   To re-enable automatic closing, set keep_browser_open=False")
+            return
         
-        # Always clean up playwright resources
         try:
-            if hasattr(self, 'playwright') and self.playwright and not self.keep_browser_open:
-                await self.playwright.stop()
-                self.playwright = None
+            if self.context:
+                await self.context.close()
         except Exception as e:
-            print(f"Error stopping playwright: {e}")
-            
-        if self.keep_browser_open:
-            print("\n⚠️  Browser window kept open as requested.\n"
-                  "   To close it manually, you'll need to stop the Streamlit app.\n"
-                  "   To re-enable automatic browser closing, set keep_browser_open=False")
+            print(f"Error closing context: {e}")
+        finally:
+            self.context = None
+    
+    async def prepare_browser(self, headless=False, target_url: Optional[str] = None, log_callback=None):
+        """Create the context and open the target URL; runs concurrently with planning"""
+        # The window a previous run of this session kept open is replaced by this one
+        await self.browser_service.release_context(self.owner)
+        await self.initialize_playwright(headless=headless)
+        if log_callback:
+            log_callback("✅ Browser ready")
+        if target_url:
+            try:
+                await self.test_executor.preload(target_url)
+                if log_callback:
+                    log_callback(f"🌐 Opened {target_url}")
+            except Exception as e:
+                # The plan's own navigate step will try again
+                if log_callback:
+                    log_callback(f"⚠️ Could not pre-open {target_url}: {e}")
     
-    async def run_test_with_progress(self, test_description: str, progress_callback=None, log_callback=None, keep_browser_open=False):
+    async def run_test_with_progress(self, test_description: str, progress_callback=None, log_callback=None, keep_browser_open=False, headless=False, target_url: Optional[str] = None):
         """Run test with real-time progress updates and logging
         
+        Must run on the browser service loop (see ``browser_service.submit``).
+        The run is traced as a 'test.run' span (exported when TRACE_DIR is set).
+        
         Args:
             test_description: Description of the test to run
             progress_callback: Callback for progress updates
             log_callback: Callback for log messages
             keep_browser_open: If True, browser window will remain open after test completion
+            headless: Run the browser without a visible window
+            target_url: Opened while the plan is generated, so a first matching navigate is free
         """
+        with get_tracer().span('test.run', runner='enhanced', description=test_description[:200]) as span:
+            results = await self._run_test_with_progress(
+                test_description, progress_callback, log_callback, keep_browser_open, headless, target_url
+            )
+            span.set(steps=len(results))
+            return results
+    
+    async def _run_test_with_progress(self, test_description: str, progress_callback, log_callback, keep_browser_open, headless, target_url):
         self.keep_browser_open = keep_browser_open
+        plan = None
+        browser_ready = None
+        passed = False
         try:
-            # Step 1: Generate test actions
+            # Step 1: Start the browser and generate test actions concurrently
             if log_callback:
+                log_callback("🚀 Preparing browser context...")
                 log_callback("🤖 Analyzing test description...")
             
-            test_actions = await self.ai_agent.generate_test_actions(test_description)
+            browser_ready = asyncio.create_task(self.prepare_browser(headless, target_url, log_callback))
             
-            if not test_actions:
-                if log_callback:
-                    log_callback("❌ Failed to generate test actions")
-                return []
-            
-            self.total_steps = len(test_actions)
-            if log_callback:
-                log_callback(f"✅ Generated {len(test_actions)} test steps")
-            
-            # Step 2: Initialize browser
-            if log_callback:
-                log_callback("🚀 Launching optimized browser...")
-            
-            await self.initialize_playwright(headless=False)
-            if log_callback:
-                log_callback("✅ Browser ready")
-            
-            # Step 3: Execute test with progress tracking
-            if log_callback:
-                log_callback("⚡ Starting test execution...")
+            # Actions are executed as soon as the model finishes writing each one
+            plan = PlanStream(self.ai_agent.stream_test_actions(test_description, target_url=target_url))
             
             results = []
-            for i, action in enumerate(test_actions, 1):
+            i = 0
+            async for action in plan:
+                i += 1
                 self.current_step = i
+                self.total_steps = plan.total
+                
+                if i == 1:
+                    # Step 2: Wait for the browser only if planning beat it
+                    await browser_ready
+                    if log_callback:
+                        log_callback("⚡ Starting test execution...")
                 
                 if progress_callback:
                     progress_callback(i, self.total_steps, f"Step {i}: {action.description}")
                 
                 if log_callback:
-                    log_callback(f"🔥 Executing step {i}/{self.total_steps}: {action.description}")
+                    log_callback(f"🔥 Executing step {i}/{self.total_steps}{'' if plan.finished else '+'}: {action.description}")
                 
                 try:
                     result = await self.test_executor.execute_action(action)
@@ -664,7 +697,7 @@ class EnhancedTestRunner:
                     
                     status = "✅" if result['status'] == 'passed' else "❌"
                     if log_callback:
-                        log_callback(f"{status} Step {i} completed in {result.get('duration', 0):.2f}s")
+                        log_callback(f"{status} Step {i} completed in {result.get('duration', 0):.2f}s ({format_phases(result.get('phases', {}))})")
                     
                 except Exception as e:
                     error_result = {
@@ -673,14 +706,38 @@ class EnhancedTestRunner:
                         'action_type': action.action_type,
                         'status': 'failed',
                         'error': str(e),
-                        'duration': 0
+                        'duration': 0,
+                        'screenshot': getattr(e, 'screenshot', None)
                     }
                     results.append(error_result)
                     
                     if log_callback:
                         log_callback(f"❌ Step {i} failed: {str(e)}")
             
+            if not results:
+                if log_callback:
+                    log_callback("❌ Failed to generate test actions")
+                return []
+            
+            if plan.error is not None:
+                # A plan cut off mid-stream must not pass as a complete run
+                results.append({
+                    'step_number': i + 1,
+                    'description': "Generate the rest of the test plan",
+                    'action_type': 'plan',
+                    'status': 'failed',
+                    'error': f"Plan generation failed after {i} steps: {plan.error}",
+                    'duration': 0
+                })
+                self.total_steps = len(results)
+                if log_callback:
+                    log_callback(f"❌ Plan generation failed after {i} steps: {plan.error}")
+                return results
+            
+            self.total_steps = len(results)
+            passed = all(result['status'] == 'passed' for result in results)
             if log_callback:
+                log_callback(f"✅ Generated and executed {len(results)} test steps")
                 log_callback("🎉 Test execution completed!")
             
             return results
@@ -690,6 +747,16 @@ class EnhancedTestRunner:
                 log_callback(f"💥 Critical error: {str(e)}")
             return []
         finally:
+            if plan is not None:
+                await plan.aclose()
+            if not passed:
+                # The plan was cached before it ran; don't replay one that hasn't passed
+                self.ai_agent.invalidate_cached_plan(test_description, target_url)
+            if browser_ready is not None:
+                # Let a still-launching context finish so cleanup can close it
+                await asyncio.gather(browser_ready, return_exceptions=True)
+            if log_callback and self.network.enabled:
+                log_callback(f"🚫 {self.network.summary()}")
             await self.cleanup()
 
 def display_enhanced_metrics(results: List[Dict[str, Any]]):
@@ -761,6 +828,9 @@ def display_enhanced_test_results(results: List[Dict[str, Any]]):
     # Display metrics
     display_enhanced_metrics(results)
     
+    # Render previews in the background while the step list is drawn
+    get_thumbnail_cache().prefetch(r.get('screenshot') for r in results)
+    
     # Detailed steps
     st.markdown("### Detailed Test Steps")
     
@@ -809,22 +879,20 @@ def display_enhanced_test_results(results: List[Dict[str, Any]]):
                 # Screenshot with 60% width container
                 if 'screenshot' in result and result['screenshot']:
                     try:
-                        # Convert bytes to base64 for display
-                        if isinstance(result['screenshot'], bytes):
-                            img_b64 = base64.b64encode(result['screenshot']).decode()
-                            st.markdown(f"""
-                            <div class="screenshot-container">
-                                <img src="data:image/png;base64,{img_b64}" 
-                                     style="width: 100%; max-width: 100%; height: auto;">
-                                <div class="screenshot-caption">
-                                    Step {step_number} Screenshot
-                                </div>
-                            </div>
-                            """, unsafe_allow_html=True)
+                        screenshot_data = result['screenshot']
+                        if isinstance(screenshot_data, (ArtifactHandle, bytes)):
+                            # Cached downscaled preview; the full image is only loaded on request
+                            st.image(
+                                get_thumbnail_cache().get(screenshot_data),
+                                caption=f"Step {step_number} Screenshot",
+                                use_column_width=True
+                            )
+                            if st.checkbox("Show full resolution", key=f"full_res_{step_number}"):
+                                st.image(load_full_resolution(screenshot_data), use_column_width=True)
                         else:
                             # Use Streamlit's image function as fallback
                             st.markdown('<div class="screenshot-container">', unsafe_allow_html=True)
-                            st.image(result['screenshot'], 
+                            st.image(screenshot_data, 
                                    caption=f"Step {step_number}", 
                                    use_column_width=True)
                             st.markdown('</div>', unsafe_allow_html=True)
@@ -895,14 +963,20 @@ def main():
     """, unsafe_allow_html=True)
     
     # Initialize session state
-    if 'test_runner' not in st.session_state:
-        st.session_state.test_runner = EnhancedTestRunner()
     if 'test_results' not in st.session_state:
         st.session_state.test_results = None
     if 'test_logs' not in st.session_state:
-        st.session_state.test_logs = []
+        st.session_state.test_logs = LogBuffer(
+            container_class="log-container fade-in",
+            timestamp_class="log-timestamp",
+            header_html='<h4 style="color: var(--primary-color); margin-bottom: 1rem;">📋 Execution Logs</h4>'
+        )
     if 'test_running' not in st.session_state:
         st.session_state.test_running = False
+    if 'active_job_id' not in st.session_state:
+        st.session_state.active_job_id = None
+    if 'browser_owner' not in st.session_state:
+        st.session_state.browser_owner = KeptContextOwner(get_browser_service())
     
     # URL input section
     st.markdown("### 🌐 Target Configuration")
@@ -937,109 +1011,49 @@ def main():
         
         if st.button(" Clear Results", use_container_width=True):
             st.session_state.test_results = None
-            st.session_state.test_logs = []
+            st.session_state.test_logs.clear()
             st.rerun()
     
     # Test execution
     if run_button and test_description.strip():
         if test_description.strip() and target_url.strip():
-            # Initialize test runner if not already done
-            if st.session_state.test_runner is None:
-                st.session_state.test_runner = EnhancedTestRunner()
-            
             # Prepend URL navigation to test description if not already included
             if not any(word in test_description.lower() for word in ['go to', 'navigate to', 'visit']):
                 full_test_description = f"Go to {target_url} and {test_description}"
             else:
                 full_test_description = test_description
             
-            # Progress tracking containers
-            progress_container = st.empty()
-            log_container = st.empty()
-            
-            def update_progress(current, total, message):
-                progress_value = current / total if total > 0 else 0
-                progress_container.markdown(f"""
-                <div class="progress-container fade-in">
-                    <h4 style="color: var(--primary-color); margin-bottom: 1rem;">
-                        Progress: {current}/{total} ({progress_value*100:.1f}%)
-                    </h4>
-                    <p style="margin-bottom: 1rem;"><strong>Current Step:</strong> {message}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                progress_container.progress(progress_value)
-            
-            def add_log(message):
-                timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                st.session_state.test_logs.append(f"[{timestamp}] {message}")
-                
-                # Display logs in real-time
-                log_html = f"""
-                <div class="log-container fade-in">
-                    <h4 style="color: var(--primary-color); margin-bottom: 1rem;">📋 Execution Logs</h4>
-                    {''.join([f'<div class="log-entry"><span class="log-timestamp">[{log.split("] ")[0].replace("[", "")}]</span> {log.split("] ", 1)[1] if "] " in log else log}</div>' for log in st.session_state.test_logs[-15:]])}
-                </div>
-                """
-                log_container.markdown(log_html, unsafe_allow_html=True)
-            
             # Set running state
             st.session_state.test_running = True
+            st.session_state.test_results = None
+            st.session_state.test_logs.clear()
             
-            # Run the test
-            async def run_test_async():
-                try:
-                    # Get the keep_browser_open setting from session state
-                    keep_open = st.session_state.get('keep_browser_open', False)
-                    
-                    # Run the test with progress updates
-                    results = await st.session_state.test_runner.run_test_with_progress(
-                        full_test_description,
-                        progress_callback=update_progress,
-                        log_callback=add_log,
-                        keep_browser_open=keep_open
-                    )
-                    
-                    # Store results and update UI
-                    st.session_state.test_results = results
-                    st.session_state.test_running = False
-                    progress_container.empty()
-                    
-                    # Show completion message
-                    if results:
-                        passed = sum(1 for r in results if r.get('status') == 'passed')
-                        total = len(results)
-                        if passed == total:
-                            st.success(f"🎉 Test completed successfully! All {total} steps passed.")
-                        else:
-                            st.error(f"⚠️ Test completed with issues. {passed}/{total} steps passed.")
-                    
-                    # If keeping browser open, show message to user
-                    if keep_open:
-                        st.warning("⚠️ Browser window was kept open as requested. Close it manually when done.")
-                    
-                except Exception as e:
-                    st.error(f"❌ Test execution failed: {str(e)}")
-                    st.session_state.test_running = False
-                    progress_container.empty()
-                    
-                    # If keeping browser open, show message to user even on error
-                    if st.session_state.get('keep_browser_open', False):
-                        st.warning("⚠️ Test failed, but browser window was kept open for debugging.")
-                        
-                    # Re-raise the exception to ensure it's logged
-                    raise
-                finally:
-                    # Ensure we always mark test as not running
-                    st.session_state.test_running = False
+            # Each run gets its own runner (and context) on the shared warm browser
+            keep_open = st.session_state.get('keep_browser_open', False)
+            headless = st.session_state.get('headless_mode', False)
+            runner = EnhancedTestRunner(owner=st.session_state.browser_owner.key)
+            runner.screenshot_policy = ScreenshotPolicy(
+                mode=st.session_state.get('screenshot_mode', 'always'),
+                full_page=st.session_state.get('screenshot_full_page', True),
+                image_type=st.session_state.get('screenshot_format', 'png')
+            )
             
-            # Execute the async function with proper error handling
-            try:
-                asyncio.run(run_test_async())
-            except Exception as e:
-                # This will be caught by Streamlit's error handling
-                pass
-                
-            # Rerun to update the UI
+            async def run_test(job):
+                # The runner must execute on the browser service loop; cancelling the
+                # wrapped future cancels the run there as well
+                return await asyncio.wrap_future(runner.browser_service.submit(runner.run_test_with_progress(
+                    full_test_description,
+                    progress_callback=job.report_progress,
+                    log_callback=job.log,
+                    keep_browser_open=keep_open,
+                    headless=headless,
+                    target_url=target_url.strip()
+                )))
+            
+            # Run the test out of band; this session polls the job below
+            job = get_job_manager().submit(run_test, name=test_description[:60], logs=st.session_state.test_logs)
+            st.session_state.active_job_id = job.id
+            st.session_state.active_job_keep_open = keep_open
             st.rerun()
     
     elif run_button:
@@ -1048,6 +1062,54 @@ def main():
         if not target_url.strip():
             st.warning("⚠️ Please enter a target URL.")
     
+    # Poll the running job
+    if st.session_state.active_job_id:
+        job = get_job_manager().get(st.session_state.active_job_id)
+        if job is None:
+            st.session_state.active_job_id = None
+            st.session_state.test_running = False
+        elif not job.done:
+            current, total, message = job.progress
+            st.markdown(f"""
+            <div class="progress-container fade-in">
+                <h4 style="color: var(--primary-color); margin-bottom: 1rem;">
+                    Progress: {current}/{total} ({job.progress_fraction*100:.1f}%)
+                </h4>
+                <p style="margin-bottom: 1rem;"><strong>Current Step:</strong> {message or 'Planning test...'}</p>
+            </div>
+            """, unsafe_allow_html=True)
+            st.progress(job.progress_fraction)
+            st.markdown(st.session_state.test_logs.render(), unsafe_allow_html=True)
+            if st.button("⏹️ Cancel Test"):
+                get_job_manager().cancel(job.id)
+            time.sleep(POLL_INTERVAL)
+            st.rerun()
+        else:
+            st.session_state.active_job_id = None
+            st.session_state.test_running = False
+            st.session_state.test_results = job.result or []
+            keep_open = st.session_state.get('active_job_keep_open', False)
+            
+            # Show completion message
+            if job.status == 'cancelled':
+                st.warning("⏹️ Test was cancelled.")
+            elif job.status == 'failed':
+                st.error(f"❌ Test execution failed: {job.error}")
+                # If keeping browser open, show message to user even on error
+                if keep_open:
+                    st.warning("⚠️ Test failed, but browser window was kept open for debugging.")
+            elif job.result:
+                passed = sum(1 for r in job.result if r.get('status') == 'passed')
+                total = len(job.result)
+                if passed == total:
+                    st.success(f"🎉 Test completed successfully! All {total} steps passed.")
+                else:
+                    st.error(f"⚠️ Test completed with issues. {passed}/{total} steps passed.")
+            
+            # If keeping browser open, show message to user
+            if keep_open and job.status == 'succeeded':
+                st.warning("⚠️ Browser window was kept open as requested. Close it manually when done.")
+    
     # Display results
     if st.session_state.test_results is not None:
         st.markdown("---")
@@ -1112,7 +1174,7 @@ Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             with col3:
                 if st.button("🔄 Run Again", use_container_width=True):
                     st.session_state.test_results = None
-                    st.session_state.test_logs = []
+                    st.session_state.test_logs.clear()
                     st.rerun()
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+"""
+Record/replay of network traffic through HAR archives
+"""
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+HAR_MODES = ('off', 'record', 'replay')
+HAR_FALLTHROUGH = ('network', 'abort')
+
+DEFAULT_HAR_DIR = os.getenv('HAR_DIR', 'har')
+
+
+def har_name(*parts: str) -> str:
+    """Filesystem-safe archive name, e.g. har_name('saucedemo', 'Login Test') -> 'saucedemo-login-test'"""
+    slug = '-'.join(part for part in parts if part)
+    return re.sub(r'[^a-z0-9]+', '-', slug.lower()).strip('-') or 'session'
+
+
+@dataclass
+class HarSession:
+    """Records a context's traffic to a HAR archive, or serves it back from one.
+
+    record  requests go to the network and every response is written to
+            ``<har_dir>/<name>.zip`` when the context closes. Bodies are
+            stored as separate files named by their SHA-1, so identical
+            responses are kept once.
+    replay  responses are served from the archive without touching the
+            network. Requests missing from it go to the network
+            (``fallthrough='network'``) or fail (``'abort'``, for fully
+            offline runs).
+    off     no routing at all.
+
+    ``url`` limits recording and replay to matching URLs (a glob or regex),
+    e.g. ``'**/saucedemo.com/**'`` to leave third-party traffic live.
+    """
+    name: str
+    mode: str = 'off'
+    har_dir: str = DEFAULT_HAR_DIR
+    fallthrough: str = 'network'
+    url: Optional[str] = None
+
+    def __post_init__(self):
+        if self.mode not in HAR_MODES:
+            raise ValueError(f"Unknown HAR mode '{self.mode}', expected one of {HAR_MODES}")
+        if self.fallthrough not in HAR_FALLTHROUGH:
+            raise ValueError(f"Unknown HAR fallthrough '{self.fallthrough}', expected one of {HAR_FALLTHROUGH}")
+
+    @classmethod
+    def from_env(cls, name: str, url: Optional[str] = None) -> 'HarSession':
+        """Build a session from HAR_MODE, HAR_DIR and HAR_FALLTHROUGH"""
+        return cls(
+            name=har_name(name),
+            mode=os.getenv('HAR_MODE', 'off').lower(),
+            har_dir=os.getenv('HAR_DIR', DEFAULT_HAR_DIR),
+            fallthrough=os.getenv('HAR_FALLTHROUGH', 'network').lower(),
+            url=url or os.getenv('HAR_URL_FILTER') or None
+        )
+
+    @property
+    def path(self) -> Path:
+        return Path(self.har_dir) / f"{self.name}.zip"
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+
+    async def apply(self, context) -> bool:
+        """Route `context` through the archive; returns False when nothing was installed.
+
+        Apply this before other routes (e.g. request blocking): Playwright
+        tries the most recently added route first, so blocked requests are
+        then neither recorded nor looked up.
+        """
+        if self.mode == 'record':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            await context.route_from_har(
+                str(self.path),
+                url=self.url,
+                update=True,
+                update_content='attach',
+                update_mode='minimal'
+            )
+            logger.info(f"Recording network traffic to {self.path}")
+            return True
+
+        if self.mode == 'replay':
+            if not self.path.exists():
+                logger.warning(f"No HAR archive at {self.path}; using the live network (run once with HAR_MODE=record)")
+                return False
+            await context.route_from_har(
+                str(self.path),
+                url=self.url,
+                not_found='fallback' if self.fallthrough == 'network' else 'abort'
+            )
+            logger.info(f"Replaying network traffic from {self.path} (misses: {self.fallthrough})")
+            return True
+
+        return False
@@ -0,0 +1,150 @@
+"""
+Background handling of cookie banners, location prompts and subscription popups
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DismissPattern:
+    """A known interstitial: the control that dismisses it, optionally scoped to a container.
+
+    The dismiss control becoming visible is what signals that the
+    interstitial is showing, so no separate trigger selector is needed.
+    """
+    name: str
+    kind: str  # 'cookie', 'location' or 'subscription'
+    selector: str
+    container: Optional[str] = None
+
+    def locator(self, page):
+        scope = page.locator(self.container) if self.container else page
+        return scope.locator(self.selector).first
+
+
+COOKIE_CONTAINERS = (
+    '[id*="cookie" i], [class*="cookie" i], [id*="consent" i], [class*="consent" i], '
+    '[aria-label*="cookie" i], [class*="privacy-banner" i]'
+)
+
+DISMISS_PATTERNS: List[DismissPattern] = [
+    # Cookie consent
+    DismissPattern('onetrust', 'cookie', '#onetrust-accept-btn-handler'),
+    DismissPattern('accept-cookies-testid', 'cookie', '[data-testid="accept-cookies"]'),
+    DismissPattern('pinterest-cookie-close', 'cookie', '[data-test-id="cookie-banner-close-button"]'),
+    DismissPattern('privacy-banner-accept', 'cookie', '.privacy-banner-accept, button#_pbb-close'),
+    DismissPattern(
+        'cookie-banner-accept', 'cookie',
+        'button:has-text("Accept All"), button:has-text("Accept"), button:has-text("Agree"), '
+        'button:has-text("Got It"), button:has-text("Allow all")',
+        container=COOKIE_CONTAINERS
+    ),
+    # Location prompts
+    DismissPattern(
+        'location-modal', 'location',
+        'button:has-text("Not Now"), button:has-text("No Thanks"), button:has-text("Maybe Later"), '
+        '[aria-label*="close" i]',
+        container='[class*="location" i][role="dialog"], [class*="location-modal" i], [class*="geo" i][class*="modal" i]'
+    ),
+    # Newsletter / subscription / promo popups
+    DismissPattern(
+        'subscription-popup', 'subscription',
+        'button:has-text("No Thanks"), button:has-text("No, thanks"), [aria-label*="close" i], '
+        'button.close, .modal-close',
+        container=(
+            '[class*="newsletter" i], [id*="newsletter" i], [class*="subscribe" i], '
+            '[id*="subscribe" i], [class*="signup-modal" i]'
+        )
+    ),
+]
+
+
+class InterstitialWatchdog:
+    """Dismisses known interstitials whenever they appear, without up-front waits.
+
+    On Playwright versions with ``page.add_locator_handler`` (1.42+) each
+    pattern is registered as a locator handler, which Playwright runs right
+    before an action would be blocked by the overlay. Older versions fall
+    back to a light background poll per page. ``attach()`` covers every
+    current and future page of a context.
+    """
+
+    def __init__(
+        self,
+        patterns: Optional[Sequence[DismissPattern]] = None,
+        kinds: Optional[Sequence[str]] = None,
+        poll_interval: float = 0.5,
+        click_timeout: int = 2000
+    ):
+        patterns = list(patterns if patterns is not None else DISMISS_PATTERNS)
+        self.patterns = [p for p in patterns if kinds is None or p.kind in kinds]
+        self.poll_interval = poll_interval
+        self.click_timeout = click_timeout
+        self.dismissed: List[Tuple[str, str]] = []  # (pattern name, page url)
+        self._pollers: Dict[object, asyncio.Task] = {}
+
+    async def attach(self, context):
+        """Watch every page of `context`, including pages opened later"""
+        for page in context.pages:
+            await self.watch(page)
+        context.on('page', lambda page: asyncio.ensure_future(self.watch(page)))
+
+    async def watch(self, page):
+        if hasattr(page, 'add_locator_handler'):
+            for pattern in self.patterns:
+                await page.add_locator_handler(pattern.locator(page), self._handler(page, pattern))
+        elif page not in self._pollers:
+            self._pollers[page] = asyncio.create_task(self._poll(page))
+            page.on('close', lambda _: self._stop_poller(page))
+
+    def _handler(self, page, pattern: DismissPattern):
+        async def handler(*_):
+            await self._dismiss(page, pattern)
+        return handler
+
+    async def _dismiss(self, page, pattern: DismissPattern) -> bool:
+        try:
+            await pattern.locator(page).click(timeout=self.click_timeout)
+        except Exception as e:
+            logger.debug(f"Could not dismiss {pattern.name}: {e}")
+            return False
+        logger.info(f"Dismissed {pattern.kind} interstitial ({pattern.name})")
+        self.dismissed.append((pattern.name, page.url))
+        return True
+
+    async def dismiss_now(self, page) -> Optional[str]:
+        """Check all patterns in one concurrent batch and dismiss the first visible one"""
+        visible = await asyncio.gather(
+            *(pattern.locator(page).is_visible() for pattern in self.patterns),
+            return_exceptions=True
+        )
+        for pattern, is_visible in zip(self.patterns, visible):
+            if is_visible is True and await self._dismiss(page, pattern):
+                return pattern.name
+        return None
+
+    async def _poll(self, page):
+        while not page.is_closed():
+            try:
+                await self.dismiss_now(page)
+            except Exception as e:
+                # Navigations tear down the execution context mid-check
+                logger.debug(f"Interstitial check skipped: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _stop_poller(self, page):
+        task = self._pollers.pop(page, None)
+        if task is not None:
+            task.cancel()
+
+    async def stop(self):
+        """Cancel fallback pollers; locator handlers go away with their pages"""
+        tasks = list(self._pollers.values())
+        self._pollers.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
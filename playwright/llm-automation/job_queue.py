@@ -0,0 +1,186 @@
+"""
+Background job queue so Streamlit sessions submit test runs instead of blocking on them
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from llm_providers import close_async_openai_client
+from log_panel import LogBuffer
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Seconds between Streamlit reruns while a session waits on a job
+POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+
+
+@dataclass
+class Job:
+    """A single out-of-band run and everything the UI needs to poll"""
+    id: str
+    name: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Tuple[int, int, str] = (0, 0, '')
+    logs: LogBuffer = field(default_factory=LogBuffer)
+    result: Any = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    _loop: Optional[asyncio.AbstractEventLoop] = field(default=None, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def progress_fraction(self) -> float:
+        current, total, _ = self.progress
+        return current / total if total > 0 else 0.0
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def report_progress(self, current: int, total: int, message: str):
+        """progress_callback for the runners; safe to call from the worker thread"""
+        self.progress = (current, total, message)
+
+    def log(self, message: str):
+        """log_callback for the runners; safe to call from the worker thread"""
+        self.logs.append(message)
+
+
+JobFactory = Callable[[Job], Coroutine]
+
+
+class JobManager:
+    """Runs job coroutines on a worker pool, one event loop per worker thread.
+
+    ``submit()`` returns immediately; the UI polls ``get()`` (or the returned
+    Job) for status, progress and logs on each rerun, so a Streamlit session
+    is never blocked for the length of a test and many sessions can share
+    one server. Finished jobs are kept until ``max_finished`` is exceeded.
+    """
+
+    def __init__(self, max_workers: int = 4, max_finished: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='test-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.max_finished = max_finished
+
+    def submit(self, factory: JobFactory, name: str = 'test run', logs: Optional[LogBuffer] = None) -> Job:
+        """Queue `factory(job)` for execution and return the job handle"""
+        job = Job(id=uuid.uuid4().hex[:12], name=name)
+        if logs is not None:
+            job.logs = logs
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, factory)
+        return job
+
+    def _run(self, job: Job, factory: JobFactory):
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = asyncio.run(self._run_async(job, factory))
+            self._finish(job, SUCCEEDED)
+        except asyncio.CancelledError:
+            job.log("Run cancelled")
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            job.error = str(e)
+            job.log(f"❌ Run failed: {e}")
+            self._finish(job, FAILED)
+
+    async def _run_async(self, job: Job, factory: JobFactory) -> Any:
+        job._loop = asyncio.get_running_loop()
+        job._task = asyncio.current_task()
+        try:
+            if job.cancel_requested:
+                raise asyncio.CancelledError()
+            return await factory(job)
+        finally:
+            job._loop = job._task = None
+            # asyncio.run() closes this loop next; its pooled connections go with it
+            await close_async_openai_client()
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def status(self, job_id: str) -> Optional[str]:
+        job = self.get(job_id)
+        return job.status if job else None
+
+    def result(self, job_id: str) -> Any:
+        job = self.get(job_id)
+        return job.result if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; running jobs are cancelled at their next await"""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_requested = True
+        loop, task = job._loop, job._task
+        if loop is not None and task is not None:
+            loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at)
+
+    def active_count(self) -> int:
+        return sum(1 for job in self.jobs() if not job.done)
+
+    def _prune(self):
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished_at or 0)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            job.logs.close()
+            del self._jobs[job.id]
+
+    def shutdown(self, wait: bool = False):
+        for job in self.jobs():
+            self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job manager shared by every Streamlit session"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
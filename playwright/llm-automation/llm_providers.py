@@ -0,0 +1,343 @@
+"""
+Pluggable chat-completion backends: OpenAI, recorded replays and an offline rule-based planner
+"""
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import weakref
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ('openai', 'replay', 'record', 'rules')
+DEFAULT_RECORDINGS_DIR = os.getenv('LLM_RECORDINGS_DIR', '.llm_recordings')
+
+# Chat messages in the OpenAI shape: [{"role": "system" | "user" | "assistant", "content": "..."}]
+Messages = List[Dict[str, str]]
+
+# One pooled AsyncOpenAI client per event loop. httpx connections are bound to
+# the loop that opened them, and Streamlit starts a fresh loop per asyncio.run().
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Return the connection-pooled AsyncOpenAI client shared on the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv('OPENAI_MAX_CONNECTIONS', '20')),
+                max_keepalive_connections=10
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0)
+        )
+        client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=http_client)
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_openai_client():
+    """Close the running loop's pooled client; call before the loop shuts down"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing the OpenAI client: {e}")
+
+
+def _chunks(text: str, size: int = 64) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or ['']
+
+
+class LLMProvider(abc.ABC):
+    """A chat model the agents ask for completions, whole or streamed"""
+
+    name = 'base'
+
+    @abc.abstractmethod
+    async def complete(self, messages: Messages, model: str, temperature: float = 0.2) -> str:
+        """The whole completion for `messages`"""
+
+    async def stream(self, messages: Messages, model: str, temperature: float = 0.2) -> AsyncIterator[str]:
+        """Yield the completion in chunks; by default the whole completion at once"""
+        yield await self.complete(messages, model, temperature)
+
+
+class OpenAIProvider(LLMProvider):
+    """The OpenAI chat completions API, through the pooled per-loop client"""
+
+    name = 'openai'
+
+    async def complete(self, messages: Messages, model: str, temperature: float = 0.2) -> str:
+        response = await get_async_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature
+        )
+        if not response or not hasattr(response, 'choices') or not response.choices:
+            raise ValueError("Invalid response format from OpenAI API")
+        content = response.choices[0].message.content
+        if not content:
+            raise ValueError("Empty response from OpenAI API")
+        return content
+
+    async def stream(self, messages: Messages, model: str, temperature: float = 0.2) -> AsyncIterator[str]:
+        stream = await get_async_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+class ReplayProvider(LLMProvider):
+    """Answers from responses recorded under `recordings_dir`, keyed on model and messages.
+
+    With a `fallback` provider, prompts that have no recording yet are sent
+    to it and its answer is recorded (LLM_PROVIDER=record); without one they
+    raise LookupError, so a replayed run never touches the network.
+    """
+
+    name = 'replay'
+
+    def __init__(self, recordings_dir: str = DEFAULT_RECORDINGS_DIR, fallback: Optional[LLMProvider] = None):
+        self.recordings_dir = Path(recordings_dir)
+        self.fallback = fallback
+
+    def path_for(self, messages: Messages, model: str) -> Path:
+        digest = hashlib.sha256(
+            json.dumps({'model': model, 'messages': messages}, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        return self.recordings_dir / f"{digest}.json"
+
+    def _load(self, path: Path) -> Optional[str]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['content']
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable recording {path}: {e}")
+            return None
+
+    def _save(self, path: Path, messages: Messages, model: str, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': model, 'messages': messages, 'content': content}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _missing(self, path: Path) -> LookupError:
+        return LookupError(f"No recorded response at {path}; record one with LLM_PROVIDER=record")
+
+    async def complete(self, messages: Messages, model: str, temperature: float = 0.2) -> str:
+        path = self.path_for(messages, model)
+        content = self._load(path)
+        if content is not None:
+            return content
+        if self.fallback is None:
+            raise self._missing(path)
+        content = await self.fallback.complete(messages, model, temperature)
+        self._save(path, messages, model, content)
+        return content
+
+    async def stream(self, messages: Messages, model: str, temperature: float = 0.2) -> AsyncIterator[str]:
+        path = self.path_for(messages, model)
+        content = self._load(path)
+        if content is not None:
+            for chunk in _chunks(content):
+                yield chunk
+            return
+        if self.fallback is None:
+            raise self._missing(path)
+        parts = []
+        async for chunk in self.fallback.stream(messages, model, temperature):
+            parts.append(chunk)
+            yield chunk
+        self._save(path, messages, model, ''.join(parts))
+
+
+# Where the test description sits in the prompts the agents build
+INSTRUCTION_PATTERNS = (
+    re.compile(r'INSTRUCTION:\s*(.+?)\s*(?:\n\s*\n|$)', re.S),
+    re.compile(r'execute this test:\s*(.+?)\s*$', re.S | re.I),
+)
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+_STEP_SPLIT = re.compile(r'\s*(?:;|\.\s+|,?\s+and then\s+|,?\s+then\s+|,\s*(?:and\s+)?|\s+and\s+(?=[a-z]))\s*', re.I)
+_ELEMENT_WORDS = {'button': 'button', 'link': 'a', 'tab': '[role="tab"]', 'checkbox': 'input[type="checkbox"]'}
+
+
+def _unquote(text: str) -> str:
+    text = text.strip().rstrip('.')
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '\'"':
+        return text[1:-1]
+    return text
+
+
+def _looks_like_css(target: str) -> bool:
+    return bool(target) and (target[0] in '#.[' or any(marker in target for marker in ('=', '>', '::', ':has')))
+
+
+def _click_selector(target: str) -> str:
+    if _looks_like_css(target):
+        return target
+    target = re.sub(r'^(?:on\s+)?(?:the\s+)?', '', target.strip(), flags=re.I)
+    words = target.split()
+    kind = words[-1].lower() if len(words) > 1 else ''
+    label = _unquote(' '.join(words[:-1]) if kind in _ELEMENT_WORDS else target)
+    if kind in _ELEMENT_WORDS:
+        return f'{_ELEMENT_WORDS[kind]}:has-text("{label}")'
+    return f'text="{label}"'
+
+
+def _field_selector(target: str) -> str:
+    if _looks_like_css(target):
+        return target
+    target = re.sub(r'^(?:the\s+)?', '', target.strip(), flags=re.I)
+    key = _unquote(re.sub(r'\s+(?:field|input|box|textbox|area)$', '', target, flags=re.I)).lower()
+    slug = re.sub(r'\s+', '-', key)
+    return (f':is(input, textarea, select):is([name*="{slug}" i], [id*="{slug}" i], '
+            f'[placeholder*="{key}" i], [aria-label*="{key}" i])')
+
+
+def _url(target: str) -> str:
+    url = _unquote(target).rstrip('/')
+    return url if '://' in url else f'https://{url}'
+
+
+# (pattern, builder) pairs tried in order on each step of the instruction
+_RULES = (
+    (re.compile(r'^(?:go to|goto|navigate to|open|visit|browse to|load)\s+(?:the\s+)?(?:url\s+|page\s+|website\s+|site\s+)?(?P<url>\S+)', re.I),
+     lambda m: {'action_type': 'navigate', 'selector': _url(m['url']), 'description': f"Navigate to {_url(m['url'])}"}),
+    (re.compile(r'^(?:take|capture|grab)\s+(?:a\s+)?(?:full[- ]page\s+)?screenshot', re.I),
+     lambda m: {'action_type': 'screenshot', 'description': "Take a screenshot"}),
+    (re.compile(r'^wait\s+(?:for\s+)?(?P<seconds>\d+)\s*(?:s|secs?|seconds?)\b', re.I),
+     lambda m: {'action_type': 'wait', 'value': int(m['seconds']), 'description': f"Wait {m['seconds']} seconds"}),
+    (re.compile(r'^wait\s+(?:for|until)\s+(?P<target>.+)$', re.I),
+     lambda m: {'action_type': 'wait_for_selector', 'selector': _click_selector(m['target']),
+                'description': f"Wait for {_unquote(m['target'])}"}),
+    (re.compile(r'^(?:fill(?: in)?|type|enter|input|write)\s+(?P<value>\S.*?)\s+(?:in|into)\s+(?:the\s+)?(?P<target>.+)$', re.I),
+     lambda m: {'action_type': 'fill', 'selector': _field_selector(m['target']), 'value': _unquote(m['value']),
+                'description': f"Fill {_unquote(m['target'])} with {_unquote(m['value'])}"}),
+    (re.compile(r'^(?:fill(?: in)?|set)\s+(?:the\s+)?(?P<target>.+?)\s+(?:with|to|as)\s+(?P<value>.+)$', re.I),
+     lambda m: {'action_type': 'fill', 'selector': _field_selector(m['target']), 'value': _unquote(m['value']),
+                'description': f"Fill {_unquote(m['target'])} with {_unquote(m['value'])}"}),
+    (re.compile(r'^(?:select|choose|pick)\s+(?P<value>\S.*?)\s+(?:from|in)\s+(?:the\s+)?(?P<target>.+)$', re.I),
+     lambda m: {'action_type': 'select', 'selector': _field_selector(m['target']), 'value': _unquote(m['value']),
+                'description': f"Select {_unquote(m['value'])} from {_unquote(m['target'])}"}),
+    (re.compile(r'^(?:verify|assert|ensure|confirm|make sure|check that|check the page)\b(?P<rest>.*)$', re.I),
+     lambda m: {'action_type': 'assert', 'selector': 'body',
+                'value': _unquote((_QUOTED.findall(m['rest']) or [m['rest']])[0]),
+                'description': f"Verify{m['rest']}"}),
+    (re.compile(r'^(?P<un>un)?check\s+(?:the\s+)?(?P<target>.+)$', re.I),
+     lambda m: {'action_type': 'uncheck' if m['un'] else 'check', 'selector': _field_selector(m['target']),
+                'description': f"{'Uncheck' if m['un'] else 'Check'} {_unquote(m['target'])}"}),
+    (re.compile(r'^press\s+(?:the\s+)?(?P<key>enter|tab|escape|esc|space|backspace|arrow\w*)(?:\s+key)?$', re.I),
+     lambda m: {'action_type': 'press', 'selector': 'body', 'value': m['key'].capitalize(),
+                'description': f"Press {m['key'].capitalize()}"}),
+    (re.compile(r'^hover\s+(?:over\s+)?(?P<target>.+)$', re.I),
+     lambda m: {'action_type': 'hover', 'selector': _click_selector(m['target']),
+                'description': f"Hover over {_unquote(m['target'])}"}),
+    (re.compile(r'^scroll\b', re.I),
+     lambda m: {'action_type': 'scroll', 'description': "Scroll the page"}),
+    (re.compile(r'^(?:click|tap|press|hit|select)\s+(?P<target>.+)$', re.I),
+     lambda m: {'action_type': 'click', 'selector': _click_selector(m['target']),
+                'description': f"Click {_unquote(m['target'])}"}),
+)
+
+
+class RuleBasedProvider(LLMProvider):
+    """Offline planner that turns the instruction in the prompt into actions with regex rules.
+
+    Handles the phrasings the sample tests use ("go to X, click 'Login',
+    fill 'alice' into username, verify 'Welcome'") and answers instantly and
+    deterministically, for load tests and runs without network or API key.
+    Steps it cannot parse are left out of the plan.
+    """
+
+    name = 'rules'
+
+    @staticmethod
+    def instruction(messages: Messages) -> str:
+        prompt = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        for pattern in INSTRUCTION_PATTERNS:
+            match = pattern.search(prompt)
+            if match:
+                return match.group(1)
+        return prompt.strip()
+
+    @staticmethod
+    def plan(instruction: str) -> List[Dict[str, object]]:
+        # Keep quoted values intact while splitting on commas, "then" and "and"
+        quoted: List[str] = []
+
+        def stash(match):
+            quoted.append(match.group(0))
+            return f"\x00{len(quoted) - 1}\x00"
+
+        def restore(text: str) -> str:
+            return re.sub(r'\x00(\d+)\x00', lambda m: quoted[int(m.group(1))], text)
+
+        actions = []
+        for step in _STEP_SPLIT.split(_QUOTED.sub(stash, instruction.strip().rstrip('.'))):
+            step = restore(step).strip()
+            for pattern, build in _RULES:
+                match = pattern.match(step)
+                if match:
+                    actions.append(build(match))
+                    break
+            else:
+                if step:
+                    logger.debug(f"No rule for step: {step}")
+        return actions
+
+    async def complete(self, messages: Messages, model: str, temperature: float = 0.2) -> str:
+        return json.dumps(self.plan(self.instruction(messages)), indent=2)
+
+    async def stream(self, messages: Messages, model: str, temperature: float = 0.2) -> AsyncIterator[str]:
+        for chunk in _chunks(await self.complete(messages, model, temperature)):
+            yield chunk
+
+
+def create_provider(name: Optional[str] = None, recordings_dir: Optional[str] = None) -> LLMProvider:
+    """Build the provider named by `name` or LLM_PROVIDER: openai (default), replay, record or rules"""
+    name = (name or os.getenv('LLM_PROVIDER') or 'openai').lower()
+    recordings_dir = recordings_dir or DEFAULT_RECORDINGS_DIR
+    if name == 'openai':
+        return OpenAIProvider()
+    if name == 'replay':
+        return ReplayProvider(recordings_dir)
+    if name == 'record':
+        return ReplayProvider(recordings_dir, fallback=OpenAIProvider())
+    if name == 'rules':
+        return RuleBasedProvider()
+    raise ValueError(f"Unknown LLM provider '{name}', expected one of {PROVIDERS}")
+
+
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_llm_provider() -> LLMProvider:
+    """Process-wide provider selected by LLM_PROVIDER"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider()
+        return _provider
@@ -0,0 +1,155 @@
+"""
+Repair a broken selector by asking the LLM about the failing step only
+"""
+import dataclasses
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from llm_providers import LLMProvider, get_llm_provider
+from tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPAIR_MODEL = os.getenv('REPAIR_MODEL', 'gpt-4o-mini')
+DEFAULT_MAX_ELEMENTS = int(os.getenv('REPAIR_MAX_ELEMENTS', '120'))
+
+# Steps whose selector names a page element (navigate's selector is a URL)
+REPAIRABLE_ACTIONS = ('click', 'fill', 'select', 'check', 'uncheck', 'hover', 'press', 'assert', 'wait_for_selector')
+
+# One line per visible interactive element: role/tag, identifying attributes and text
+SNAPSHOT_JS = """
+(maxElements) => {
+    const query = 'a, button, input, select, textarea, label, summary, [role], [onclick], [tabindex], [data-test], [data-testid]';
+    const lines = [];
+    for (const el of document.querySelectorAll(query)) {
+        if (lines.length >= maxElements) break;
+        const rect = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        if (!rect.width || !rect.height || style.visibility === 'hidden' || style.display === 'none') continue;
+        const parts = [el.getAttribute('role') || el.tagName.toLowerCase()];
+        for (const attr of ['id', 'name', 'type', 'data-test', 'data-testid', 'aria-label', 'placeholder', 'href']) {
+            const value = el.getAttribute(attr);
+            if (value) parts.push(`${attr}="${value.slice(0, 60)}"`);
+        }
+        const text = (el.innerText || el.value || '').replace(/\\s+/g, ' ').trim().slice(0, 60);
+        if (text) parts.push(`text="${text}"`);
+        lines.push(parts.join(' '));
+    }
+    return lines;
+}
+"""
+
+SYSTEM_PROMPT = """
+You repair broken Playwright selectors. You get one failing test step, the error and
+the visible interactive elements of the current page, one per line. Pick the element
+the step meant and answer with a Playwright selector that matches it (CSS, text= or
+:has-text()), preferring ids, data-test attributes, names and exact text.
+
+Return ONLY a JSON object: {"selector": "<selector>"}, or {"selector": null} if no
+element on the page fits the step.
+"""
+
+
+def _strip_fences(content: str) -> str:
+    if '```json' in content:
+        return content.split('```json')[1].split('```')[0].strip()
+    if '```' in content:
+        return content.split('```')[1].split('```')[0].strip()
+    return content.strip()
+
+
+def parse_selector(content: str) -> Optional[str]:
+    """The selector from a repair response, or None"""
+    try:
+        data = json.loads(_strip_fences(content))
+    except json.JSONDecodeError:
+        return None
+    selector = data.get('selector') if isinstance(data, dict) else None
+    return selector.strip() if isinstance(selector, str) and selector.strip() else None
+
+
+class LocatorRepairer:
+    """Finds a replacement selector for a failing step from a compact snapshot of the page.
+
+    Only the failing action, its error and up to `max_elements` one-line
+    element descriptions are sent, and the answer is only accepted if it
+    matches an element on the page, so a repair costs one small prompt
+    instead of regenerating and rerunning the whole plan.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[LLMProvider] = None,
+        model: str = DEFAULT_REPAIR_MODEL,
+        max_elements: int = DEFAULT_MAX_ELEMENTS,
+        enabled: bool = True
+    ):
+        self.provider = provider
+        self.model = model
+        self.max_elements = max_elements
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> 'LocatorRepairer':
+        """Enabled by LOCATOR_REPAIR=1; REPAIR_MODEL picks the model (default gpt-4o-mini)"""
+        enabled = os.getenv('LOCATOR_REPAIR', '').lower() in ('1', 'true', 'yes', 'on')
+        return cls(enabled=enabled)
+
+    def can_repair(self, action: Any) -> bool:
+        return self.enabled and bool(action.selector) and action.action_type in REPAIRABLE_ACTIONS
+
+    async def snapshot(self, page) -> List[str]:
+        return await page.evaluate(SNAPSHOT_JS, self.max_elements)
+
+    def _messages(self, action: Any, error: str, url: str, title: str, elements: List[str]) -> List[Dict[str, str]]:
+        step = {
+            'action_type': action.action_type,
+            'selector': action.selector,
+            'value': action.value,
+            'description': action.description,
+        }
+        prompt = (
+            f"FAILING STEP: {json.dumps(step, default=str)}\n"
+            f"ERROR: {error[:300]}\n"
+            f"PAGE: {title} ({url})\n"
+            "ELEMENTS:\n" + '\n'.join(elements)
+        )
+        return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+
+    async def repair(self, page, action: Any, error: str) -> Optional[str]:
+        """A selector that matches on `page` and replaces `action.selector`, or None"""
+        provider = self.provider or get_llm_provider()
+        with get_tracer().span('repair', action_type=action.action_type, selector=action.selector) as span:
+            try:
+                elements = await self.snapshot(page)
+                messages = self._messages(action, error, page.url, await page.title(), elements)
+                content = await provider.complete(messages, self.model, temperature=0)
+            except Exception as e:
+                logger.warning(f"Locator repair failed for '{action.description}': {e}")
+                return None
+            selector = parse_selector(content)
+            span.set(elements=len(elements), prompt_chars=sum(len(m['content']) for m in messages))
+            if not selector or selector == action.selector:
+                return None
+            try:
+                matches = await page.locator(selector).count()
+            except Exception as e:
+                logger.info(f"Rejected repaired selector {selector!r}: {e}")
+                return None
+            if not matches:
+                logger.info(f"Rejected repaired selector {selector!r}: no matching element")
+                return None
+            span.set(repaired=selector)
+            print(f"🩹 Repaired selector: {action.selector!r} -> {selector!r}")
+            return selector
+
+
+def apply_repairs(actions: List[Any], results: List[Dict[str, Any]]) -> List[Any]:
+    """Copy of the plan with each repaired step's selector replaced (from execute_test results)"""
+    repaired = {result['step']: result['repaired_selector'] for result in results if result.get('repaired_selector')}
+    return [
+        dataclasses.replace(action, selector=repaired[i]) if i in repaired else action
+        for i, action in enumerate(actions, 1)
+    ]
@@ -0,0 +1,119 @@
+"""
+Bounded execution log for the Streamlit runners with constant-cost rendering
+"""
+import datetime
+import html
+import logging
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_DIR = os.getenv('LOG_DIR', 'logs')
+
+
+class LogBuffer:
+    """Ring buffer of log lines that only ever renders the last `tail` entries.
+
+    Each line is escaped and turned into HTML once, when it is appended, so
+    refreshing the panel costs the same whether the run has 10 or 10,000
+    lines. The complete log is streamed to ``<log_dir>/run-<timestamp>.log``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        tail: int = 15,
+        log_dir: Optional[str] = DEFAULT_LOG_DIR,
+        container_class: str = 'log-container',
+        entry_class: Optional[str] = 'log-entry',
+        timestamp_class: Optional[str] = None,
+        header_html: str = ''
+    ):
+        self.entries: deque = deque(maxlen=max_entries)
+        self._rendered: deque = deque(maxlen=tail)
+        self.total = 0
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.log_path: Optional[Path] = None
+        self.container_class = container_class
+        self.entry_class = entry_class
+        self.timestamp_class = timestamp_class
+        self.header_html = header_html
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open_file(self):
+        if self.log_dir is None or self._file is not None:
+            return
+        try:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            self.log_path = self.log_dir / f"run-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.log"
+            self._file = open(self.log_path, 'a', encoding='utf-8', buffering=1)
+        except OSError as e:
+            logger.warning(f"Could not open log file: {e}")
+            self.log_dir = None
+
+    def _render_entry(self, timestamp: str, message: str) -> str:
+        if self.timestamp_class:
+            body = f'<span class="{self.timestamp_class}">[{timestamp}]</span> {html.escape(message)}'
+        else:
+            body = html.escape(f"[{timestamp}] {message}")
+        if self.entry_class:
+            return f'<div class="{self.entry_class}">{body}</div>'
+        return f'<div>{body}</div>'
+
+    def append(self, message: str) -> str:
+        """Record a message and return its formatted line"""
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        line = f"[{timestamp}] {message}"
+        with self._lock:
+            self.entries.append(line)
+            self._rendered.append(self._render_entry(timestamp, str(message)))
+            self.total += 1
+            self._open_file()
+            if self._file is not None:
+                self._file.write(line + '\n')
+        return line
+
+    @property
+    def hidden(self) -> int:
+        """Number of lines not shown in the panel"""
+        return self.total - len(self._rendered)
+
+    def render(self) -> str:
+        """HTML for the tail of the log; cost is bounded by `tail`"""
+        with self._lock:
+            body = ''.join(self._rendered)
+            hidden = self.hidden
+        note = ''
+        if hidden:
+            location = f" (full log: {html.escape(str(self.log_path))})" if self.log_path else ''
+            note = f'<div class="{self.entry_class or ""}"><em>… {hidden} earlier lines{location}</em></div>'
+        return f'<div class="{self.container_class}">{self.header_html}{note}{body}</div>'
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """Forget all lines; the next append starts a new log file"""
+        self.close()
+        with self._lock:
+            self.entries.clear()
+            self._rendered.clear()
+            self.total = 0
+            self.log_path = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.entries))
+
+    def __bool__(self) -> bool:
+        return self.total > 0
@@ -17,12 +17,19 @@ from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
 from langchain.tools import Tool, StructuredTool
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 from langchain_openai import ChatOpenAI
 from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
 
+from screenshot_policy import ScreenshotPolicy
+from artifact_store import ArtifactHandle, get_artifact_store
+from network_profiles import NetworkBlocker
+from llm_providers import LLMProvider, close_async_openai_client, get_llm_provider
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -79,13 +86,54 @@ class TestAction(BaseModel):
         return v
 
 class TestResult(BaseModel):
-    """Test execution result"""
+    """Test execution result; screenshots are lazy artifact handles, not inline bytes"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     success: bool
     message: str
-    screenshot: Optional[bytes] = None
+    screenshot: Optional[ArtifactHandle] = None
     error: Optional[str] = None
     metadata: Dict[str, Any] = {}
 
+class ProviderChatModel(BaseChatModel):
+    """LangChain chat model backed by an LLMProvider, for replayed or rule-based runs"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    provider: LLMProvider
+    model_name: str = "gpt-4-turbo"
+    temperature: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return f"llm-provider-{self.provider.name}"
+
+    @staticmethod
+    def _to_messages(messages) -> List[Dict[str, str]]:
+        roles = {'system': 'system', 'human': 'user', 'ai': 'assistant'}
+        return [{"role": roles.get(message.type, 'user'), "content": message.content} for message in messages]
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content = await self.provider.complete(self._to_messages(messages), self.model_name, self.temperature)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._agenerate_and_close(messages, stop=stop, **kwargs))
+        # asyncio.run() cannot nest, and blocking here would stall the loop the provider needs
+        raise RuntimeError(
+            f"{type(self).__name__} was called synchronously from a running event loop; "
+            "use the async API (ainvoke/agenerate), which goes through _agenerate"
+        )
+
+    async def _agenerate_and_close(self, messages, stop=None, **kwargs) -> ChatResult:
+        try:
+            return await self._agenerate(messages, stop=stop, **kwargs)
+        finally:
+            # This loop ends with asyncio.run(); don't leave its pooled client open
+            await close_async_openai_client()
+
 class TestAgent:
     """Modern AI-powered test agent with LangChain and Playwright"""
     
@@ -97,7 +145,10 @@ class TestAgent:
         max_retries: int = 3,
         base_url: Optional[str] = None,
         screenshots_dir: str = "screenshots",
-        debug: bool = False
+        debug: bool = False,
+        screenshot_policy: Optional[ScreenshotPolicy] = None,
+        network_blocker: Optional[NetworkBlocker] = None,
+        llm: Optional[BaseChatModel] = None
     ):
         self.page = page
         self.model_name = model_name
@@ -106,16 +157,27 @@ class TestAgent:
         self.base_url = base_url.rstrip('/') if base_url else None
         self.screenshots_dir = Path(screenshots_dir)
         self.debug = debug
+        self.screenshot_policy = screenshot_policy or ScreenshotPolicy.from_env()
+        self.artifact_store = get_artifact_store()
+        self.network = network_blocker or NetworkBlocker.from_env()
+        self._network_applied = False
+        self.step_number = 0
         
         # Create screenshots directory if it doesn't exist
         self.screenshots_dir.mkdir(parents=True, exist_ok=True)
         
-        # Initialize LLM
-        self.llm = ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            max_retries=max_retries
-        )
+        # Initialize LLM; LLM_PROVIDER=rules/replay/record swaps ChatOpenAI for an offline backend
+        if llm is None:
+            provider = get_llm_provider()
+            if provider.name == 'openai':
+                llm = ChatOpenAI(
+                    model=model_name,
+                    temperature=temperature,
+                    max_retries=max_retries
+                )
+            else:
+                llm = ProviderChatModel(provider=provider, model_name=model_name, temperature=temperature)
+        self.llm = llm
         
         # Initialize tools
         self.tools = self._initialize_tools()
@@ -185,6 +247,9 @@ class TestAgent:
         results = []
         try:
             logger.info(f"Executing test plan: {test_description}")
+            if not self._network_applied:
+                await self.network.apply(self.page)
+                self._network_applied = True
             
             # First, navigate to the base URL if specified
             if self.base_url:
@@ -201,7 +266,7 @@ class TestAgent:
                         success=False,
                         message=f"Failed to navigate to {self.base_url}",
                         error=str(e),
-                        screenshot=await self._take_screenshot()
+                        screenshot=await self._take_screenshot(failed=True)
                     ))
                     return results
             
@@ -229,7 +294,7 @@ class TestAgent:
                     success=False,
                     message="Error during test execution",
                     error=str(e),
-                    screenshot=await self._take_screenshot()
+                    screenshot=await self._take_screenshot(failed=True)
                 ))
                 
         except Exception as e:
@@ -238,7 +303,7 @@ class TestAgent:
                 success=False,
                 message="Unexpected error during test execution",
                 error=str(e),
-                screenshot=await self._take_screenshot()
+                screenshot=await self._take_screenshot(failed=True)
             ))
             
         return results
@@ -282,17 +347,22 @@ class TestAgent:
             logger.error(f"Fill failed: {str(e)}")
             raise
     
-    async def _take_screenshot(self) -> bytes:
-        """Take a screenshot and return as bytes"""
+    async def _take_screenshot(self, failed: bool = False) -> Optional[ArtifactHandle]:
+        """Take a screenshot if the screenshot policy calls for one and store it as an artifact"""
+        self.step_number += 1
         try:
-            screenshot = await self.page.screenshot(full_page=True)
-            return screenshot
+            screenshot = await self.screenshot_policy.capture(self.page, step=self.step_number, failed=failed)
+            if not screenshot:
+                return None
+            return await self.artifact_store.store(screenshot, self.screenshot_policy.extension)
         except Exception as e:
             logger.error(f"Failed to take screenshot: {str(e)}")
-            return b''
+            return None
     
     async def close(self):
         """Clean up resources"""
+        if self.network.enabled:
+            logger.info(self.network.summary())
         await self.page.close()
 
 # Example usage
@@ -0,0 +1,187 @@
+"""
+Named request-blocking profiles shared by the runners
+"""
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Analytics, ad and tracking hosts; subdomains match too
+TRACKER_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'googleadservices.com',
+    'googlesyndication.com', 'doubleclick.net', 'adservice.google.com',
+    'facebook.net', 'connect.facebook.net', 'analytics.tiktok.com',
+    'bat.bing.com', 'clarity.ms', 'hotjar.com', 'segment.io', 'segment.com',
+    'mixpanel.com', 'amplitude.com', 'fullstory.com', 'newrelic.com',
+    'nr-data.net', 'optimizely.com', 'quantserve.com', 'scorecardresearch.com',
+    'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'adnxs.com',
+    'amazon-adsystem.com', 'ads-twitter.com', 'snap.licdn.com', 'ct.pinterest.com',
+)
+
+# Rough transfer size of a blocked request, by resource type. Aborted
+# requests never report a size, so savings are estimates.
+ESTIMATED_BYTES = {
+    'image': 40_000,
+    'font': 30_000,
+    'media': 500_000,
+    'script': 30_000,
+    'document': 80_000,
+    'xhr': 2_000,
+    'fetch': 2_000,
+    'ping': 500,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or ''
+
+
+def _base_domain(host: str) -> str:
+    """'cdn.hardees.com' -> 'hardees.com' (good enough to tell first from third party)"""
+    return '.'.join(host.split('.')[-2:])
+
+
+def _is_tracker(request, domains: Sequence[str]) -> bool:
+    host = _host(request.url)
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+
+def _is_third_party_frame(request) -> bool:
+    if request.resource_type != 'document':
+        return False
+    try:
+        frame = request.frame
+    except Exception:
+        # Service worker requests have no frame
+        return False
+    if frame.parent_frame is None:
+        return False
+    top_host = _host(frame.page.main_frame.url)
+    return bool(top_host) and _base_domain(_host(request.url)) != _base_domain(top_host)
+
+
+@dataclass(frozen=True)
+class BlockingProfile:
+    """A named rule deciding which requests to abort"""
+    name: str
+    description: str
+    matches: Callable[[object], bool]
+
+
+def _resource_type_profile(name: str, *resource_types: str) -> BlockingProfile:
+    return BlockingProfile(
+        name,
+        f"Abort {', '.join(resource_types)} requests",
+        lambda request: request.resource_type in resource_types
+    )
+
+
+PROFILES: Dict[str, BlockingProfile] = {
+    profile.name: profile for profile in (
+        _resource_type_profile('images', 'image'),
+        _resource_type_profile('fonts', 'font'),
+        _resource_type_profile('media', 'media'),
+        BlockingProfile(
+            'trackers', 'Abort analytics, ad and tracking requests',
+            lambda request: _is_tracker(request, TRACKER_DOMAINS)
+        ),
+        BlockingProfile(
+            'third_party_frames', 'Abort iframes loaded from another site',
+            _is_third_party_frame
+        ),
+    )
+}
+
+
+def parse_profiles(spec: Optional[str]) -> List[str]:
+    """'images, fonts' -> ['images', 'fonts']; 'none' or '' -> []; 'all' -> every profile"""
+    names = [name.strip().lower() for name in (spec or '').split(',') if name.strip()]
+    if names in (['none'], ['off']):
+        return []
+    if names == ['all']:
+        return list(PROFILES)
+    unknown = [name for name in names if name not in PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown blocking profile(s) {unknown}, expected some of {list(PROFILES)}")
+    return names
+
+
+@dataclass
+class BlockStats:
+    requests: int = 0
+    bytes: int = 0  # estimated, see ESTIMATED_BYTES
+
+
+@dataclass
+class NetworkBlocker:
+    """Aborts requests matched by the enabled profiles and counts what it saved.
+
+    ``apply()`` installs one catch-all route on a context or page. Requests
+    no profile matches are passed on with ``route.fallback()``, so other
+    routes (e.g. HAR replay) still see them. The first matching profile
+    gets the credit for a blocked request.
+    """
+    profiles: List[str] = field(default_factory=list)
+    stats: Dict[str, BlockStats] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for name in self.profiles:
+            if name not in PROFILES:
+                raise ValueError(f"Unknown blocking profile '{name}', expected one of {list(PROFILES)}")
+        self.stats = {name: BlockStats() for name in self.profiles}
+
+    @classmethod
+    def from_env(cls, default: str = '') -> 'NetworkBlocker':
+        """Profiles from the comma-separated BLOCK_PROFILES variable, else `default`"""
+        return cls(parse_profiles(os.getenv('BLOCK_PROFILES', default)))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.profiles)
+
+    async def apply(self, target):
+        """Install the blocking route on a BrowserContext or Page; no-op without profiles"""
+        if self.enabled:
+            await target.route('**/*', self._handle)
+
+    async def _handle(self, route):
+        request = route.request
+        for name in self.profiles:
+            try:
+                matched = PROFILES[name].matches(request)
+            except Exception as e:
+                logger.debug(f"Blocking profile {name} failed on {request.url}: {e}")
+                matched = False
+            if matched:
+                stats = self.stats[name]
+                stats.requests += 1
+                stats.bytes += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+                await route.abort('blockedbyclient')
+                return
+        await route.fallback()
+
+    @property
+    def blocked_requests(self) -> int:
+        return sum(stats.requests for stats in self.stats.values())
+
+    @property
+    def blocked_bytes(self) -> int:
+        return sum(stats.bytes for stats in self.stats.values())
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        return {name: {'requests': stats.requests, 'bytes': stats.bytes} for name, stats in self.stats.items()}
+
+    def summary(self) -> str:
+        """One-line description of what was blocked, for run logs"""
+        if not self.enabled:
+            return "No request blocking"
+        parts = [
+            f"{name}: {stats.requests} req (~{stats.bytes / 1024:.0f} KB)"
+            for name, stats in self.stats.items()
+        ]
+        return (f"Blocked {self.blocked_requests} requests, ~{self.blocked_bytes / 1024:.0f} KB saved "
+                f"({'; '.join(parts)})")
@@ -0,0 +1,178 @@
+"""
+On-disk cache of generated test plans, keyed on the normalized description
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv('PLAN_CACHE_PATH', '.plan_cache/plans.sqlite3')
+DEFAULT_TTL_SECONDS = int(os.getenv('PLAN_CACHE_TTL', str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv('PLAN_CACHE_MAX_ENTRIES', '1000'))
+
+
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+
+def normalize_description(text: str) -> str:
+    """Normalize whitespace and trailing punctuation so reflowed descriptions share a key.
+
+    Case is kept, since it matters in typed values, passwords and search
+    terms, and quoted spans are kept verbatim.
+    """
+    text = text or ''
+    parts = []
+    last = 0
+    for match in _QUOTED.finditer(text):
+        parts.append(re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text[last:match.start()])))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text[last:])))
+    return ''.join(parts).strip().rstrip('.!').strip()
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """Normalize a target URL (scheme/host case, trailing slash)"""
+    if not url:
+        return ''
+    url = url.strip()
+    if '://' not in url:
+        url = f'https://{url}'
+    scheme, rest = url.split('://', 1)
+    host, _, path = rest.partition('/')
+    return f"{scheme.lower()}://{host.lower()}/{path}".rstrip('/')
+
+
+class PlanCache:
+    """SQLite-backed plan cache with TTL expiry and LRU eviction"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS plans (
+                key TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                model TEXT NOT NULL,
+                target_url TEXT NOT NULL,
+                actions TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS plans_last_used ON plans(last_used)')
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(description: str, model: str, system_prompt: str, target_url: Optional[str] = None) -> str:
+        """Build the cache key from the normalized description, model, prompt hash and URL"""
+        prompt_hash = hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()
+        parts = [normalize_description(description), model, prompt_hash, normalize_url(target_url)]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached action dicts for a key, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT actions, created_at FROM plans WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            actions, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute('DELETE FROM plans WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                'UPDATE plans SET last_used = ?, hits = hits + 1 WHERE key = ?', (now, key)
+            )
+            self._conn.commit()
+        return json.loads(actions)
+
+    def put(
+        self,
+        key: str,
+        actions: List[Dict[str, Any]],
+        description: str = '',
+        model: str = '',
+        target_url: Optional[str] = None
+    ):
+        """Store a plan and evict least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO plans
+                    (key, description, model, target_url, actions, created_at, last_used, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, description, model, normalize_url(target_url), json.dumps(actions), now, now)
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    """
+                    DELETE FROM plans WHERE key NOT IN (
+                        SELECT key FROM plans ORDER BY last_used DESC LIMIT ?
+                    )
+                    """,
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+
+    def invalidate(self, key: str) -> bool:
+        """Remove a single plan; returns True if it existed"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM plans WHERE key = ?', (key,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        """Remove all entries older than the TTL"""
+        if not self.ttl_seconds:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM plans WHERE created_at < ?', (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        """Remove every cached plan"""
+        with self._lock:
+            self._conn.execute('DELETE FROM plans')
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and total hits"""
+        with self._lock:
+            entries, hits = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM plans'
+            ).fetchone()
+        return {'entries': entries, 'hits': hits, 'path': str(self.path)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
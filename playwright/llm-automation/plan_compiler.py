@@ -0,0 +1,370 @@
+"""
+Compile validated test plans into standalone Playwright scripts that run without the LLM
+"""
+import datetime
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import pprint
+from dataclasses import asdict, dataclass, is_dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from plan_cache import normalize_description, normalize_url
+from settle import DOM_QUIET_SCRIPT, SettleStrategy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLANS_DIR = os.getenv('COMPILED_PLANS_DIR', 'compiled_plans')
+# Compiled .py scripts import settle.py from here
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bump when the generated code changes shape; older scripts are recompiled
+COMPILER_VERSION = 3
+
+# Action types TestExecutor performs; any other step fails there, so it is never compiled
+ACTION_TYPES = (
+    'navigate', 'click', 'fill', 'select', 'wait', 'screenshot', 'scroll',
+    'check', 'uncheck', 'hover', 'press', 'wait_for_selector', 'assert',
+)
+
+# Action types that cannot be compiled without a selector (or URL)
+SELECTOR_REQUIRED = ('navigate', 'click', 'fill', 'select', 'check', 'uncheck', 'hover', 'wait_for_selector')
+
+
+def plan_id(description: str, target_url: Optional[str] = None) -> str:
+    """Version of a plan: hash of the normalized description and target URL"""
+    key = f"{normalize_description(description)}\x1f{normalize_url(target_url)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+def _action_dict(action: Any) -> Dict[str, Any]:
+    if is_dataclass(action):
+        return asdict(action)
+    if hasattr(action, 'model_dump'):
+        return action.model_dump()
+    return dict(action)
+
+
+def validate_plan(actions: List[Dict[str, Any]]):
+    """Raise ValueError unless every step can be compiled"""
+    if not actions:
+        raise ValueError("Cannot compile an empty plan")
+    for i, action in enumerate(actions, 1):
+        action_type = action.get('action_type')
+        if not action_type:
+            raise ValueError(f"Step {i} has no action_type")
+        if action_type not in ACTION_TYPES:
+            raise ValueError(f"Step {i} has unsupported action_type '{action_type}'")
+        if action_type in SELECTOR_REQUIRED and not (action.get('selector') or _wait_target(action)):
+            raise ValueError(f"Step {i} ('{action_type}') has no selector")
+
+
+def _wait_target(action: Dict[str, Any]) -> Optional[str]:
+    """A wait_for_selector step may name its element in 'wait_for_selector' instead, as TestExecutor accepts"""
+    return action.get('wait_for_selector') if action.get('action_type') == 'wait_for_selector' else None
+
+
+def _url(selector: str) -> str:
+    return selector if '://' in selector else f'https://{selector}'
+
+
+def _python_statements(action: Dict[str, Any]) -> List[str]:
+    """Playwright calls for one step, mirroring what TestExecutor does for it"""
+    action_type = action['action_type']
+    selector = action.get('selector')
+    value = action.get('value')
+    if action_type == 'navigate':
+        return [f"await page.goto({_url(selector)!r}, timeout=60000)"]
+    if action_type == 'click':
+        return [
+            f"element = await page.wait_for_selector({selector!r}, state='visible', timeout=10000)",
+            "await element.scroll_into_view_if_needed()",
+            "await element.click(delay=100)",
+        ]
+    if action_type == 'fill':
+        return [f"await page.fill({selector!r}, {str(value)!r})"]
+    if action_type == 'select':
+        return [f"await page.select_option({selector!r}, value={str(value)!r})"]
+    if action_type == 'wait':
+        return [f"await asyncio.sleep({int(value) if value else 1})"]
+    if action_type == 'screenshot':
+        if value:
+            return [f"await page.screenshot(path={str(value)!r}, full_page=True)"]
+        return ["await page.screenshot(path=f'screenshot_{int(time.time())}.png', full_page=True)"]
+    if action_type == 'scroll':
+        return ["await page.evaluate('window.scrollBy(0, window.innerHeight)')"]
+    if action_type in ('check', 'uncheck', 'hover'):
+        return [f"await page.{action_type}({selector!r})"]
+    if action_type == 'press':
+        return [f"await page.press({(selector or 'body')!r}, {str(value or 'Enter')!r})"]
+    if action_type == 'wait_for_selector':
+        return [f"await page.wait_for_selector({(selector or _wait_target(action))!r}, state='visible', timeout={action.get('wait_timeout') or 5000})"]
+    if action_type == 'assert':
+        target = selector or 'body'
+        statements = [f"element = await page.wait_for_selector({target!r}, state='visible', timeout=10000)"]
+        if value:
+            expected = ' '.join(str(value).split())
+            message = f"Expected {target} to contain {expected!r}"
+            statements += [
+                "text = ' '.join((await element.inner_text()).split())",
+                f"if {expected.lower()!r} not in text.lower():",
+                f"    raise AssertionError({message!r})",
+            ]
+        return statements
+    raise ValueError(f"Cannot compile '{action_type}' steps")
+
+
+def _typescript_statements(action: Dict[str, Any]) -> List[str]:
+    action_type = action['action_type']
+    selector = action.get('selector')
+    value = action.get('value')
+    if action_type == 'navigate':
+        return [f"await page.goto({json.dumps(_url(selector))});"]
+    if action_type == 'click':
+        return [f"await page.click({json.dumps(selector)});"]
+    if action_type == 'fill':
+        return [f"await page.fill({json.dumps(selector)}, {json.dumps(str(value))});"]
+    if action_type == 'select':
+        return [f"await page.selectOption({json.dumps(selector)}, {json.dumps(str(value))});"]
+    if action_type == 'wait':
+        return [f"await page.waitForTimeout({(int(value) if value else 1) * 1000});"]
+    if action_type == 'screenshot':
+        return [f"await page.screenshot({{ path: {json.dumps(value or 'screenshot.png')}, fullPage: true }});"]
+    if action_type == 'scroll':
+        return ["await page.evaluate(() => window.scrollBy(0, window.innerHeight));"]
+    if action_type in ('check', 'uncheck', 'hover'):
+        return [f"await page.{action_type}({json.dumps(selector)});"]
+    if action_type == 'press':
+        return [f"await page.press({json.dumps(selector or 'body')}, {json.dumps(str(value or 'Enter'))});"]
+    if action_type == 'wait_for_selector':
+        return [f"await page.waitForSelector({json.dumps(selector or _wait_target(action))}, {{ state: 'visible', timeout: {action.get('wait_timeout') or 5000} }});"]
+    if action_type == 'assert':
+        locator = f"page.locator({json.dumps(selector or 'body')}).first()"
+        if value:
+            return [f"await expect({locator}).toContainText({json.dumps(' '.join(str(value).split()))}, {{ ignoreCase: true }});"]
+        return [f"await expect({locator}).toBeVisible();"]
+    raise ValueError(f"Cannot compile '{action_type}' steps")
+
+
+def _settle_arguments() -> str:
+    """The budgets TestExecutor settles with, so compiled replays wait as long as the original run"""
+    settle = SettleStrategy()
+    return ', '.join(f'{name}={getattr(settle, name)!r}' for name in (
+        'navigation_timeout', 'network_quiet_ms', 'network_timeout', 'long_request_ms', 'dom_quiet_ms', 'dom_timeout'
+    ))
+
+
+def _typescript_settle() -> List[str]:
+    """A settle() helper for .spec.ts files approximating SettleStrategy with networkidle and the DOM quiet script"""
+    settle = SettleStrategy()
+    return [
+        f'const domQuiet = {DOM_QUIET_SCRIPT.strip()};',
+        '',
+        'async function settle(page: Page, previousUrl: string) {',
+        '  if (page.url() !== previousUrl) {',
+        f"    await page.waitForLoadState('domcontentloaded', {{ timeout: {settle.navigation_timeout} }}).catch(() => {{}});",
+        '  }',
+        '  await Promise.all([',
+        f"    page.waitForLoadState('networkidle', {{ timeout: {settle.network_timeout} }}).catch(() => {{}}),",
+        f'    page.evaluate(domQuiet, {{ quietMs: {settle.dom_quiet_ms}, timeoutMs: {settle.dom_timeout}, '
+        f'frames: {str(settle.animation_frames).lower()} }})',
+        "      .catch(() => page.waitForLoadState('domcontentloaded').catch(() => {})),",
+        '  ]);',
+        '}',
+        '',
+    ]
+
+
+def render_python(
+    description: str,
+    actions: List[Dict[str, Any]],
+    target_url: Optional[str] = None,
+    settle_dir: str = MODULE_DIR
+) -> str:
+    """The plan as a Python script; `settle_dir` is where it finds settle.py, absolute or relative to the script"""
+    version = plan_id(description, target_url)
+    lines = [
+        '"""',
+        f'Compiled test plan {version}; generated by plan_compiler.py, recompile instead of editing',
+        '"""',
+        'import asyncio',
+        'import os',
+        'import sys',
+        'import time',
+        'from typing import Any, Dict, List',
+        '',
+        f'SETTLE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), {settle_dir!r}))',
+        'if SETTLE_DIR not in sys.path:',
+        '    sys.path.insert(0, SETTLE_DIR)',
+        '',
+        'from settle import SettleStrategy',
+        '',
+        f'PLAN_VERSION = {version!r}',
+        f'COMPILER_VERSION = {COMPILER_VERSION}',
+        f'DESCRIPTION = {description!r}',
+        f'TARGET_URL = {target_url!r}',
+        f'COMPILED_AT = {datetime.datetime.now().isoformat(timespec="seconds")!r}',
+        f'ACTIONS = {pprint.pformat(actions, sort_dicts=False)}',
+        '',
+    ]
+    for i, action in enumerate(actions, 1):
+        lines += [
+            '',
+            f'async def step_{i}(page):',
+            f'    {(action.get("description") or action["action_type"])!r}',
+        ]
+        lines += [f'    {statement}' for statement in _python_statements(action)]
+        lines.append('')
+    lines += [
+        '',
+        f'STEPS = [{", ".join(f"step_{i}" for i in range(1, len(actions) + 1))}]',
+        '',
+        '',
+        'async def run(page) -> List[Dict[str, Any]]:',
+        '    """Run every step on `page`; settles after each and stops at the first failure, like TestExecutor.execute_test"""',
+        f'    settle = SettleStrategy({_settle_arguments()})',
+        '    settle.attach(page)',
+        '    results = []',
+        '    for i, step in enumerate(STEPS, 1):',
+        '        previous_url = page.url',
+        '        try:',
+        '            await step(page)',
+        '            await settle.settle(page, previous_url=previous_url)',
+        '        except Exception as e:',
+        "            results.append({'step': i, 'description': step.__doc__, 'status': 'failed', 'error': str(e)})",
+        '            break',
+        "        results.append({'step': i, 'description': step.__doc__, 'status': 'passed', 'error': None})",
+        '    return results',
+        '',
+        '',
+        'async def main(headless: bool = True) -> int:',
+        '    from playwright.async_api import async_playwright',
+        '    async with async_playwright() as p:',
+        '        browser = await p.chromium.launch(headless=headless)',
+        '        try:',
+        '            results = await run(await browser.new_page())',
+        '        finally:',
+        '            await browser.close()',
+        '    for result in results:',
+        "        status = \"✅\" if result['status'] == 'passed' else \"❌\"",
+        "        print(f\"{status} {result['step']}. {result['description']}\" + (f\": {result['error']}\" if result['error'] else ''))",
+        "    return 0 if len(results) == len(STEPS) and all(r['status'] == 'passed' for r in results) else 1",
+        '',
+        '',
+        "if __name__ == '__main__':",
+        "    sys.exit(asyncio.run(main(headless='--headed' not in sys.argv)))",
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def render_typescript(description: str, actions: List[Dict[str, Any]], target_url: Optional[str] = None) -> str:
+    lines = [
+        "import { expect, test, type Page } from '@playwright/test';",
+        '',
+        f'// Compiled test plan {plan_id(description, target_url)}',
+        '// Each step settles like TestExecutor before the next one runs',
+    ]
+    lines += _typescript_settle()
+    lines += [
+        f"test({json.dumps(description)}, async ({{ page }}) => {{",
+        '  let previousUrl: string;',
+    ]
+    for action in actions:
+        lines.append(f"  // {action.get('description') or action['action_type']}")
+        lines.append('  previousUrl = page.url();')
+        lines += [f'  {statement}' for statement in _typescript_statements(action)]
+        lines.append('  await settle(page, previousUrl);')
+        lines.append('')
+    if lines[-1] == '':
+        lines.pop()
+    lines += ['});', '']
+    return '\n'.join(lines)
+
+
+@dataclass
+class CompiledPlan:
+    """A compiled plan loaded from disk"""
+    plan_id: str
+    path: Path
+    description: str
+    actions: List[Dict[str, Any]]
+    run: Callable[[Any], Awaitable[List[Dict[str, Any]]]]
+
+
+class PlanCompiler:
+    """Writes passing plans to ``<plans_dir>/plan_<id>.py`` (and ``.spec.ts``) and loads them back.
+
+    The id hashes the normalized description and target URL, so rewording a
+    test compiles a new version while the old script stays untouched.
+    """
+
+    def __init__(self, plans_dir: str = DEFAULT_PLANS_DIR, typescript: bool = False):
+        self.plans_dir = Path(plans_dir)
+        self.typescript = typescript
+
+    @classmethod
+    def from_env(cls) -> 'PlanCompiler':
+        """COMPILED_PLANS_DIR sets the directory; COMPILE_TYPESCRIPT=1 also writes .spec.ts files"""
+        typescript = os.getenv('COMPILE_TYPESCRIPT', '').lower() in ('1', 'true', 'yes')
+        return cls(DEFAULT_PLANS_DIR, typescript=typescript)
+
+    def path(self, description: str, target_url: Optional[str] = None) -> Path:
+        return self.plans_dir / f"plan_{plan_id(description, target_url)}.py"
+
+    def compile(self, description: str, actions: List[Any], target_url: Optional[str] = None) -> Path:
+        """Compile a validated plan (TestActions or action dicts) and return the Python script's path"""
+        actions = [_action_dict(action) for action in actions]
+        validate_plan(actions)
+        path = self.path(description, target_url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            settle_dir = os.path.relpath(MODULE_DIR, path.parent.resolve())
+        except ValueError:
+            settle_dir = MODULE_DIR  # e.g. on another drive
+        tmp_path.write_text(render_python(description, actions, target_url, settle_dir), encoding='utf-8')
+        os.replace(tmp_path, path)
+        if self.typescript:
+            path.with_suffix('.spec.ts').write_text(render_typescript(description, actions, target_url), encoding='utf-8')
+        logger.info(f"Compiled {len(actions)} steps to {path}")
+        return path
+
+    def load(self, description: str, target_url: Optional[str] = None) -> Optional[CompiledPlan]:
+        """The compiled plan for a description, or None if there is no usable one"""
+        path = self.path(description, target_url)
+        if not path.exists():
+            return None
+        try:
+            spec = importlib.util.spec_from_file_location(f"compiled_{path.stem}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            logger.warning(f"Ignoring unloadable compiled plan {path}: {e}")
+            return None
+        if getattr(module, 'COMPILER_VERSION', None) != COMPILER_VERSION:
+            logger.info(f"Compiled plan {path} is from another compiler version; recompiling on next pass")
+            return None
+        return CompiledPlan(
+            plan_id=module.PLAN_VERSION,
+            path=path,
+            description=module.DESCRIPTION,
+            actions=module.ACTIONS,
+            run=module.run
+        )
+
+    def invalidate(self, description: str, target_url: Optional[str] = None) -> bool:
+        """Delete the compiled plan and its .spec.ts; returns True if a script existed"""
+        path = self.path(description, target_url)
+        try:
+            path.with_suffix('.spec.ts').unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
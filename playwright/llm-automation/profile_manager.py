@@ -0,0 +1,146 @@
+"""
+Golden Chrome profile snapshot with cheap per-run clones
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = os.getenv(
+    'CHROME_PROFILE_DIR',
+    str(Path(__file__).resolve().parent / 'custom_chrome_profile')
+)
+DEFAULT_PROFILE_POOL_DIR = os.getenv('PROFILE_POOL_DIR', '.profiles')
+
+# Regenerated by Chromium on demand; dropping them keeps clones small
+PRUNED_DIRS = {
+    'Cache', 'Code Cache', 'GPUCache', 'DawnCache', 'DawnWebGPUCache', 'DawnGraphiteCache',
+    'GrShaderCache', 'GraphiteDawnCache', 'ShaderCache', 'CacheStorage', 'ScriptCache',
+    'component_crx_cache', 'extensions_crx_cache', 'Crashpad', 'BrowserMetrics',
+    'optimization_guide_model_store', 'Safe Browsing', 'blob_storage',
+}
+# Lock files tie a profile to the process that had it open
+PRUNED_FILES = {'SingletonLock', 'SingletonSocket', 'SingletonCookie', 'RunningChromeVersion', 'lockfile'}
+
+
+def _ignore(directory: str, names):
+    ignored = set()
+    for name in names:
+        path = os.path.join(directory, name)
+        if name in PRUNED_FILES or name.endswith('.tmp'):
+            ignored.add(name)
+        elif name in PRUNED_DIRS and os.path.isdir(path) and not os.path.islink(path):
+            ignored.add(name)
+    return ignored
+
+
+def _copy_tree(src: Path, dst: Path):
+    """Copy `src` to a new directory `dst`, sharing blocks with the source where the filesystem allows"""
+    if sys.platform.startswith('linux'):
+        command = ['cp', '-a', '--reflink=auto', str(src), str(dst)]
+    elif sys.platform == 'darwin':
+        # -c clones via clonefile(2) on APFS
+        command = ['cp', '-cRp', str(src), str(dst)]
+    else:
+        command = None
+    if command:
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.debug(f"{command[0]} clone failed ({e}); copying instead")
+            shutil.rmtree(dst, ignore_errors=True)
+    shutil.copytree(src, dst, symlinks=True)
+
+
+class ProfileManager:
+    """Hands out private copies of one golden Chrome profile.
+
+    Chromium locks a user data dir, so a single persistent profile means a
+    single run. ``snapshot()`` copies the source profile into
+    ``<root>/golden`` once, leaving out caches and lock files. ``clone()``
+    gives each run its own copy of that snapshot (copy-on-write where the
+    filesystem supports it), which ``release()`` deletes again, so any
+    number of runs can start from the same logged-in, location-set state.
+
+    Where cookies and local storage are all a run needs, the state
+    exported to ``storage_state_path`` by ``custom_profile.py`` can be
+    passed to ``browser.new_context(storage_state=...)`` instead, which
+    skips the profile copy altogether.
+    """
+
+    def __init__(self, source: str = DEFAULT_PROFILE_DIR, root: str = DEFAULT_PROFILE_POOL_DIR):
+        self.source = Path(source)
+        self.root = Path(root)
+        self.golden = self.root / 'golden'
+        self.clones_dir = self.root / 'clones'
+        self._lock = threading.Lock()
+
+    @property
+    def storage_state_path(self) -> Path:
+        return self.root / 'storage_state.json'
+
+    def storage_state(self) -> Optional[str]:
+        """Path of the exported storage state, if one has been saved"""
+        path = self.storage_state_path
+        return str(path) if path.exists() else None
+
+    def snapshot(self, refresh: bool = False) -> Path:
+        """Create (or with `refresh`, recreate) the pruned golden copy of the source profile"""
+        with self._lock:
+            if self.golden.exists() and not refresh:
+                return self.golden
+            if not self.source.is_dir():
+                raise FileNotFoundError(f"Chrome profile not found at {self.source}; create it with custom_profile.py")
+            self.root.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(prefix='golden-', dir=self.root))
+            shutil.rmtree(staging)
+            shutil.copytree(self.source, staging, symlinks=True, ignore=_ignore)
+            (staging / '.snapshot.json').write_text(
+                json.dumps({'source': str(self.source), 'created_at': time.time()}),
+                encoding='utf-8'
+            )
+            shutil.rmtree(self.golden, ignore_errors=True)
+            os.replace(staging, self.golden)
+            logger.info(f"Snapshotted Chrome profile {self.source} -> {self.golden}")
+            return self.golden
+
+    def clone(self) -> Path:
+        """A private copy of the golden profile for one run; pass it to release() afterwards"""
+        golden = self.snapshot()
+        self.clones_dir.mkdir(parents=True, exist_ok=True)
+        target = Path(tempfile.mkdtemp(prefix='profile-', dir=self.clones_dir))
+        target.rmdir()  # cp wants to create the directory itself
+        _copy_tree(golden, target)
+        return target
+
+    def release(self, clone: Optional[Path]):
+        """Delete a clone made by clone()"""
+        if clone is None:
+            return
+        clone = Path(clone)
+        if clone.parent.resolve() != self.clones_dir.resolve():
+            raise ValueError(f"{clone} is not a profile clone")
+        shutil.rmtree(clone, ignore_errors=True)
+
+
+_manager: Optional[ProfileManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_profile_manager() -> ProfileManager:
+    """Process-wide profile manager for $CHROME_PROFILE_DIR"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ProfileManager()
+        return _manager
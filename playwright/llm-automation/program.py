@@ -6,6 +6,11 @@ import time
 from typing import Optional
 from dataclasses import dataclass
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
+from selector_cache import get_selector_cache, site_key
+from selector_probe import act_on_first
+from interstitials import InterstitialWatchdog
+from network_profiles import NetworkBlocker
+from har_replay import HarSession
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +27,8 @@ class HardeesTest:
     def __init__(self, headless=False):
         self.headless = headless
         self.base_url = "https://www.hardees.com/"
+        self.site = site_key(self.base_url)
+        self.selectors = get_selector_cache()  # candidates that won on earlier runs go first
         self.screenshot_dir = "test_screenshots"
         os.makedirs(self.screenshot_dir, exist_ok=True)
         self.step = 0
@@ -33,10 +40,23 @@ class HardeesTest:
             args=['--disable-blink-features=AutomationControlled']
         )
         self.context = await self.browser.new_context()
+        # HAR_MODE=record/replay; added before blocking so blocked requests are never recorded
+        self.har = HarSession.from_env('hardees-add-burger')
+        await self.har.apply(self.context)
+        self.network = NetworkBlocker.from_env()
+        await self.network.apply(self.context)
+        # Cookie banners and popups are dismissed whenever they show up
+        self.interstitials = InterstitialWatchdog()
+        await self.interstitials.attach(self.context)
         self.page = await self.context.new_page()
         self.page.set_default_timeout(30000)
 
     async def close(self):
+        await self.interstitials.stop()
+        if self.network.enabled:
+            logger.info(self.network.summary())
+        # Closing the context is what writes a recorded HAR
+        await self.context.close()
         await self.browser.close()
         await self.playwright.stop()
 
@@ -77,18 +97,10 @@ class HardeesTest:
             logger.info("Page loaded successfully")
             initial_screenshot = await self.take_screenshot("initial_page")
             
-            # Wait for cookie banner and accept if present
-            try:
-                accept_button = await self.page.wait_for_selector(
-                    'button:has-text("Accept"), button:has-text("Accept All"), button:has-text("Agree"), button:has-text("Got It")',
-                    timeout=5000
-                )
-                if accept_button:
-                    await accept_button.click()
-                    logger.info("Accepted cookies")
-                    await self.take_screenshot("after_accepting_cookies")
-            except Exception as e:
-                logger.warning("Could not find cookie accept button, continuing...")
+            # Accept the cookie banner if it is already up; later ones are handled by the watchdog
+            if await self.interstitials.dismiss_now(self.page):
+                logger.info("Accepted cookies")
+                await self.take_screenshot("after_accepting_cookies")
             
             # Try direct navigation to menu
             menu_url = f"{self.base_url}/menu"
@@ -122,16 +134,12 @@ class HardeesTest:
             
             burger_found = False
             
-            for selector in burger_selectors:
-                try:
-                    if await self.page.locator(selector).count() > 0:
-                        logger.info(f"Found burger category: {selector}")
-                        await self.page.click(selector)
-                        burger_found = True
-                        break
-                except Exception as e:
-                    logger.debug(f"Burger category not found with selector {selector}: {str(e)}")
-                    continue
+            selector = await act_on_first(
+                self.page, self.site, 'burger_category', burger_selectors, self.page.click, cache=self.selectors
+            )
+            if selector:
+                logger.info(f"Clicked burger category: {selector}")
+                burger_found = True
                     
             if not burger_found:
                 logger.warning("Could not find burger category, continuing...")
@@ -151,13 +159,13 @@ class HardeesTest:
             burger_found = False
             
             # First try: Look for specific burger names
-            for burger_name in target_burgers:
-                burger_locator = f'a:has-text("{burger_name}"):visible'
-                if await self.page.locator(burger_locator).count() > 0:
-                    logger.info(f"Found burger: {burger_name}")
-                    await self.page.click(burger_locator)
-                    burger_found = True
-                    break
+            burger_locators = [f'a:has-text("{burger_name}"):visible' for burger_name in target_burgers]
+            burger_locator = await act_on_first(
+                self.page, self.site, 'burger_item', burger_locators, self.page.click, cache=self.selectors
+            )
+            if burger_locator:
+                logger.info(f"Clicked burger: {burger_locator}")
+                burger_found = True
             
             # Second try: Look for any burger in the menu grid
             if not burger_found:
@@ -190,12 +198,12 @@ class HardeesTest:
                     'button:has-text("Add to Cart"):visible'
                 ]
                 
-                for selector in burger_elements:
-                    if await self.page.locator(selector).count() > 0:
-                        logger.info(f"Clicking on element: {selector}")
-                        await self.page.click(selector)
-                        burger_found = True
-                        break
+                selector = await act_on_first(
+                    self.page, self.site, 'burger_element', burger_elements, self.page.click, cache=self.selectors
+                )
+                if selector:
+                    logger.info(f"Clicked on element: {selector}")
+                    burger_found = True
             
             if not burger_found:
                 logger.error("Could not find any burger items or add buttons")
@@ -223,16 +231,13 @@ class HardeesTest:
                 'button[type="submit"]'
             ]
             
-            for selector in add_buttons:
-                try:
-                    if await self.page.locator(selector).count() > 0:
-                        logger.info(f"Found add to cart button: {selector}")
-                        await self.page.click(selector, timeout=5000)
-                        logger.info("Clicked add to cart button")
-                        add_to_cart_found = True
-                        break
-                except Exception as e:
-                    logger.warning(f"Error with selector {selector}: {str(e)}")
+            selector = await act_on_first(
+                self.page, self.site, 'add_to_cart', add_buttons,
+                lambda candidate: self.page.click(candidate, timeout=5000), cache=self.selectors
+            )
+            if selector:
+                logger.info(f"Clicked add to cart button: {selector}")
+                add_to_cart_found = True
             
             if not add_to_cart_found:
                 logger.error("Could not find add to cart button")
@@ -263,14 +268,16 @@ class HardeesTest:
                 '.shopping-cart-count'
             ]
             
-            for selector in cart_selectors:
-                try:
-                    if await self.page.locator(selector).count() > 0:
-                        cart_count = await self.page.locator(selector).first.inner_text()
-                        logger.info(f"Items in cart: {cart_count}")
-                        return True
-                except Exception as e:
-                    logger.warning(f"Error checking cart with selector {selector}: {str(e)}")
+            cart_count = None
+
+            async def read_cart_count(candidate):
+                nonlocal cart_count
+                cart_count = await self.page.locator(candidate).first.inner_text()
+
+            selector = await act_on_first(self.page, self.site, 'cart_count', cart_selectors, read_cart_count, cache=self.selectors)
+            if selector:
+                logger.info(f"Items in cart: {cart_count}")
+                return True
             
             # If we got here, cart verification failed but we'll continue
             logger.warning("Could not verify cart count, but continuing...")
@@ -0,0 +1,120 @@
+"""
+Configurable screenshot policy shared by the test agents and Streamlit runners
+"""
+import logging
+import os
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_MODES = ('always', 'on_failure', 'every_n', 'diff_only', 'never')
+
+# Cheap fingerprint of what is currently in the viewport. Comparing it is far
+# cheaper than capturing and diffing pixels.
+VIEWPORT_SIGNATURE_SCRIPT = """
+() => {
+    const body = document.body;
+    return [
+        location.href,
+        Math.round(window.scrollX), Math.round(window.scrollY),
+        window.innerWidth, window.innerHeight,
+        document.title,
+        body ? body.getElementsByTagName('*').length : 0,
+        body ? body.innerText.length : 0,
+        document.activeElement ? document.activeElement.outerHTML.slice(0, 200) : ''
+    ].join('|');
+}
+"""
+
+
+@dataclass
+class ScreenshotPolicy:
+    """Decides when to capture a screenshot and in which format.
+
+    Modes:
+        always      capture after every step
+        on_failure  capture only when a step fails
+        every_n     capture every `every_n` steps (and on failure)
+        diff_only   capture only when the viewport changed since the last capture
+        never       never capture, not even on failure
+    """
+    mode: str = 'always'
+    every_n: int = 5
+    full_page: bool = True
+    image_type: str = 'png'  # 'png' or 'jpeg'
+    quality: int = 80  # jpeg only
+    _signatures: Any = field(default_factory=weakref.WeakKeyDictionary, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.mode not in SCREENSHOT_MODES:
+            raise ValueError(f"Unknown screenshot mode '{self.mode}', expected one of {SCREENSHOT_MODES}")
+        if self.image_type not in ('png', 'jpeg'):
+            raise ValueError(f"Unknown screenshot type '{self.image_type}', expected 'png' or 'jpeg'")
+
+    @classmethod
+    def from_env(cls) -> 'ScreenshotPolicy':
+        """Build a policy from SCREENSHOT_* environment variables"""
+        return cls(
+            mode=os.getenv('SCREENSHOT_MODE', 'always'),
+            every_n=int(os.getenv('SCREENSHOT_EVERY_N', '5')),
+            full_page=os.getenv('SCREENSHOT_FULL_PAGE', '1').lower() not in ('0', 'false', 'no'),
+            image_type=os.getenv('SCREENSHOT_FORMAT', 'png'),
+            quality=int(os.getenv('SCREENSHOT_QUALITY', '80'))
+        )
+
+    @property
+    def extension(self) -> str:
+        return 'jpg' if self.image_type == 'jpeg' else 'png'
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.image_type}"
+
+    def screenshot_options(self) -> Dict[str, Any]:
+        """Keyword arguments for page.screenshot()"""
+        options = {'full_page': self.full_page, 'type': self.image_type}
+        if self.image_type == 'jpeg':
+            options['quality'] = self.quality
+        return options
+
+    async def should_capture(self, page, step: Optional[int] = None, failed: bool = False) -> bool:
+        if self.mode == 'never':
+            return False
+        if failed or self.mode == 'always':
+            return True
+        if self.mode == 'every_n':
+            return step is not None and step % max(self.every_n, 1) == 0
+        if self.mode == 'diff_only':
+            try:
+                signature = await page.evaluate(VIEWPORT_SIGNATURE_SCRIPT)
+            except Exception as e:
+                logger.debug(f"Could not compute viewport signature: {e}")
+                return True
+            if self._signatures.get(page) == signature:
+                return False
+            self._signatures[page] = signature
+            return True
+        return False  # on_failure
+
+    async def capture(
+        self,
+        page,
+        step: Optional[int] = None,
+        failed: bool = False,
+        path: Optional[str] = None
+    ) -> Optional[bytes]:
+        """Capture a screenshot if the policy calls for one; returns None when skipped"""
+        with get_tracer().span('screenshot', mode=self.mode, failed=failed) as span:
+            if not await self.should_capture(page, step=step, failed=failed):
+                span.set(captured=False)
+                return None
+            options = self.screenshot_options()
+            if path:
+                options['path'] = path
+            data = await page.screenshot(**options)
+            span.set(captured=True, bytes=len(data))
+            return data
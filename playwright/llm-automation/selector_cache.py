@@ -0,0 +1,127 @@
+"""
+Selector resolution cache learned from successful runs
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SELECTOR_CACHE_PATH = os.getenv('SELECTOR_CACHE_PATH', '.selector_cache/selectors.json')
+
+
+def site_key(url: str) -> str:
+    """Host used to group selectors ('https://www.hardees.com/menu' -> 'hardees.com')"""
+    host = urlparse(url if '://' in url else f'https://{url}').netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class SelectorCache:
+    """Remembers which candidate selector matched for a site and intent.
+
+    Entries are keyed by site and intent (e.g. ``'hardees.com'`` /
+    ``'add_to_cart'``) and hold per-selector hit/miss counts plus the last
+    winner. ``order()`` puts the last winner first and sorts the remaining
+    candidates by hit rate; candidates never seen keep their original order.
+    """
+
+    def __init__(self, path: str = DEFAULT_SELECTOR_CACHE_PATH, autosave: bool = True):
+        self.path = Path(path)
+        self.autosave = autosave
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, dict]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, dict]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable selector cache {self.path}: {e}")
+            return {}
+
+    def save(self):
+        with self._lock:
+            payload = json.dumps(self._data, indent=2, sort_keys=True)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(payload, encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save selector cache: {e}")
+
+    def _entry(self, site: str, intent: str) -> dict:
+        return self._data.setdefault(site, {}).setdefault(intent, {'last': None, 'stats': {}})
+
+    def order(self, site: str, intent: str, candidates: Sequence[str]) -> List[str]:
+        """Candidates reordered so the most likely winner is tried first"""
+        with self._lock:
+            entry = self._data.get(site, {}).get(intent)
+            if not entry:
+                return list(candidates)
+            stats = entry['stats']
+            last = entry['last']
+
+        def rank(item):
+            index, selector = item
+            hits, misses = stats.get(selector, (0, 0))
+            seen = hits + misses
+            # Unseen candidates sit between proven winners and known losers
+            rate = hits / seen if seen else 0.5
+            return (selector != last, -rate, index)
+
+        return [selector for _, selector in sorted(enumerate(candidates), key=rank)]
+
+    def record(self, site: str, intent: str, winner: str, tried: Iterable[str] = ()):
+        """Count a hit for `winner` and a miss for every candidate tried before it"""
+        with self._lock:
+            entry = self._entry(site, intent)
+            for selector in tried:
+                if selector != winner:
+                    entry['stats'].setdefault(selector, [0, 0])[1] += 1
+            entry['stats'].setdefault(winner, [0, 0])[0] += 1
+            entry['last'] = winner
+        if self.autosave:
+            self.save()
+
+    def record_failure(self, site: str, intent: str, tried: Iterable[str]):
+        """No candidate matched; count a miss for each and forget the last winner"""
+        with self._lock:
+            entry = self._entry(site, intent)
+            for selector in tried:
+                entry['stats'].setdefault(selector, [0, 0])[1] += 1
+            entry['last'] = None
+        if self.autosave:
+            self.save()
+
+    def winner(self, site: str, intent: str) -> Optional[str]:
+        with self._lock:
+            return self._data.get(site, {}).get(intent, {}).get('last')
+
+    def clear(self, site: Optional[str] = None):
+        with self._lock:
+            if site is None:
+                self._data.clear()
+            else:
+                self._data.pop(site, None)
+        if self.autosave:
+            self.save()
+
+
+_cache: Optional[SelectorCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_selector_cache() -> SelectorCache:
+    """Process-wide selector cache stored at $SELECTOR_CACHE_PATH"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SelectorCache()
+        return _cache
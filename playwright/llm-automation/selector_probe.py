@@ -0,0 +1,202 @@
+"""
+Batched "first matching of N selectors" probing
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from selector_cache import SelectorCache, get_selector_cache
+
+logger = logging.getLogger(__name__)
+
+Match = Tuple[str, int]
+
+
+# Counts every candidate in one round trip. Plain CSS is matched with querySelectorAll;
+# trailing :has-text()/:visible pseudo-classes and text= selectors are emulated. Anything
+# else (other engines, >> chains, invalid CSS) comes back as null for Playwright to count.
+PROBE_JS = """
+([selectors, visibleOnly]) => {
+    const norm = (text) => (text || '').replace(/\\s+/g, ' ').trim();
+    const textOf = (el) => norm(el.innerText || el.textContent);
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+    const unquote = (text) => /^(["']).*\\1$/s.test(text) ? text.slice(1, -1) : text;
+    const query = (selector) => {
+        if (selector.includes('>>')) throw new Error('selector chain');
+        const text = selector.match(/^text=([^/].*)$/s);
+        if (text) {
+            const wanted = unquote(text[1].trim());
+            const exact = wanted !== text[1].trim();
+            const hit = (el) => exact ? textOf(el) === norm(wanted) : textOf(el).toLowerCase().includes(norm(wanted).toLowerCase());
+            // The innermost elements holding the text, like Playwright's text engine
+            return [...document.body.querySelectorAll('*')].filter((el) => hit(el) && ![...el.children].some(hit));
+        }
+        const filters = [];
+        let css = selector.trim();
+        for (;;) {
+            const visible = css.match(/^(.*):visible$/s);
+            const hasText = css.match(/^(.*):has-text\\((["'])((?:(?!\\2).)*)\\2\\)$/s);
+            if (visible) {
+                filters.push(isVisible);
+                css = visible[1];
+            } else if (hasText) {
+                const wanted = norm(hasText[3]).toLowerCase();
+                filters.push((el) => textOf(el).toLowerCase().includes(wanted));
+                css = hasText[1];
+            } else {
+                break;
+            }
+        }
+        // A trailing filter would wrongly apply to every member of a selector list
+        if (filters.length && css.includes(',')) throw new Error('selector list');
+        let elements = [...document.querySelectorAll(css || '*')];
+        for (const filter of filters) elements = elements.filter(filter);
+        return elements;
+    };
+    return selectors.map((selector) => {
+        try {
+            const elements = query(selector);
+            return (visibleOnly ? elements.filter(isVisible) : elements).length;
+        } catch (e) {
+            return null;
+        }
+    });
+}
+"""
+
+
+def _probe_locator(page, selector: str, visible: bool):
+    return page.locator(f"{selector} >> visible=true" if visible else selector)
+
+
+async def _count_all(page, selectors: Sequence[str], visible: bool) -> List[int]:
+    """Match counts for every selector, issued concurrently; invalid selectors count as 0"""
+    results = await asyncio.gather(
+        *(_probe_locator(page, selector, visible).count() for selector in selectors),
+        return_exceptions=True
+    )
+    counts = []
+    for selector, result in zip(selectors, results):
+        if isinstance(result, BaseException):
+            # e.g. jQuery-only syntax such as :contains()
+            logger.debug(f"Skipping selector {selector}: {result}")
+            counts.append(-1)
+        else:
+            counts.append(result)
+    return counts
+
+
+async def _first_match(page, selectors: Sequence[str], visible: bool) -> Tuple[Optional[Match], List[int]]:
+    """The first matching (selector, index) and per-selector counts (-1 invalid, None not probed)"""
+    try:
+        counts = await page.evaluate(PROBE_JS, [list(selectors), visible])
+    except Exception as e:
+        logger.debug(f"In-page probe failed, counting with Playwright: {e}")
+        counts = [None] * len(selectors)
+    first_hit = next((index for index, count in enumerate(counts) if count), len(selectors))
+    # Only candidates the page could not evaluate and that outrank the in-page winner need a Playwright count
+    pending = [index for index in range(first_hit) if counts[index] is None]
+    if pending:
+        for index, count in zip(pending, await _count_all(page, [selectors[i] for i in pending], visible)):
+            counts[index] = count
+    for index, count in enumerate(counts):
+        if count is not None and count > 0:
+            return (selectors[index], index), counts
+    return None, counts
+
+
+async def first_matching(
+    page,
+    selectors: Sequence[str],
+    timeout: float = 0,
+    visible: bool = False
+) -> Optional[Match]:
+    """Return (selector, index) of the first selector in `selectors` that matches, or None.
+
+    All candidates are counted in a single in-page call instead of one
+    round trip each; only selectors the page cannot evaluate itself (other
+    selector engines, ``>>`` chains) are counted by Playwright. With a
+    `timeout` (ms), a single wait on the union of the valid candidates
+    replaces a per-candidate wait, so the worst case is `timeout` in total
+    rather than `timeout` per selector.
+    """
+    if not selectors:
+        return None
+
+    match, counts = await _first_match(page, selectors, visible)
+    if match is not None:
+        return match
+
+    valid = [selector for selector, count in zip(selectors, counts) if count is None or count >= 0]
+    if not timeout or not valid:
+        return None
+
+    combined = _probe_locator(page, valid[0], visible)
+    for selector in valid[1:]:
+        combined = combined.or_(_probe_locator(page, selector, visible))
+    try:
+        await combined.first.wait_for(state='attached', timeout=timeout)
+    except Exception:
+        return None
+
+    match, _ = await _first_match(page, selectors, visible)
+    return match
+
+
+async def resolve_selector(
+    page,
+    site: str,
+    intent: str,
+    candidates: Sequence[str],
+    timeout: float = 0,
+    visible: bool = False,
+    cache: Optional[SelectorCache] = None
+) -> Optional[str]:
+    """first_matching() over candidates ordered by the selector cache, recording the outcome"""
+    cache = cache or get_selector_cache()
+    ordered = cache.order(site, intent, candidates)
+    match = await first_matching(page, ordered, timeout=timeout, visible=visible)
+    if match is None:
+        cache.record_failure(site, intent, ordered)
+        return None
+    selector, index = match
+    cache.record(site, intent, selector, ordered[:index + 1])
+    return selector
+
+
+async def act_on_first(
+    page,
+    site: str,
+    intent: str,
+    candidates: Sequence[str],
+    action: Callable[[str], Awaitable[Any]],
+    timeout: float = 0,
+    visible: bool = False,
+    cache: Optional[SelectorCache] = None
+) -> Optional[str]:
+    """Run `action(selector)` on the first matching candidate, falling through to later ones if it raises.
+
+    Unlike resolve_selector(), a selector is only recorded as the winner
+    once its action (click, fill, read) succeeded.
+    """
+    cache = cache or get_selector_cache()
+    ordered = cache.order(site, intent, candidates)
+    remaining = ordered
+    while remaining:
+        match = await first_matching(page, remaining, timeout=timeout, visible=visible)
+        if match is None:
+            break
+        selector, index = match
+        try:
+            await action(selector)
+        except Exception as e:
+            logger.debug(f"Action on {selector} for {intent} failed, trying the next candidate: {e}")
+            remaining = remaining[index + 1:]
+            continue
+        cache.record(site, intent, selector, ordered[:ordered.index(selector) + 1])
+        return selector
+    cache.record_failure(site, intent, ordered)
+    return None
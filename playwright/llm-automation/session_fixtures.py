@@ -0,0 +1,168 @@
+"""
+Log in once per suite and reuse the authenticated storage_state in every context
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_DIR = os.getenv('SESSION_DIR', '.sessions')
+DEFAULT_SESSION_MAX_AGE = int(os.getenv('SESSION_MAX_AGE', '1800'))
+# Treat cookies that expire within this many seconds as already expired
+EXPIRY_MARGIN = 60
+
+LoginFunction = Callable[[object], Awaitable[None]]
+
+
+class SessionFixture:
+    """A saved login for one site, refreshed when it goes stale.
+
+    ``login(page)`` drives the UI login once; the resulting cookies and
+    local storage are saved to ``<session_dir>/<name>.json``. The saved
+    state is stale when the file is older than `max_age` seconds or when
+    one of the `auth_cookies` (all cookies, if none are named) is missing
+    or about to expire; the next ``new_context()``/``ensure()`` then logs
+    in again. Concurrent callers share a single refresh.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        login: LoginFunction,
+        auth_cookies: Sequence[str] = (),
+        max_age: int = DEFAULT_SESSION_MAX_AGE,
+        session_dir: str = DEFAULT_SESSION_DIR
+    ):
+        self.name = name
+        self.login = login
+        self.auth_cookies = tuple(auth_cookies)
+        self.max_age = max_age
+        self.path = Path(session_dir) / f"{name}.json"
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable session state {self.path}: {e}")
+            return None
+
+    def is_valid(self, now: Optional[float] = None) -> bool:
+        """Whether the saved state can be used without logging in again"""
+        now = now or time.time()
+        try:
+            if now - self.path.stat().st_mtime > self.max_age:
+                return False
+        except FileNotFoundError:
+            return False
+        state = self._load()
+        if state is None:
+            return False
+
+        cookies = {cookie['name']: cookie for cookie in state.get('cookies', [])}
+        names = self.auth_cookies or tuple(cookies)
+        for name in names:
+            cookie = cookies.get(name)
+            if cookie is None:
+                return False
+            expires = cookie.get('expires', -1)
+            # -1 marks a session cookie, which lives as long as the state file
+            if expires != -1 and expires <= now + EXPIRY_MARGIN:
+                return False
+        return True
+
+    def invalidate(self):
+        """Forget the saved state, e.g. after the site rejected it"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    async def save(self, context):
+        """Save `context`'s current cookies and local storage as this session"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        await context.storage_state(path=str(tmp_path))
+        os.replace(tmp_path, self.path)
+
+    async def _login_in(self, context):
+        page = await context.new_page()
+        try:
+            logger.info(f"Logging in for session '{self.name}'")
+            await self.login(page)
+            await self.save(context)
+        finally:
+            await page.close()
+
+    async def storage_state(self, browser) -> str:
+        """Path to a fresh storage_state file, logging in on a throwaway context if needed"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.is_valid():
+                context = await browser.new_context()
+                try:
+                    await self._login_in(context)
+                finally:
+                    await context.close()
+        return str(self.path)
+
+    async def new_context(self, browser, **context_options):
+        """A new context that starts out logged in"""
+        state = await self.storage_state(browser)
+        return await browser.new_context(storage_state=state, **context_options)
+
+    async def ensure(self, context) -> bool:
+        """Make an existing (e.g. persistent) context logged in; returns True if a UI login was needed.
+
+        Valid saved state is injected directly: cookies via add_cookies()
+        and local storage via an init script for its origin.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.is_valid():
+                await self._login_in(context)
+                return True
+            state = self._load() or {}
+        if state.get('cookies'):
+            await context.add_cookies(state['cookies'])
+        for origin in state.get('origins', []):
+            items = {item['name']: item['value'] for item in origin.get('localStorage', [])}
+            if items:
+                await context.add_init_script(
+                    f"if (location.origin === {json.dumps(origin['origin'])}) {{"
+                    f" for (const [k, v] of Object.entries({json.dumps(items)})) localStorage.setItem(k, v); }}"
+                )
+        return False
+
+
+# Known sites
+
+SAUCEDEMO_URL = 'https://www.saucedemo.com'
+
+
+async def login_saucedemo(page, username: str = 'standard_user', password: str = 'secret_sauce'):
+    await page.goto(SAUCEDEMO_URL, timeout=60000)
+    await page.fill("input[data-test='username']", username)
+    await page.fill("input[data-test='password']", password)
+    await page.click("input[data-test='login-button']")
+    await page.wait_for_selector('.inventory_list', state='visible', timeout=10000)
+
+
+_fixtures: Dict[str, SessionFixture] = {}
+
+
+def saucedemo_session() -> SessionFixture:
+    """Shared saucedemo.com login; its session-username cookie lasts ten minutes"""
+    if 'saucedemo' not in _fixtures:
+        _fixtures['saucedemo'] = SessionFixture('saucedemo', login_saucedemo, auth_cookies=('session-username',))
+    return _fixtures['saucedemo']
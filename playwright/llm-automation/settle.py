@@ -0,0 +1,140 @@
+"""
+Event-driven page settling used between test actions instead of fixed sleeps
+"""
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Resolves once no DOM mutation has been seen for `quietMs` (or after `timeoutMs`),
+# then waits for two animation frames so pending layout/paint has been applied.
+DOM_QUIET_SCRIPT = """
+({ quietMs, timeoutMs, frames }) => new Promise(resolve => {
+    let quietTimer = null;
+    let hardTimer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish('quiet'), quietMs);
+    });
+    const afterFrames = (reason) => {
+        if (!frames) return resolve(reason);
+        // rAF is throttled in background tabs; never wait on it for long
+        const fallback = setTimeout(() => resolve(reason), 100);
+        requestAnimationFrame(() => requestAnimationFrame(() => {
+            clearTimeout(fallback);
+            resolve(reason);
+        }));
+    };
+    const finish = (reason) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(hardTimer);
+        afterFrames(reason);
+    };
+    observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+    quietTimer = setTimeout(() => finish('quiet'), quietMs);
+    hardTimer = setTimeout(() => finish('timeout'), timeoutMs);
+})
+"""
+
+
+# Resource types that stay open for the life of the page and would never let the count reach zero
+LONG_LIVED_RESOURCE_TYPES = frozenset({'eventsource', 'websocket', 'ping', 'beacon'})
+
+
+class _NetworkTracker:
+    """Tracks in-flight requests on a page, ignoring long-lived connections"""
+
+    def __init__(self, page):
+        self._inflight: Dict[object, float] = {}
+        self.last_activity = time.monotonic()
+        page.on('request', self._on_start)
+        page.on('requestfinished', self._on_end)
+        page.on('requestfailed', self._on_end)
+
+    def _on_start(self, request):
+        if request.resource_type in LONG_LIVED_RESOURCE_TYPES:
+            return
+        self._inflight[request] = time.monotonic()
+        self.last_activity = time.monotonic()
+
+    def _on_end(self, request):
+        if self._inflight.pop(request, None) is not None:
+            self.last_activity = time.monotonic()
+
+    def busy(self, max_age: float) -> int:
+        """Requests in flight that started less than `max_age` seconds ago.
+
+        Older ones are treated as long-polls or beacons that will not finish
+        because of the step that was just performed.
+        """
+        cutoff = time.monotonic() - max_age
+        return sum(1 for started in self._inflight.values() if started >= cutoff)
+
+
+@dataclass
+class SettleStrategy:
+    """Waits only as long as the page is still changing, within configurable budgets (ms)"""
+    navigation_timeout: int = 10000
+    network_quiet_ms: int = 300
+    network_timeout: int = 1500
+    long_request_ms: int = 1000  # in-flight requests older than this no longer hold the page
+    dom_quiet_ms: int = 150
+    dom_timeout: int = 2000
+    animation_frames: bool = True
+    enabled: bool = True
+
+    def __post_init__(self):
+        self._trackers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def attach(self, page):
+        """Start tracking network activity on a page; call before the first action"""
+        if page not in self._trackers:
+            self._trackers[page] = _NetworkTracker(page)
+
+    async def settle(self, page, previous_url: Optional[str] = None) -> float:
+        """Wait until navigation, network and DOM activity have quiesced; returns seconds waited"""
+        if not self.enabled:
+            return 0.0
+
+        start = time.monotonic()
+        if previous_url is not None and page.url != previous_url:
+            try:
+                await page.wait_for_load_state('domcontentloaded', timeout=self.navigation_timeout)
+            except Exception as e:
+                logger.debug(f"Navigation did not reach domcontentloaded: {e}")
+
+        await asyncio.gather(self._wait_network_quiet(page), self._wait_dom_quiet(page))
+        return time.monotonic() - start
+
+    async def _wait_network_quiet(self, page):
+        tracker = self._trackers.get(page)
+        if tracker is None:
+            return
+        deadline = time.monotonic() + self.network_timeout / 1000
+        quiet_for = self.network_quiet_ms / 1000
+        max_age = self.long_request_ms / 1000
+        while time.monotonic() < deadline:
+            if tracker.busy(max_age) == 0 and time.monotonic() - tracker.last_activity >= quiet_for:
+                return
+            await asyncio.sleep(0.05)
+        logger.debug(f"Network still busy after {self.network_timeout}ms ({tracker.busy(max_age)} in flight)")
+
+    async def _wait_dom_quiet(self, page):
+        try:
+            await page.evaluate(DOM_QUIET_SCRIPT, {
+                'quietMs': self.dom_quiet_ms,
+                'timeoutMs': self.dom_timeout,
+                'frames': self.animation_frames,
+            })
+        except Exception as e:
+            # The action triggered a navigation and destroyed the execution context
+            logger.debug(f"DOM quiescence check interrupted: {e}")
+            try:
+                await page.wait_for_load_state('domcontentloaded', timeout=self.navigation_timeout)
+            except Exception:
+                pass
@@ -7,7 +7,11 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from screenshot_policy import ScreenshotPolicy
+from artifact_store import ArtifactHandle, get_artifact_store
+from session_fixtures import SessionFixture
 
 # Configure logging
 logging.basicConfig(
@@ -18,10 +22,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class TestResult(BaseModel):
-    """Test execution result"""
+    """Test execution result; screenshots are lazy artifact handles, not inline bytes"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     success: bool
     message: str
-    screenshot: Optional[bytes] = None
+    screenshot: Optional[ArtifactHandle] = None
     error: Optional[str] = None
     metadata: Dict[str, Any] = {}
 
@@ -33,23 +39,33 @@ class SimpleTestAgent:
         page,
         base_url: Optional[str] = None,
         screenshots_dir: str = "screenshots",
-        debug: bool = False
+        debug: bool = False,
+        screenshot_policy: Optional[ScreenshotPolicy] = None,
+        session: Optional[SessionFixture] = None
     ):
         self.page = page
+        self.session = session  # set when the page's context was created from the session's storage_state
         self.base_url = base_url.rstrip('/') if base_url else None
         self.screenshots_dir = Path(screenshots_dir)
         self.debug = debug
+        self.screenshot_policy = screenshot_policy or ScreenshotPolicy.from_env()
+        self.artifact_store = get_artifact_store()
+        self.step_number = 0
         
         # Create screenshots directory if it doesn't exist
         self.screenshots_dir.mkdir(parents=True, exist_ok=True)
     
-    async def _take_screenshot(self) -> bytes:
-        """Take a screenshot and return as bytes"""
+    async def _take_screenshot(self, failed: bool = False) -> Optional[ArtifactHandle]:
+        """Take a screenshot if the screenshot policy calls for one and store it as an artifact"""
+        self.step_number += 1
         try:
-            return await self.page.screenshot(full_page=True)
+            screenshot = await self.screenshot_policy.capture(self.page, step=self.step_number, failed=failed)
+            if not screenshot:
+                return None
+            return await self.artifact_store.store(screenshot, self.screenshot_policy.extension)
         except Exception as e:
             logger.error(f"Failed to take screenshot: {str(e)}")
-            return b''
+            return None
     
     async def navigate(self, path: str = "") -> TestResult:
         """Navigate to a URL"""
@@ -70,7 +86,7 @@ class SimpleTestAgent:
                 success=False,
                 message=f"Failed to navigate to {path}",
                 error=str(e),
-                screenshot=await self._take_screenshot()
+                screenshot=await self._take_screenshot(failed=True)
             )
     
     async def click(self, selector: str) -> TestResult:
@@ -96,7 +112,7 @@ class SimpleTestAgent:
                 success=False,
                 message=f"Failed to click on {selector}",
                 error=str(e),
-                screenshot=await self._take_screenshot()
+                screenshot=await self._take_screenshot(failed=True)
             )
     
     async def fill(self, selector: str, value: str) -> TestResult:
@@ -116,9 +132,31 @@ class SimpleTestAgent:
                 success=False,
                 message=f"Failed to fill {selector}",
                 error=str(e),
-                screenshot=await self._take_screenshot()
+                screenshot=await self._take_screenshot(failed=True)
             )
     
+    async def _ensure_logged_in(self):
+        """Get to the products page, reusing the stored session before falling back to a UI login"""
+        if self.session is not None:
+            try:
+                await self.page.goto(f"{self.base_url}/inventory.html", timeout=60000)
+                await self.page.wait_for_selector(".inventory_list", state="visible", timeout=5000)
+                logger.info("Reused stored session, skipping UI login")
+                return
+            except Exception as e:
+                logger.info(f"Stored session rejected ({e}); logging in through the UI")
+                self.session.invalidate()
+                await self.page.goto(self.base_url, timeout=60000)
+        
+        await self.fill("input[data-test='username']", "standard_user")
+        await self.fill("input[data-test='password']", "secret_sauce")
+        await self.click("input[data-test='login-button']")
+        
+        # Wait for products to load
+        await self.page.wait_for_selector(".inventory_item", state="visible")
+        if self.session is not None:
+            await self.session.save(self.page.context)
+    
     async def execute_test_plan(self, test_description: str) -> List[TestResult]:
         """Execute a test plan from a natural language description"""
         results = []
@@ -180,18 +218,13 @@ class SimpleTestAgent:
                             success=False,
                             message="Failed to verify successful login",
                             error=str(e),
-                            screenshot=await self._take_screenshot()
+                            screenshot=await self._take_screenshot(failed=True)
                         ))
             
             # Example: Add to cart test
             elif "add to cart" in test_description.lower():
-                # First, login
-                await self.fill("input[data-test='username']", "standard_user")
-                await self.fill("input[data-test='password']", "secret_sauce")
-                await self.click("input[data-test='login-button']")
-                
-                # Wait for products to load
-                await self.page.wait_for_selector(".inventory_item", state="visible")
+                # First, login (or reuse the stored session)
+                await self._ensure_logged_in()
                 
                 # Click first add to cart button
                 add_to_cart_result = await self.click("button[data-test^='add-to-cart']")
@@ -216,7 +249,7 @@ class SimpleTestAgent:
                             success=False,
                             message="Failed to verify item was added to cart",
                             error=str(e),
-                            screenshot=await self._take_screenshot()
+                            screenshot=await self._take_screenshot(failed=True)
                         ))
             
             # Default case: Just navigate to the base URL
@@ -230,7 +263,7 @@ class SimpleTestAgent:
                 success=False,
                 message="Unexpected error during test execution",
                 error=str(e),
-                screenshot=await self._take_screenshot()
+                screenshot=await self._take_screenshot(failed=True)
             ))
         
         return results
@@ -242,10 +275,12 @@ class SimpleTestAgent:
 # Example usage
 async def example():
     from playwright.async_api import async_playwright
+    from har_replay import HarSession
     
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
         context = await browser.new_context()
+        await HarSession.from_env('saucedemo-example').apply(context)
         page = await context.new_page()
         
         agent = SimpleTestAgent(
@@ -275,6 +310,7 @@ async def example():
         
         finally:
             await agent.close()
+            await context.close()  # writes the HAR when recording
             await browser.close()
 
 if __name__ == "__main__":
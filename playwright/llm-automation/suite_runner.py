@@ -0,0 +1,336 @@
+"""
+Parallel multi-scenario runner backed by a bounded pool of browser contexts
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from ai_test_agent import AITestAgent, TestAction, TestExecutor
+from llm_providers import close_async_openai_client
+from locator_repair import LocatorRepairer, apply_repairs
+from network_profiles import NetworkBlocker
+from plan_compiler import PlanCompiler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAUNCH_ARGS = [
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-gpu',
+    '--no-sandbox',
+]
+
+
+@dataclass
+class Scenario:
+    """A single natural-language scenario in a suite"""
+    name: str
+    description: str
+    target_url: Optional[str] = None
+
+
+@dataclass
+class ScenarioResult:
+    """Outcome of one scenario"""
+    name: str
+    status: str  # 'passed', 'failed' or 'error'
+    steps: List[Dict[str, Any]] = field(default_factory=list)
+    duration: float = 0.0
+    error: Optional[str] = None
+    blocked: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    plan_source: str = 'llm'  # 'compiled' when a compiled script passed without asking the model
+
+
+class BrowserContextPool:
+    """One Chromium process handing out isolated contexts, at most `size` at a time"""
+
+    def __init__(
+        self,
+        size: int = 4,
+        headless: bool = True,
+        context_options: Optional[Dict[str, Any]] = None,
+        launch_args: Optional[List[str]] = None
+    ):
+        self.size = size
+        self.headless = headless
+        self.context_options = context_options or {
+            'viewport': {'width': 1280, 'height': 800},
+            'ignore_https_errors': True,
+        }
+        self.launch_args = launch_args or DEFAULT_LAUNCH_ARGS
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def start(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        if self.browser is None or not self.browser.is_connected():
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=self.launch_args
+            )
+
+    async def close(self):
+        try:
+            if self.browser:
+                await self.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing browser: {e}")
+        finally:
+            self.browser = None
+        try:
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception as e:
+            logger.warning(f"Error stopping playwright: {e}")
+        finally:
+            self.playwright = None
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """Borrow a fresh isolated context; blocks while `size` contexts are in use"""
+        async with self._semaphore:
+            await self.start()
+            context = await self.browser.new_context(**self.context_options)
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Error closing context: {e}")
+
+    async def __aenter__(self) -> 'BrowserContextPool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class SuiteRunner:
+    """Runs a list of scenarios concurrently on a shared browser"""
+
+    def __init__(
+        self,
+        agent: Optional[AITestAgent] = None,
+        workers: int = 4,
+        max_concurrent_plans: int = 4,
+        headless: bool = True,
+        context_options: Optional[Dict[str, Any]] = None,
+        compiler: Optional[PlanCompiler] = None,
+        repairer: Optional[LocatorRepairer] = None
+    ):
+        self.agent = agent or AITestAgent()
+        # Passing plans are compiled and replayed on later runs; None always asks the agent
+        self.compiler = compiler
+        self.repairer = repairer or LocatorRepairer.from_env()
+        if self.repairer.provider is None:
+            self.repairer.provider = self.agent.provider
+        self.workers = workers
+        self.headless = headless
+        self.context_options = context_options
+        self._plan_semaphore = asyncio.Semaphore(max_concurrent_plans)
+
+    async def run(
+        self,
+        scenarios: List[Scenario],
+        progress_callback: Optional[Callable[[ScenarioResult, int, int], None]] = None
+    ) -> List[ScenarioResult]:
+        """Run every scenario and return results in input order"""
+        total = len(scenarios)
+        completed = 0
+
+        async with BrowserContextPool(
+            size=self.workers,
+            headless=self.headless,
+            context_options=self.context_options
+        ) as pool:
+            async def run_one(scenario: Scenario) -> ScenarioResult:
+                nonlocal completed
+                result = await self._run_scenario(pool, scenario)
+                completed += 1
+                if progress_callback:
+                    progress_callback(result, completed, total)
+                return result
+
+            return await asyncio.gather(*(run_one(s) for s in scenarios))
+
+    async def _execute(self, pool: BrowserContextPool, run_steps) -> tuple:
+        """Run `run_steps(page)` in a fresh pooled context; returns (steps, blocked requests)"""
+        network = NetworkBlocker.from_env()
+        async with pool.context() as context:
+            await network.apply(context)
+            page = await context.new_page()
+            steps = await run_steps(page)
+        return steps, network.report()
+
+    async def _execute_plan(self, pool: BrowserContextPool, scenario: Scenario, actions: List[TestAction]) -> tuple:
+        """Execute `actions` with locator repair; returns (steps, blocked requests, actions with repairs applied)"""
+        steps, blocked = await self._execute(
+            pool, lambda page: TestExecutor(page, repairer=self.repairer).execute_test(actions)
+        )
+        if any(step.get('repaired_selector') for step in steps):
+            # Keep the fix so the next run doesn't break on the same selector
+            actions = apply_repairs(actions, steps)
+            self.agent.update_cached_plan(scenario.description, actions, scenario.target_url)
+        return steps, blocked, actions
+
+    async def _run_scenario(self, pool: BrowserContextPool, scenario: Scenario) -> ScenarioResult:
+        start_time = time.time()
+        try:
+            # A compiled script needs no model call; the LLM is only the fallback
+            compiled = self.compiler.load(scenario.description, scenario.target_url) if self.compiler else None
+            actions = None
+            if compiled is not None:
+                steps, blocked = await self._execute(pool, compiled.run)
+                if len(steps) == len(compiled.actions) and all(step['status'] == 'passed' for step in steps):
+                    return ScenarioResult(
+                        name=scenario.name,
+                        status='passed',
+                        steps=steps,
+                        duration=time.time() - start_time,
+                        blocked=blocked,
+                        plan_source='compiled'
+                    )
+                error = next((step['error'] for step in steps if step['error']), None)
+                if self.repairer.enabled:
+                    # Rerun the same plan and repair only the failing step instead of replanning
+                    logger.warning(f"Compiled plan {compiled.path} failed for '{scenario.name}' ({error}); repairing")
+                    actions = [TestAction(**action) for action in compiled.actions]
+                else:
+                    logger.warning(f"Compiled plan {compiled.path} failed for '{scenario.name}' ({error}); replanning")
+                    # The cached plan is most likely the one that was compiled
+                    self.agent.invalidate_cached_plan(scenario.description, scenario.target_url)
+
+            steps, blocked, failed = [], {}, True
+            if actions is not None:
+                steps, blocked, actions = await self._execute_plan(pool, scenario, actions)
+                failed = any(step['status'] != 'passed' for step in steps)
+                if failed:
+                    logger.warning(f"Repaired plan still fails for '{scenario.name}'; replanning")
+                    self.agent.invalidate_cached_plan(scenario.description, scenario.target_url)
+
+            if failed:
+                # Plan outside the context pool so no browser slot idles on the LLM
+                async with self._plan_semaphore:
+                    actions = await self.agent.generate_test_actions(
+                        scenario.description,
+                        target_url=scenario.target_url
+                    )
+                if not actions:
+                    if self.compiler:
+                        self.compiler.invalidate(scenario.description, scenario.target_url)
+                    return ScenarioResult(
+                        name=scenario.name,
+                        status='error',
+                        duration=time.time() - start_time,
+                        error='Failed to generate test actions'
+                    )
+                steps, blocked, actions = await self._execute_plan(pool, scenario, actions)
+                failed = any(step['status'] != 'passed' for step in steps)
+
+            if failed:
+                # Neither the plan cache nor a compiled script may replay a plan that didn't pass
+                self.agent.invalidate_cached_plan(scenario.description, scenario.target_url)
+                if self.compiler:
+                    self.compiler.invalidate(scenario.description, scenario.target_url)
+            elif self.compiler:
+                try:
+                    self.compiler.compile(scenario.description, actions, scenario.target_url)
+                except Exception as e:
+                    logger.warning(f"Could not compile the plan for '{scenario.name}': {e}")
+            return ScenarioResult(
+                name=scenario.name,
+                status='failed' if failed else 'passed',
+                steps=steps,
+                duration=time.time() - start_time,
+                error=next((step['error'] for step in steps if step['error']), None),
+                blocked=blocked
+            )
+        except Exception as e:
+            logger.error(f"Scenario '{scenario.name}' crashed: {e}")
+            self.agent.invalidate_cached_plan(scenario.description, scenario.target_url)
+            return ScenarioResult(
+                name=scenario.name,
+                status='error',
+                duration=time.time() - start_time,
+                error=str(e)
+            )
+
+
+def load_scenarios(path: str) -> List[Scenario]:
+    """Load scenarios from a JSON list of {name, description, target_url} objects"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [
+        Scenario(
+            name=item.get('name') or f"Scenario {i}",
+            description=item['description'],
+            target_url=item.get('target_url')
+        )
+        for i, item in enumerate(data, 1)
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run a suite of natural-language scenarios in parallel")
+    parser.add_argument('scenarios', help="JSON file with a list of scenarios")
+    parser.add_argument('--workers', type=int, default=4, help="Maximum concurrent browser contexts")
+    parser.add_argument('--plan-concurrency', type=int, default=4, help="Maximum concurrent LLM plan requests")
+    parser.add_argument('--headed', action='store_true', help="Show the browser window")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--no-compiled', action='store_true', help="Always plan with the LLM; don't run or write compiled plans")
+    parser.add_argument('--spec-ts', action='store_true', help="Also compile passing plans to Playwright Test .spec.ts files")
+    parser.add_argument('--repair', action='store_true', help="Repair broken selectors with one LLM call per failing step")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    scenarios = load_scenarios(args.scenarios)
+    compiler = None
+    if not args.no_compiled:
+        compiler = PlanCompiler.from_env()
+        compiler.typescript = compiler.typescript or args.spec_ts
+    repairer = LocatorRepairer.from_env()
+    repairer.enabled = repairer.enabled or args.repair
+    runner = SuiteRunner(
+        workers=args.workers,
+        max_concurrent_plans=args.plan_concurrency,
+        headless=not args.headed,
+        compiler=compiler,
+        repairer=repairer
+    )
+
+    def report(result: ScenarioResult, completed: int, total: int):
+        status = "✅ PASS" if result.status == 'passed' else "❌ FAIL"
+        print(f"[{completed}/{total}] {status} - {result.name} ({result.duration:.1f}s)")
+
+    suite_start = time.time()
+    try:
+        results = await runner.run(scenarios, progress_callback=report)
+    finally:
+        await close_async_openai_client()
+    passed = sum(1 for r in results if r.status == 'passed')
+    compiled = sum(1 for r in results if r.plan_source == 'compiled')
+    print(f"\n{passed}/{len(results)} scenarios passed in {time.time() - suite_start:.1f}s "
+          f"({compiled} from compiled plans, {len(results) - compiled} planned by the LLM)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump([asdict(r) for r in results], f, indent=2, default=str)
+
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
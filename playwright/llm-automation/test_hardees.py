@@ -11,6 +11,11 @@ from typing import List, Dict, Optional, Tuple, Any
 
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext, ElementHandle, TimeoutError as PlaywrightTimeoutError
 from ai_test_agent import TestAction, AITestAgent, TestExecutor
+from selector_cache import get_selector_cache, site_key
+from selector_probe import act_on_first
+from interstitials import InterstitialWatchdog
+from network_profiles import NetworkBlocker
+from har_replay import HarSession
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -32,6 +37,8 @@ class HardeesTest:
         self.headless = headless
         self.keep_browser_open = keep_browser_open
         self.base_url = "https://www.hardees.com/"
+        self.site = site_key(self.base_url)
+        self.selectors = get_selector_cache()  # candidates that won on earlier runs go first
         self.timeout = 30000  # 30 seconds
         self.test_agent = AITestAgent()
         self.test_executor = None
@@ -71,6 +78,18 @@ class HardeesTest:
             # Grant permissions if needed
             await self.context.grant_permissions(['geolocation'])
             
+            # Record or replay traffic per HAR_MODE; added before blocking so blocked requests are never recorded
+            self.har = HarSession.from_env('hardees')
+            await self.har.apply(self.context)
+            
+            # Block the resource types selected by BLOCK_PROFILES
+            self.network = NetworkBlocker.from_env()
+            await self.network.apply(self.context)
+            
+            # Dismiss cookie banners and popups whenever they appear
+            self.interstitials = InterstitialWatchdog()
+            await self.interstitials.attach(self.context)
+            
             # Create a new page
             self.page = await self.context.new_page()
             self.page.set_default_timeout(self.timeout)
@@ -105,6 +124,12 @@ class HardeesTest:
     async def close(self):
         """Clean up test resources"""
         try:
+            if hasattr(self, 'interstitials'):
+                await self.interstitials.stop()
+            
+            if hasattr(self, 'network') and self.network.enabled:
+                logger.info(self.network.summary())
+            
             if hasattr(self, 'context') and self.context:
                 if not self.keep_browser_open:
                     await self.context.close()
@@ -228,35 +253,15 @@ class HardeesTest:
         return False
 
     async def handle_cookie_banner(self):
-        """Handle cookie consent banner if present"""
-        cookie_selectors = [
-            'button:has-text("Accept All")',
-            'button#onetrust-accept-btn-handler',
-            'button[aria-label*="Accept"]',
-            'button[data-testid="accept-cookies"]',
-            'button:has-text("Accept"):visible',
-            '#onetrust-accept-btn-handler',
-            '.cookie-banner button:first-child',
-            '.cookie-consent button:first-child',
-            '#onetrust-banner-sdk #onetrust-accept-btn-handler',
-            '.ot-sdk-row #onetrust-accept-btn-handler',
-            'button#_pbb-close',
-            '.privacy-banner-accept',
-            'button[onclick*="accept"]'
-        ]
-        
-        for selector in cookie_selectors:
-            try:
-                element = await self.wait_for_selector_visible(selector, timeout=5000, state='visible')
-                if element:
-                    logger.info(f"Found cookie banner with selector: {selector}")
-                    await element.click(delay=100)
-                    logger.info("Closed cookie banner")
-                    await asyncio.sleep(1)  # Wait for any animations
-                    return True
-            except Exception as e:
-                logger.debug(f"Failed to close cookie banner with {selector}: {str(e)}")
-        return False
+        """Dismiss a cookie banner that is already showing.
+
+        Banners that appear later are handled by the interstitial watchdog,
+        so there is no speculative wait here.
+        """
+        name = await self.interstitials.dismiss_now(self.page)
+        if name:
+            logger.info(f"Closed cookie banner ({name})")
+        return name is not None
 
     async def navigate_to_menu_item(self, menu_text, submenu_text=None, item_text=None):
         """Navigate through the menu structure"""
@@ -440,6 +445,8 @@ class HardeesTest:
                 step['status'] = 'failed'
                 step['error'] = str(e)
                 logger.error(f"Failed to navigate to menu item: {str(e)}")
+                # Don't replay the cached plan on the next run
+                self.test_agent.invalidate_cached_plan(test_description)
                 raise
             
             # Step 4: Look for offers/deals section
@@ -466,17 +473,15 @@ class HardeesTest:
                 ]
                 
                 offer_clicked = False
-                for selector in offer_selectors:
-                    try:
-                        element = await self.wait_for_selector_visible(selector, timeout=5000)
-                        if element:
-                            logger.info(f"Found offers link: {selector}")
-                            await element.click(delay=100)
-                            offer_clicked = True
-                            await self.page.wait_for_load_state('networkidle')
-                            break
-                    except Exception as e:
-                        logger.debug(f"Failed to click offers link {selector}: {str(e)}")
+                selector = await act_on_first(
+                    self.page, self.site, 'offers_link', offer_selectors,
+                    lambda candidate: self.page.locator(f"{candidate} >> visible=true").first.click(delay=100),
+                    timeout=5000, visible=True, cache=self.selectors
+                )
+                if selector:
+                    logger.info(f"Clicked offers link: {selector}")
+                    offer_clicked = True
+                    await self.page.wait_for_load_state('networkidle')
                 
                 if not offer_clicked:
                     logger.warning("Could not find offers link, trying direct URL")
@@ -525,20 +530,6 @@ class HardeesTest:
             logger.info("Navigating to Hardee's website...")
             await self.page.goto(self.base_url, wait_until='domcontentloaded')
             
-            # Handle cookie banner
-            cookie_accept_buttons = [
-                'button:has-text("Accept")',
-                'button:has-text("Accept All")',
-                'button#onetrust-accept-btn-handler',
-                'button[aria-label*="Accept"]',
-                'button[data-testid="accept-cookies"]'
-            ]
-            
-            for selector in cookie_accept_buttons:
-                if await self.click_element(selector, timeout=3000):
-                    logger.info("Closed cookie banner")
-                    break
-
             # Navigate directly to the menu page
             menu_url = f"{self.base_url}/menu"
             logger.info(f"Navigating directly to menu: {menu_url}")
@@ -562,13 +553,13 @@ class HardeesTest:
             burger_found = False
             
             # First try: Look for specific burger names
-            for burger_name in target_burgers:
-                burger_locator = f'a:has-text("{burger_name}"):visible'
-                if await self.page.locator(burger_locator).count() > 0:
-                    logger.info(f"Found burger: {burger_name}")
-                    await self.page.click(burger_locator)
-                    burger_found = True
-                    break
+            burger_locators = [f'a:has-text("{burger_name}"):visible' for burger_name in target_burgers]
+            burger_locator = await act_on_first(
+                self.page, self.site, 'burger_item', burger_locators, self.page.click, cache=self.selectors
+            )
+            if burger_locator:
+                logger.info(f"Clicked burger: {burger_locator}")
+                burger_found = True
             
             # Second try: Look for any burger in the menu grid
             if not burger_found:
@@ -601,12 +592,12 @@ class HardeesTest:
                     'button:has-text("Add to Cart"):visible'
                 ]
                 
-                for selector in burger_elements:
-                    if await self.page.locator(selector).count() > 0:
-                        logger.info(f"Clicking on element: {selector}")
-                        await self.page.click(selector)
-                        burger_found = True
-                        break
+                selector = await act_on_first(
+                    self.page, self.site, 'burger_element', burger_elements, self.page.click, cache=self.selectors
+                )
+                if selector:
+                    logger.info(f"Clicked on element: {selector}")
+                    burger_found = True
             
             if not burger_found:
                 logger.error("Could not find any burger items or add buttons")
@@ -634,16 +625,13 @@ class HardeesTest:
                 'button[type="submit"]'
             ]
             
-            for selector in add_buttons:
-                try:
-                    if await self.page.locator(selector).count() > 0:
-                        logger.info(f"Found add to cart button: {selector}")
-                        await self.page.click(selector, timeout=5000)
-                        logger.info("Clicked add to cart button")
-                        add_to_cart_found = True
-                        break
-                except Exception as e:
-                    logger.warning(f"Error with selector {selector}: {str(e)}")
+            selector = await act_on_first(
+                self.page, self.site, 'add_to_cart', add_buttons,
+                lambda candidate: self.page.click(candidate, timeout=5000), cache=self.selectors
+            )
+            if selector:
+                logger.info(f"Clicked add to cart button: {selector}")
+                add_to_cart_found = True
             
             if not add_to_cart_found:
                 logger.error("Could not find add to cart button")
@@ -674,14 +662,16 @@ class HardeesTest:
                 '.shopping-cart-count'
             ]
             
-            for selector in cart_selectors:
-                try:
-                    if await self.page.locator(selector).count() > 0:
-                        cart_count = await self.page.locator(selector).first.inner_text()
-                        logger.info(f"Items in cart: {cart_count}")
-                        return True
-                except Exception as e:
-                    logger.warning(f"Error checking cart with selector {selector}: {str(e)}")
+            cart_count = None
+
+            async def read_cart_count(candidate):
+                nonlocal cart_count
+                cart_count = await self.page.locator(candidate).first.inner_text()
+
+            selector = await act_on_first(self.page, self.site, 'cart_count', cart_selectors, read_cart_count, cache=self.selectors)
+            if selector:
+                logger.info(f"Items in cart: {cart_count}")
+                return True
             
             # If we got here, cart verification failed but we'll continue
             logger.warning("Could not verify cart count, but continuing...")
@@ -10,6 +10,8 @@ from playwright.async_api import async_playwright
 # Add the current directory to the path so we can import our module
 sys.path.append(str(Path(__file__).parent))
 from modern_test_agent import TestAgent
+from har_replay import HarSession
+from session_fixtures import SAUCEDEMO_URL, saucedemo_session
 
 async def run_test():
     """Run a test using the modern test agent"""
@@ -31,6 +33,7 @@ async def run_test():
             channel="chromium"
         )
         context = browser
+        await HarSession.from_env('saucedemo-modern-agent').apply(context)
         
         # Create a new page
         page = await context.new_page()
@@ -39,7 +42,7 @@ async def run_test():
         agent = TestAgent(
             page=page,
             model_name="gpt-4-turbo",
-            base_url="https://www.saucedemo.com",  # Using a demo e-commerce site for testing
+            base_url=SAUCEDEMO_URL,  # Using a demo e-commerce site for testing
             screenshots_dir=SCREENSHOTS_DIR,
             debug=True
         )
@@ -57,9 +60,13 @@ async def run_test():
                 },
                 {
                     "name": "Add to Cart",
-                    "description": "Click on the 'Add to cart' button for the first item"
+                    "description": "Click on the 'Add to cart' button for the first item",
+                    # Starts from the saved login instead of depending on the Login Test
+                    "requires_login": True,
+                    "start_url": f"{SAUCEDEMO_URL}/inventory.html"
                 }
             ]
+            session = saucedemo_session()
             
             # Run test scenarios
             for scenario in test_scenarios:
@@ -69,6 +76,10 @@ async def run_test():
                 print(f"{'='*50}")
                 
                 try:
+                    if scenario.get("requires_login"):
+                        await session.ensure(context)
+                    agent.base_url = scenario.get("start_url", SAUCEDEMO_URL)
+                    
                     # Execute the test scenario
                     results = await agent.execute_test_plan(scenario['description'])
                     
@@ -83,9 +94,8 @@ async def run_test():
                                 print(f"Error: {result.error}")
                             
                             if hasattr(result, 'screenshot') and result.screenshot:
-                                screenshot_path = Path(SCREENSHOTS_DIR) / f"{scenario['name'].lower().replace(' ', '_')}_step_{i}.png"
-                                with open(screenshot_path, "wb") as f:
-                                    f.write(result.screenshot)
+                                screenshot_path = Path(SCREENSHOTS_DIR) / f"{scenario['name'].lower().replace(' ', '_')}_step_{i}.{result.screenshot.extension}"
+                                result.screenshot.save_to(screenshot_path)
                                 print(f"Screenshot saved to: {screenshot_path}")
                     else:
                         print(f"Unexpected result format: {type(results)}")
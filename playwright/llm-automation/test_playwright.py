@@ -4,6 +4,10 @@ import logging
 import time
 from typing import Optional
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from selector_cache import get_selector_cache, site_key
+from selector_probe import act_on_first, resolve_selector
+from interstitials import InterstitialWatchdog
+from network_profiles import NetworkBlocker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -47,6 +51,14 @@ class PlaywrightTest:
         # Grant permissions if needed
         await self.context.grant_permissions(['geolocation', 'notifications'])
         
+        # Block the resource types selected by BLOCK_PROFILES
+        self.network = NetworkBlocker.from_env()
+        await self.network.apply(self.context)
+        
+        # Dismiss cookie banners and popups whenever they appear
+        self.interstitials = InterstitialWatchdog()
+        await self.interstitials.attach(self.context)
+        
         # Create a new page
         self.page = await self.context.new_page()
         
@@ -147,6 +159,10 @@ class PlaywrightTest:
 
     async def close(self):
         """Close browser and cleanup"""
+        if hasattr(self, 'interstitials'):
+            await self.interstitials.stop()
+        if hasattr(self, 'network') and self.network.enabled:
+            logger.info(self.network.summary())
         if self.page:
             await self.page.close()
         if self.context:
@@ -158,13 +174,16 @@ class PlaywrightTest:
 
 async def run_test():
     test = PlaywrightTest(headless=False, slow_mo=100, timeout=30000)
+    login_url = 'https://www.pinterest.com/login/'
+    selectors = get_selector_cache()  # candidates that won on earlier runs go first
+    site = site_key(login_url)
     
     try:
         # Initialize browser and page
         await test.setup()
         
         # Navigate to the target page
-        if not await test.navigate_to('https://www.pinterest.com/login/'):
+        if not await test.navigate_to(login_url):
             logger.error("Failed to navigate to Pinterest login page")
             return
             
@@ -173,16 +192,6 @@ async def run_test():
         # Wait for the page to load completely
         await test.page.wait_for_load_state('networkidle')
         
-        # Handle cookie banner if present
-        try:
-            cookie_accept = test.page.locator('button:has-text("Accept"), button:has-text("Accept all"), [data-test-id="cookie-banner-close-button"]')
-            if await cookie_accept.count() > 0:
-                await cookie_accept.first.click()
-                logger.info("Closed cookie banner")
-                await asyncio.sleep(1)  # Wait for any animations
-        except Exception as e:
-            logger.warning(f"Could not find/click cookie banner: {str(e)}")
-        
         # Try multiple selectors for the login form
         login_selectors = [
             'form[data-test-id="login-form"]',
@@ -194,12 +203,9 @@ async def run_test():
             'div[data-test-id="login-form"]'
         ]
         
-        login_form = None
-        for selector in login_selectors:
-            if await test.page.locator(selector).count() > 0:
-                login_form = selector
-                logger.info(f"Found login form with selector: {selector}")
-                break
+        login_form = await resolve_selector(test.page, site, 'login_form', login_selectors, cache=selectors)
+        if login_form:
+            logger.info(f"Found login form with selector: {login_form}")
                 
         if not login_form:
             logger.error("Could not find login form with any known selectors")
@@ -219,13 +225,14 @@ async def run_test():
             'input[data-test-id*="email"]'
         ]
         
-        for selector in email_selectors:
-            if await test.page.locator(selector).count() > 0:
-                await test.page.fill(selector, 'your_email@example.com')
-                email_found = True
-                logger.info(f"Filled email using selector: {selector}")
-                await asyncio.sleep(0.5)  # Small delay between actions
-                break
+        selector = await act_on_first(
+            test.page, site, 'email_input', email_selectors,
+            lambda candidate: test.page.fill(candidate, 'your_email@example.com'), cache=selectors
+        )
+        if selector:
+            email_found = True
+            logger.info(f"Filled email using selector: {selector}")
+            await asyncio.sleep(0.5)  # Small delay between actions
                 
         # Try different password input selectors
         password_selectors = [
@@ -236,13 +243,14 @@ async def run_test():
             'input[data-test-id*="password"]'
         ]
         
-        for selector in password_selectors:
-            if await test.page.locator(selector).count() > 0:
-                await test.page.fill(selector, 'your_password')
-                password_found = True
-                logger.info(f"Filled password using selector: {selector}")
-                await asyncio.sleep(0.5)  # Small delay between actions
-                break
+        selector = await act_on_first(
+            test.page, site, 'password_input', password_selectors,
+            lambda candidate: test.page.fill(candidate, 'your_password'), cache=selectors
+        )
+        if selector:
+            password_found = True
+            logger.info(f"Filled password using selector: {selector}")
+            await asyncio.sleep(0.5)  # Small delay between actions
                 
         if not email_found or not password_found:
             logger.error("Could not find email or password fields")
@@ -259,14 +267,17 @@ async def run_test():
             'button:has(div:has-text("Log in"))'
         ]
         
-        login_success = False
-        for selector in login_button_selectors:
-            if await test.page.locator(selector).count() > 0:
-                login_success = await test.wait_and_click(selector)
-                if login_success:
-                    logger.info(f"Clicked login button using selector: {selector}")
-                    break
-        if not login_success:
+        async def click_login(selector: str):
+            if not await test.wait_and_click(selector):
+                raise RuntimeError(f"Could not click {selector}")
+
+        # Falls through to later candidates if the click fails
+        selector = await act_on_first(
+            test.page, site, 'login_button', login_button_selectors, click_login, cache=selectors
+        )
+        if selector:
+            logger.info(f"Clicked login button using selector: {selector}")
+        else:
             logger.error("Failed to click login button")
             return
             
@@ -6,6 +6,8 @@ import sys
 from pathlib import Path
 from playwright.async_api import async_playwright
 from simple_test_agent import SimpleTestAgent, TestResult
+from har_replay import HarSession
+from session_fixtures import saucedemo_session
 
 def print_test_results(test_name: str, results: list[TestResult]):
     """Print test results in a readable format"""
@@ -23,14 +25,12 @@ def print_test_results(test_name: str, results: list[TestResult]):
             
         # Save screenshot if available
         if result.screenshot:
-            screenshot_path = f"test_screenshots/{test_name.lower().replace(' ', '_')}_step_{i}.png"
-            Path(screenshot_dir).parent.mkdir(exist_ok=True)
-            with open(screenshot_path, "wb") as f:
-                f.write(result.screenshot)
+            screenshot_path = f"test_screenshots/{test_name.lower().replace(' ', '_')}_step_{i}.{result.screenshot.extension}"
+            result.screenshot.save_to(screenshot_path)
             print(f"Screenshot saved to: {screenshot_path}")
 
-async def run_test(test_name: str, test_description: str):
-    """Run a single test scenario"""
+async def run_test(test_name: str, test_description: str, requires_login: bool = False):
+    """Run a single test scenario; `requires_login` starts it from the shared saucedemo session"""
     print(f"\n{'='*50}")
     print(f"Running test: {test_name}")
     print(f"Scenario: {test_description}")
@@ -38,14 +38,18 @@ async def run_test(test_name: str, test_description: str):
     
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context()
+        session = saucedemo_session() if requires_login else None
+        context = await session.new_context(browser) if session else await browser.new_context()
+        # HAR_MODE=record once, then HAR_MODE=replay for offline, network-free reruns
+        await HarSession.from_env(f"saucedemo-{test_name}").apply(context)
         page = await context.new_page()
         
         agent = SimpleTestAgent(
             page=page,
             base_url="https://www.saucedemo.com",
             screenshots_dir=screenshot_dir,
-            debug=True
+            debug=True,
+            session=session
         )
         
         try:
@@ -61,6 +65,7 @@ async def run_test(test_name: str, test_description: str):
             
         finally:
             await agent.close()
+            await context.close()  # writes the HAR when recording
             await browser.close()
 
 async def main():
@@ -84,14 +89,15 @@ async def main():
         },
         {
             "name": "Add to Cart",
-            "description": "Click on the 'Add to cart' button for the first item"
+            "description": "Click on the 'Add to cart' button for the first item",
+            "requires_login": True
         }
     ]
     
     # Run all test scenarios
     results = []
     for scenario in test_scenarios:
-        success = await run_test(scenario["name"], scenario["description"])
+        success = await run_test(scenario["name"], scenario["description"], scenario.get("requires_login", False))
         results.append((scenario["name"], success))
     
     # Print summary
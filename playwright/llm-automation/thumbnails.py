@@ -0,0 +1,138 @@
+"""
+Background thumbnail generation for screenshots shown in the Streamlit reports
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from PIL import Image
+
+from artifact_store import ArtifactHandle, get_artifact_store
+
+logger = logging.getLogger(__name__)
+
+Screenshot = Union[ArtifactHandle, bytes]
+
+
+class ThumbnailCache:
+    """Downscaled WebP/JPEG previews, rendered on a thread pool and cached on disk.
+
+    Full-page screenshots can be thousands of pixels tall, so previews are
+    cropped to `max_aspect` (height / width) before scaling.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        width: int = 480,
+        max_aspect: float = 2.0,
+        image_format: str = 'WEBP',
+        quality: int = 70,
+        max_workers: int = 2
+    ):
+        self.root = Path(root) if root else get_artifact_store().root / 'thumbs'
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.width = width
+        self.max_aspect = max_aspect
+        self.image_format = image_format.upper()
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnailer')
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def extension(self) -> str:
+        return 'webp' if self.image_format == 'WEBP' else 'jpg'
+
+    def _key(self, screenshot: Screenshot) -> str:
+        if isinstance(screenshot, ArtifactHandle):
+            return screenshot.ref.rsplit('.', 1)[0]
+        return hashlib.sha256(screenshot).hexdigest()
+
+    def thumbnail_path(self, screenshot: Screenshot) -> Path:
+        return self.root / f"{self._key(screenshot)}_{self.width}.{self.extension}"
+
+    def _render(self, screenshot: Screenshot, destination: Path) -> bytes:
+        source = screenshot.path if isinstance(screenshot, ArtifactHandle) else io.BytesIO(screenshot)
+        with Image.open(source) as image:
+            image.draft('RGB', (self.width, int(self.width * self.max_aspect)))  # fast JPEG decode
+            image = image.convert('RGB')
+            max_height = int(image.width * self.max_aspect)
+            if image.height > max_height:
+                image = image.crop((0, 0, image.width, max_height))
+            image.thumbnail((self.width, int(self.width * self.max_aspect)), Image.LANCZOS)
+
+            buffer = io.BytesIO()
+            try:
+                image.save(buffer, format=self.image_format, quality=self.quality)
+            except (OSError, KeyError):
+                # Pillow built without WebP support
+                buffer = io.BytesIO()
+                image.save(buffer, format='JPEG', quality=self.quality)
+            data = buffer.getvalue()
+
+        # The directory can disappear underneath us, e.g. when the artifact store is cleared
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destination.with_name(f"{destination.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, destination)
+        return data
+
+    def submit(self, screenshot: Screenshot) -> Optional[Future]:
+        """Start rendering a thumbnail in the background if it is not cached yet"""
+        destination = self.thumbnail_path(screenshot)
+        if destination.exists():
+            return None
+        key = destination.name
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._render, screenshot, destination)
+                future.add_done_callback(lambda _: self._forget(key))
+                self._pending[key] = future
+        return future
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def prefetch(self, screenshots: Iterable[Optional[Screenshot]]):
+        """Queue thumbnails for every screenshot of a run"""
+        for screenshot in screenshots:
+            if screenshot:
+                self.submit(screenshot)
+
+    def get(self, screenshot: Screenshot) -> bytes:
+        """Return thumbnail bytes, waiting for (or doing) the render if needed"""
+        destination = self.thumbnail_path(screenshot)
+        if destination.exists():
+            return destination.read_bytes()
+        future = self.submit(screenshot)
+        if future is not None:
+            return future.result()
+        return destination.read_bytes()
+
+
+_cache: Optional[ThumbnailCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Process-wide thumbnail cache shared by all Streamlit sessions"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
+
+
+def load_full_resolution(screenshot: Screenshot) -> bytes:
+    """Full-size image bytes, only read when the user asks for them"""
+    if isinstance(screenshot, ArtifactHandle):
+        return screenshot.read()
+    return screenshot
@@ -0,0 +1,226 @@
+"""
+Lightweight span tracing for test runs, exported to local JSONL files
+"""
+import contextvars
+import datetime
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_FORMATS = ('jsonl', 'otlp')
+
+# Offset that turns perf_counter_ns() readings into Unix nanoseconds. Spans are
+# timed with the monotonic high-resolution counter and only converted on export.
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+@dataclass
+class Span:
+    """One timed phase of a run; children are the phases nested inside it"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = field(default_factory=time.perf_counter_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    children: List['Span'] = field(default_factory=list, repr=False)
+    _tracer: Optional['Tracer'] = field(default=None, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.perf_counter_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._tracer is not None:
+            self._tracer._finish(self)
+
+    def phases(self) -> Dict[str, float]:
+        """Milliseconds spent in each direct child phase, summed by name"""
+        totals: Dict[str, float] = {}
+        for child in self.children:
+            totals[child.name] = totals.get(child.name, 0.0) + child.duration_ms
+        return {name: round(ms, 2) for name, ms in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_unix_ns': self.start_ns + _EPOCH_OFFSET_NS,
+            'end_unix_ns': (self.end_ns or self.start_ns) + _EPOCH_OFFSET_NS,
+            'duration_ms': round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'status': 'error' if self.error else 'ok',
+            'error': self.error,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span as OTLP/JSON, as written by the OpenTelemetry file exporter"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns + _EPOCH_OFFSET_NS),
+            'endTimeUnixNano': str((self.end_ns or self.start_ns) + _EPOCH_OFFSET_NS),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class JsonlExporter:
+    """Appends finished spans to ``<trace_dir>/trace-<timestamp>-<pid>.jsonl``.
+
+    ``jsonl`` writes one flat span object per line. ``otlp`` writes one
+    OTLP/JSON ``resourceSpans`` envelope per line, which the OpenTelemetry
+    Collector's file receiver and most trace viewers can import.
+    """
+
+    def __init__(self, trace_dir: str, trace_format: str = 'jsonl', service_name: str = 'llm-automation'):
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{trace_format}', expected one of {TRACE_FORMATS}")
+        self.trace_format = trace_format
+        self.service_name = service_name
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.path = Path(trace_dir) / f"trace-{stamp}-{os.getpid()}.jsonl"
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _line(self, span: Span) -> str:
+        if self.trace_format == 'jsonl':
+            return json.dumps(span.to_dict(), default=str)
+        return json.dumps({
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{'scope': {'name': __name__}, 'spans': [span.to_otlp()]}],
+            }]
+        }, default=str)
+
+    def export(self, span: Span):
+        line = self._line(span)
+        with self._lock:
+            try:
+                if self._file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+                self._file.write(line + '\n')
+            except OSError as e:
+                logger.warning(f"Could not write trace span: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter.
+
+    ``span()`` is a context manager that makes the new span current, so
+    spans opened inside it (in the same task, or in tasks it starts) become
+    its children. ``start()`` creates a span without making it current,
+    for spans that stay open across ``yield`` in async generators.
+    """
+
+    def __init__(self, exporter: Optional[JsonlExporter] = None):
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls) -> 'Tracer':
+        """Export to TRACE_DIR in TRACE_FORMAT (jsonl or otlp); spans are still timed without TRACE_DIR"""
+        trace_dir = os.getenv('TRACE_DIR')
+        if not trace_dir:
+            return cls()
+        return cls(JsonlExporter(trace_dir, os.getenv('TRACE_FORMAT', 'jsonl').lower()))
+
+    def start(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        parent = parent if parent is not None else _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+            _tracer=self
+        )
+        if parent is not None:
+            parent.children.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        span = self.start(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(error=e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def _finish(self, span: Span):
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def format_phases(phases: Dict[str, float]) -> str:
+    """'wait 120ms, action 41ms, settle 305ms' for run logs"""
+    return ', '.join(f"{name} {ms:.0f}ms" for name, ms in phases.items())
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from TRACE_DIR / TRACE_FORMAT"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer.from_env()
+        return _tracer
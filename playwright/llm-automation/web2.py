@@ -2,7 +2,6 @@ import streamlit as st
 import asyncio
 import sys
 import subprocess
-import datetime
 import time
 import base64
 from typing import List, Dict, Any, Optional
@@ -69,6 +68,10 @@ from pathlib import Path
 from dotenv import load_dotenv
 import threading
 from concurrent.futures import ThreadPoolExecutor
+from thumbnails import get_thumbnail_cache, load_full_resolution
+from log_panel import LogBuffer
+from job_queue import get_job_manager, POLL_INTERVAL
+from network_profiles import NetworkBlocker
 
 # Load environment variables
 load_dotenv()
@@ -245,6 +248,7 @@ class EnhancedTestRunner:
         self.test_executor = None
         self.playwright = None
         self.browser = None
+        self.network = NetworkBlocker.from_env()
         self.current_step = 0
         self.total_steps = 0
         
@@ -261,6 +265,7 @@ class EnhancedTestRunner:
                 viewport={'width': 1280, 'height': 800},
                 ignore_https_errors=True,
             )
+            await self.network.apply(context)
             
             page = await context.new_page()
             self.test_executor = TestExecutor(page)
@@ -294,6 +299,7 @@ class EnhancedTestRunner:
     
     async def run_test_with_progress(self, test_description: str, progress_callback=None, log_callback=None):
         """Run test with real-time progress updates and comprehensive error handling"""
+        passed = False
         try:
             if log_callback: log_callback("🤖 Analyzing test description...")
             test_actions = await self.ai_agent.generate_test_actions(test_description)
@@ -342,15 +348,20 @@ class EnhancedTestRunner:
                     results.append(error_result)
                     if log_callback: log_callback(f"❌ Step {i} failed: {e}")
             
+            passed = all(result['status'] == 'passed' for result in results)
             if log_callback: log_callback("🎉 Test execution completed!")
             return results
             
         except Exception as e:
             # This block catches critical errors during the overall test run (e.g., browser crash)
             if log_callback: log_callback(f"💥 Critical Error during test run: {e}")
-            st.error(f"A critical error stopped the test execution: {e}")
+            # Runs on a job worker thread, so there is no Streamlit context to st.error into
+            print(f"A critical error stopped the test execution: {e}")
             return [] # Return empty list to indicate failure
         finally:
+            # The plan was cached before it ran; don't replay one that hasn't passed
+            if not passed: self.ai_agent.invalidate_cached_plan(test_description)
+            if log_callback and self.network.enabled: log_callback(f"🚫 {self.network.summary()}")
             if log_callback: log_callback("🧹 Cleaning up resources...")
             await self.cleanup()
             if log_callback: log_callback("✅ Cleanup complete.")
@@ -393,6 +404,7 @@ def display_enhanced_test_results(results: List[Dict[str, Any]]):
     st.markdown("---")
     st.markdown("## 📊 Test Execution Report")
     display_enhanced_metrics(results)
+    get_thumbnail_cache().prefetch(r.get('screenshot') for r in results)
     
     st.markdown("### 📋 Detailed Test Steps")
     
@@ -412,13 +424,10 @@ def display_enhanced_test_results(results: List[Dict[str, Any]]):
             
             if 'screenshot' in result and result['screenshot']:
                 try:
-                    img_b64 = base64.b64encode(result['screenshot']).decode()
-                    st.markdown(f"""
-                    <div class="screenshot-container">
-                        <p style="text-align: center; font-weight: bold; color: var(--text-secondary);">Screenshot</p>
-                        <img src="data:image/png;base64,{img_b64}" alt="Screenshot for step {result.get('step_number', i)}">
-                    </div>
-                    """, unsafe_allow_html=True)
+                    step_number = result.get('step_number', i)
+                    st.image(get_thumbnail_cache().get(result['screenshot']), caption=f"Screenshot for step {step_number}")
+                    if st.checkbox("Show full resolution", key=f"full_res_{step_number}"):
+                        st.image(load_full_resolution(result['screenshot']))
                 except Exception as e:
                     st.warning(f"Could not display screenshot for this step. Reason: {e}")
 
@@ -450,14 +459,14 @@ def main():
     st.markdown("<p style='text-align: center; color: var(--text-secondary);'>Transform natural language into robust automated web tests.</p>", unsafe_allow_html=True)
     
     # Initialize session state variables
-    if 'test_runner' not in st.session_state:
-        st.session_state.test_runner = EnhancedTestRunner()
     if 'test_results' not in st.session_state:
         st.session_state.test_results = None
     if 'test_logs' not in st.session_state:
-        st.session_state.test_logs = []
+        st.session_state.test_logs = LogBuffer(tail=50, entry_class=None)
     if 'test_running' not in st.session_state:
         st.session_state.test_running = False
+    if 'active_job_id' not in st.session_state:
+        st.session_state.active_job_id = None
 
     # Main UI layout
     input_col, button_col = st.columns([4, 1])
@@ -476,7 +485,7 @@ def main():
         run_button = st.button("▶️ Run Test", use_container_width=True, disabled=st.session_state.test_running)
         if st.button("🧹 Clear", use_container_width=True, type="secondary"):
             st.session_state.test_results = None
-            st.session_state.test_logs = []
+            st.session_state.test_logs.clear()
             st.session_state.example_selected = ""
             st.rerun()
 
@@ -484,39 +493,41 @@ def main():
     if run_button and test_description.strip():
         st.session_state.test_running = True
         st.session_state.test_results = None
-        st.session_state.test_logs = []
+        st.session_state.test_logs.clear()
 
-        progress_container = st.empty()
-        log_container = st.empty()
-        
-        def update_progress(current, total, message):
-            progress_val = current / total if total > 0 else 0
-            progress_container.progress(progress_val, text=f"Executing Step {current}/{total}: {message}")
-        
-        def add_log(message):
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-            st.session_state.test_logs.append(f"[{timestamp}] {message}")
-            log_html = "<div class='log-container'>" + "".join([f"<div>{log}</div>" for log in st.session_state.test_logs]) + "</div>"
-            log_container.markdown(log_html, unsafe_allow_html=True)
-        
-        async def run_test_async():
-            try:
-                results = await st.session_state.test_runner.run_test_with_progress(
-                    st.session_state.test_description_input,
-                    progress_callback=update_progress,
-                    log_callback=add_log
-                )
-                st.session_state.test_results = results
-            except Exception as e:
-                # Final catch-all for any unhandled exceptions during the async run
-                st.error(f"An unexpected critical error occurred: {e}")
-                st.session_state.test_results = [] # Ensure results are not None
-            finally:
-                st.session_state.test_running = False
-                progress_container.empty() # Clear progress bar on completion
-                st.rerun() # Rerun to update UI state correctly
+        # Each run gets its own runner; the job executes out of band and this session polls it
+        runner = EnhancedTestRunner()
+        test_description_input = st.session_state.test_description_input
+        job = get_job_manager().submit(
+            lambda job: runner.run_test_with_progress(
+                test_description_input,
+                progress_callback=job.report_progress,
+                log_callback=job.log
+            ),
+            name=test_description_input[:60],
+            logs=st.session_state.test_logs
+        )
+        st.session_state.active_job_id = job.id
+        st.rerun()
 
-        asyncio.run(run_test_async())
+    # Poll the running job
+    if st.session_state.active_job_id:
+        job = get_job_manager().get(st.session_state.active_job_id)
+        if job is None or job.done:
+            if job is not None and job.status == 'failed':
+                # Final catch-all for any unhandled exceptions during the async run
+                st.error(f"An unexpected critical error occurred: {job.error}")
+            st.session_state.test_results = (job.result if job else None) or [] # Ensure results are not None
+            st.session_state.test_running = False
+            st.session_state.active_job_id = None
+        else:
+            current, total, message = job.progress
+            st.progress(job.progress_fraction, text=f"Executing Step {current}/{total}: {message}")
+            st.markdown(st.session_state.test_logs.render(), unsafe_allow_html=True)
+            if st.button("⏹️ Cancel", type="secondary"):
+                get_job_manager().cancel(job.id)
+            time.sleep(POLL_INTERVAL)
+            st.rerun()
 
     # Display results area
     if st.session_state.test_results is not None:
@@ -4,13 +4,18 @@ import sys
 import subprocess
 import datetime
 import time
-import base64
 from typing import List, Dict, Any, Optional
-from ai_test_agent import AITestAgent, TestAction, TestExecutor
+from ai_test_agent import AITestAgent, TestAction, TestExecutor, PlanStream
+from screenshot_policy import ScreenshotPolicy, SCREENSHOT_MODES
+from network_profiles import NetworkBlocker
+from profile_manager import get_profile_manager
+from tracing import format_phases, get_tracer
+from artifact_store import ArtifactHandle, get_artifact_store
+from thumbnails import get_thumbnail_cache, load_full_resolution
+from log_panel import LogBuffer
+from job_queue import get_job_manager, POLL_INTERVAL
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
 import json
-import os
-from pathlib import Path
 from dotenv import load_dotenv
 import threading
 from concurrent.futures import ThreadPoolExecutor
@@ -245,39 +250,52 @@ class EnhancedTestRunner:
         self.page = None
         self.current_step = 0
         self.total_steps = 0
+        self.screenshot_policy = ScreenshotPolicy.from_env()
+        self.artifact_store = get_artifact_store()
+        self.network = NetworkBlocker.from_env()
+        self.profile_manager = get_profile_manager()
+        self.profile_dir = None
+        self.tracer = get_tracer()
         
     async def initialize_playwright(self, headless=False):
-        """Initialize Playwright with persistent Chrome profile"""
+        """Initialize Playwright with a private clone of the persistent Chrome profile"""
         try:
             if self.playwright is None:
                 self.playwright = await async_playwright().start()
             
             if self.context is None or not self.context.pages:
-                # Use persistent context with custom Chrome profile
-                profile_dir = Path("/Users/harshit/Downloads/final_web_testing_playwright-main/playwright/llm-automation/custom_chrome_profile").resolve()
+                # Each run gets its own copy of the profile, so concurrent runs don't fight over its lock
+                if self.profile_dir is None:
+                    with self.tracer.span('profile.clone'):
+                        self.profile_dir = await asyncio.to_thread(self.profile_manager.clone)
                 
                 # Create the context with persistent profile
-                self.context = await self.playwright.chromium.launch_persistent_context(
-                    user_data_dir=str(profile_dir),
-                    headless=headless,
-                    viewport={"width": 1440, "height": 900},
-                    slow_mo=500,  # Add slow motion for better visibility
-                    args=[
-                        '--disable-dev-shm-usage',
-                        '--no-sandbox',
-                        '--disable-web-security',
-                        '--disable-blink-features=AutomationControlled',
-                    ]
-                )
+                with self.tracer.span('browser.launch', headless=headless, persistent=True):
+                    self.context = await self.playwright.chromium.launch_persistent_context(
+                        user_data_dir=str(self.profile_dir),
+                        headless=headless,
+                        viewport={"width": 1440, "height": 900},
+                        slow_mo=500,  # Add slow motion for better visibility
+                        args=[
+                            '--disable-dev-shm-usage',
+                            '--no-sandbox',
+                            '--disable-web-security',
+                            '--disable-blink-features=AutomationControlled',
+                        ]
+                    )
+                await self.network.apply(self.context)
                 
                 # Get the first page from the persistent context
                 self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
-                self.test_executor = TestExecutor(self.page)
+                # This runner captures step and error screenshots itself; a second capture
+                # per step would advance the policy's diff fingerprint and every_n count twice
+                self.test_executor = TestExecutor(self.page, screenshot_policy=ScreenshotPolicy(mode='never'))
             
             return self.browser, self.playwright
             
         except Exception as e:
-            st.error(f"Failed to initialize browser: {str(e)}")
+            # Runs on a job worker thread, so report through the run's log instead of st.error
+            print(f"Failed to initialize browser: {str(e)}")
             await self.cleanup()
             raise
     
@@ -303,48 +321,73 @@ class EnhancedTestRunner:
                 self.playwright = None
         except Exception as e:
             print(f"Error stopping playwright: {e}")
+        
+        if self.profile_dir is not None:
+            await asyncio.to_thread(self.profile_manager.release, self.profile_dir)
+            self.profile_dir = None
+    
+    async def prepare_browser(self, headless=False, target_url: Optional[str] = None, log_callback=None):
+        """Launch the browser and open the target URL; runs concurrently with planning"""
+        await self.initialize_playwright(headless=headless)
+        if log_callback:
+            log_callback("✅ Browser ready")
+        if target_url:
+            try:
+                await self.test_executor.preload(target_url)
+                if log_callback:
+                    log_callback(f"🌐 Opened {target_url}")
+            except Exception as e:
+                # The plan's own navigate step will try again
+                if log_callback:
+                    log_callback(f"⚠️ Could not pre-open {target_url}: {e}")
+    
+    async def run_test_with_progress(self, test_description: str, progress_callback=None, log_callback=None,
+                                     headless: Optional[bool] = None, target_url: Optional[str] = None):
+        """Run test with real-time progress updates and logging, traced as a 'test.run' span"""
+        with self.tracer.span('test.run', runner='web_interface', description=test_description[:200]) as span:
+            results = await self._run_test_with_progress(
+                test_description, progress_callback, log_callback, headless, target_url
+            )
+            span.set(steps=len(results))
+            return results
     
-    async def run_test_with_progress(self, test_description: str, progress_callback=None, log_callback=None):
-        """Run test with real-time progress updates and logging"""
+    async def _run_test_with_progress(self, test_description: str, progress_callback, log_callback,
+                                      headless: Optional[bool], target_url: Optional[str]):
         results = []
+        plan = None
+        browser_ready = None
+        passed = False
         try:
-            # Step 1: Generate test actions
-            if log_callback:
-                log_callback("🤖 Analyzing test description...")
-            
-            test_actions = await self.ai_agent.generate_test_actions(test_description)
-            
-            if not test_actions:
-                if log_callback:
-                    log_callback("❌ Failed to generate test actions")
-                return []
-            
-            self.total_steps = len(test_actions)
-            if log_callback:
-                log_callback(f"✅ Generated {len(test_actions)} test steps")
-            
-            # Step 2: Initialize browser
+            # Step 1: Launch the browser and generate test actions concurrently
             if log_callback:
                 log_callback("🚀 Launching browser...")
+                log_callback("🤖 Analyzing test description...")
             
-            headless_mode = st.session_state.get('headless_mode', True)
-            await self.initialize_playwright(headless=headless_mode)
-            if log_callback:
-                log_callback("✅ Browser ready")
+            if headless is None:
+                headless = st.session_state.get('headless_mode', True)
+            browser_ready = asyncio.create_task(self.prepare_browser(headless, target_url, log_callback))
             
-            # Step 3: Execute test with progress tracking
-            if log_callback:
-                log_callback("⚡ Starting test execution...")
+            # Actions are executed as soon as the model finishes writing each one
+            plan = PlanStream(self.ai_agent.stream_test_actions(test_description, target_url=target_url))
             
-            for i, action in enumerate(test_actions, 1):
+            i = 0
+            async for action in plan:
+                i += 1
                 self.current_step = i
-                start_time = time.time()
+                self.total_steps = plan.total
+                
+                if i == 1:
+                    # Step 2: Wait for the browser only if planning beat it
+                    await browser_ready
+                    if log_callback:
+                        log_callback("⚡ Starting test execution...")
                 
+                start_time = time.time()
                 if progress_callback:
                     progress_callback(i, self.total_steps, f"Step {i}: {action.description}")
                 
                 if log_callback:
-                    log_callback(f"🔄 Executing step {i}/{self.total_steps}: {action.description}")
+                    log_callback(f"🔄 Executing step {i}/{self.total_steps}{'' if plan.finished else '+'}: {action.description}")
                 
                 try:
                     # Execute the action with enhanced error handling
@@ -355,7 +398,7 @@ class EnhancedTestRunner:
                     
                     status = "✅" if result['status'] == 'passed' else "❌"
                     if log_callback:
-                        log_callback(f"{status} Step {i} completed in {result['duration']:.2f}s")
+                        log_callback(f"{status} Step {i} completed in {result['duration']:.2f}s ({format_phases(result['phases'])})")
                     
                 except Exception as e:
                     error_result = {
@@ -374,7 +417,30 @@ class EnhancedTestRunner:
                     if log_callback:
                         log_callback(f"❌ Step {i} failed: {str(e)}")
             
+            if not results:
+                if log_callback:
+                    log_callback("❌ Failed to generate test actions")
+                return []
+            
+            if plan.error is not None:
+                # A plan cut off mid-stream must not pass as a complete run
+                results.append({
+                    'step_number': i + 1,
+                    'description': "Generate the rest of the test plan",
+                    'action_type': 'plan',
+                    'status': 'failed',
+                    'error': f"Plan generation failed after {i} steps: {plan.error}",
+                    'duration': 0
+                })
+                self.total_steps = len(results)
+                if log_callback:
+                    log_callback(f"❌ Plan generation failed after {i} steps: {plan.error}")
+                return results
+            
+            self.total_steps = len(results)
+            passed = all(result['status'] == 'passed' for result in results)
             if log_callback:
+                log_callback(f"✅ Generated and executed {len(results)} test steps")
                 log_callback("🎉 Test execution completed!")
             
             return results
@@ -384,36 +450,65 @@ class EnhancedTestRunner:
                 log_callback(f"💥 Critical error: {str(e)}")
             return results
         finally:
+            if plan is not None:
+                await plan.aclose()
+            if not passed:
+                # The plan was cached before it ran; don't replay one that hasn't passed
+                self.ai_agent.invalidate_cached_plan(test_description, target_url)
+            if browser_ready is not None:
+                # Let a still-launching browser finish so cleanup can close it
+                await asyncio.gather(browser_ready, return_exceptions=True)
+            if log_callback and self.network.enabled:
+                log_callback(f"🚫 {self.network.summary()}")
             await self.cleanup()
 
     async def execute_action_with_screenshot(self, action: TestAction, step_number: int):
-        """Execute action and capture screenshot with proper error handling"""
+        """Execute action and capture screenshot, adding the step's phase timings as 'phases'"""
+        with self.tracer.span(
+            'step',
+            step=step_number,
+            action_type=action.action_type,
+            selector=action.selector or ''
+        ) as span:
+            result = await self._execute_action_with_screenshot(action, step_number)
+            result['phases'] = span.phases()
+            return result
+    
+    async def _execute_action_with_screenshot(self, action: TestAction, step_number: int):
         try:
             # Execute the action using the backend's TestExecutor
             start_time = time.time()
             
             if action.action_type == 'navigate':
                 url = action.selector if '://' in action.selector else f'https://{action.selector}'
-                await self.page.goto(url, timeout=60000, wait_until='domcontentloaded')
+                # Skip the reload if the page was already opened while planning
+                if not self.test_executor.consume_preloaded(url):
+                    with self.tracer.span('navigate', url=url):
+                        await self.page.goto(url, timeout=60000, wait_until='domcontentloaded')
                 
             elif action.action_type == 'click':
-                element = await self.page.wait_for_selector(
-                    action.selector, 
-                    state='visible', 
-                    timeout=10000
-                )
-                await element.scroll_into_view_if_needed()
-                await element.click()
+                with self.tracer.span('wait'):
+                    element = await self.page.wait_for_selector(
+                        action.selector, 
+                        state='visible', 
+                        timeout=10000
+                    )
+                with self.tracer.span('action'):
+                    await element.scroll_into_view_if_needed()
+                    await element.click()
                 
             elif action.action_type == 'fill':
-                await self.page.fill(action.selector, str(action.value))
+                with self.tracer.span('action'):
+                    await self.page.fill(action.selector, str(action.value))
                 
             elif action.action_type == 'select':
-                await self.page.select_option(action.selector, value=str(action.value))
+                with self.tracer.span('action'):
+                    await self.page.select_option(action.selector, value=str(action.value))
                 
             elif action.action_type == 'wait':
                 seconds = int(action.value) if action.value else 1
-                await asyncio.sleep(seconds)
+                with self.tracer.span('sleep', seconds=seconds):
+                    await asyncio.sleep(seconds)
                 
             elif action.action_type == 'screenshot':
                 pass  # Screenshot will be taken below
@@ -436,67 +531,51 @@ class EnhancedTestRunner:
             }
             
         except Exception as e:
-            # Capture error screenshot
-            error_screenshot = await self.capture_error_screenshot(step_number, action.description)
+            # The caller captures the error screenshot
             raise Exception(f"Action failed: {str(e)}")
 
     async def capture_screenshot(self, step_number: int, description: str):
-        """Capture screenshot and return as base64 data"""
+        """Capture screenshot (if the screenshot policy calls for one) and return a lazy artifact handle"""
         try:
             if not self.page:
                 return None
                 
             # Take screenshot as bytes
-            screenshot_bytes = await self.page.screenshot(
-                full_page=True,
-                type='png'
-            )
-            
-            # Also save to file for debugging
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            safe_desc = "".join(c if c.isalnum() or c in [' ', '_'] else '' for c in description)[:50]
-            filename = f"step_{step_number:02d}_{timestamp}_{safe_desc}.png"
-            
-            os.makedirs('screenshots', exist_ok=True)
-            filepath = os.path.join('screenshots', filename)
-            
-            with open(filepath, 'wb') as f:
-                f.write(screenshot_bytes)
+            screenshot_bytes = await self.screenshot_policy.capture(self.page, step=step_number)
+            if not screenshot_bytes:
+                return None
             
-            return screenshot_bytes
+            # Identical frames are stored once; the write happens off the event loop
+            return await self.artifact_store.store(screenshot_bytes, self.screenshot_policy.extension)
             
         except Exception as e:
             print(f"Error capturing screenshot: {e}")
             return None
 
     async def capture_error_screenshot(self, step_number: int, description: str):
-        """Capture screenshot on error"""
+        """Capture screenshot on error and return a lazy artifact handle"""
         try:
             if not self.page:
                 return None
                 
-            screenshot_bytes = await self.page.screenshot(
-                full_page=True,
-                type='png'
-            )
-            
-            # Save error screenshot
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            safe_desc = "".join(c if c.isalnum() or c in [' ', '_'] else '' for c in description)[:50]
-            filename = f"error_step_{step_number:02d}_{timestamp}_{safe_desc}.png"
-            
-            os.makedirs('error_screenshots', exist_ok=True)
-            filepath = os.path.join('error_screenshots', filename)
-            
-            with open(filepath, 'wb') as f:
-                f.write(screenshot_bytes)
+            screenshot_bytes = await self.screenshot_policy.capture(self.page, step=step_number, failed=True)
+            if not screenshot_bytes:
+                return None
             
-            return screenshot_bytes
+            return await self.artifact_store.store(screenshot_bytes, self.screenshot_policy.extension)
             
         except Exception as e:
             print(f"Error capturing error screenshot: {e}")
             return None
 
+def build_screenshot_policy() -> ScreenshotPolicy:
+    """Screenshot policy from the sidebar settings"""
+    return ScreenshotPolicy(
+        mode=st.session_state.get('screenshot_mode', 'always'),
+        full_page=st.session_state.get('screenshot_full_page', True),
+        image_type=st.session_state.get('screenshot_format', 'png')
+    )
+
 def create_sidebar():
     """Create enhanced sidebar with settings and help"""
     with st.sidebar:
@@ -516,6 +595,15 @@ def create_sidebar():
         st.session_state.headless_mode = st.checkbox("Headless Mode", value=False)
         st.session_state.capture_video = st.checkbox("Record Video", value=False)
         st.session_state.slow_motion = st.slider("Slow Motion (ms)", 0, 2000, 500)
+        st.session_state.screenshot_mode = st.selectbox(
+            "Screenshots",
+            SCREENSHOT_MODES,
+            index=0,
+            help="always: every step, on_failure: failed steps only, every_n: every 5th step, "
+                 "diff_only: only when the viewport changed, never: no screenshots"
+        )
+        st.session_state.screenshot_full_page = st.checkbox("Full-page screenshots", value=True)
+        st.session_state.screenshot_format = st.radio("Screenshot format", ["png", "jpeg"], horizontal=True)
         
         # Quick examples
         st.markdown("### 💡 Example Tests")
@@ -606,6 +694,9 @@ def display_enhanced_test_results(results: List[Dict[str, Any]]):
     # Display metrics
     display_enhanced_metrics(results)
     
+    # Render previews in the background while the step list is drawn
+    get_thumbnail_cache().prefetch(r.get('screenshot') for r in results)
+    
     # Detailed steps
     st.markdown("###  Detailed Test Steps")
     
@@ -655,19 +746,15 @@ def display_enhanced_test_results(results: List[Dict[str, Any]]):
                 if result.get('screenshot'):
                     try:
                         screenshot_data = result['screenshot']
-                        if isinstance(screenshot_data, bytes):
-                            # Convert bytes to base64 for display
-                            img_b64 = base64.b64encode(screenshot_data).decode()
-                            st.markdown(f"""
-                            <div class="screenshot-container">
-                                <img src="data:image/png;base64,{img_b64}" 
-                                     style="width: 100%; max-width: 400px; cursor: pointer;"
-                                     onclick="window.open('data:image/png;base64,{img_b64}', '_blank')">
-                                <p style="text-align: center; font-size: 0.8em; color: #666; margin-top: 0.5rem;">
-                                    Step {step_number} Screenshot (Click to enlarge)
-                                </p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                        if isinstance(screenshot_data, (ArtifactHandle, bytes)):
+                            # Cached downscaled preview; the full image is only loaded on request
+                            st.image(
+                                get_thumbnail_cache().get(screenshot_data),
+                                caption=f"Step {step_number} Screenshot",
+                                width=400
+                            )
+                            if st.checkbox("Show full resolution", key=f"full_res_{step_number}"):
+                                st.image(load_full_resolution(screenshot_data), use_column_width=True)
                         else:
                             st.image(screenshot_data, 
                                    caption=f"Step {step_number}", 
@@ -693,14 +780,14 @@ def main():
     """, unsafe_allow_html=True)
     
     # Initialize session state
-    if 'test_runner' not in st.session_state:
-        st.session_state.test_runner = EnhancedTestRunner()
     if 'test_results' not in st.session_state:
         st.session_state.test_results = None
     if 'test_logs' not in st.session_state:
-        st.session_state.test_logs = []
+        st.session_state.test_logs = LogBuffer(tail=10)
     if 'test_running' not in st.session_state:
         st.session_state.test_running = False
+    if 'active_job_id' not in st.session_state:
+        st.session_state.active_job_id = None
     
     # URL input section
     url_col, _ = st.columns([2, 3])
@@ -733,7 +820,7 @@ def main():
         
         if st.button("🗑 Clear Results", use_container_width=True):
             st.session_state.test_results = None
-            st.session_state.test_logs = []
+            st.session_state.test_logs.clear()
             st.rerun()
     
     # Test execution
@@ -744,7 +831,7 @@ def main():
             
         st.session_state.test_running = True
         st.session_state.test_results = None
-        st.session_state.test_logs = []
+        st.session_state.test_logs.clear()
         
         # Prepare full test description
         if not any(word in test_description.lower() for word in ['go to', 'navigate to', 'visit']):
@@ -752,67 +839,63 @@ def main():
         else:
             full_test_description = test_description
         
-        # Progress tracking containers
-        progress_container = st.empty()
-        log_container = st.empty()
+        # Each run gets its own runner so concurrent jobs never share a page
+        runner = EnhancedTestRunner()
+        runner.screenshot_policy = build_screenshot_policy()
+        headless = st.session_state.get('headless_mode', True)
         
-        def update_progress(current, total, message):
-            progress_value = current / total if total > 0 else 0
-            progress_container.markdown(f"""
+        # Run the test out of band; this session polls the job below
+        job = get_job_manager().submit(
+            lambda job: runner.run_test_with_progress(
+                full_test_description,
+                progress_callback=job.report_progress,
+                log_callback=job.log,
+                headless=headless,
+                target_url=target_url.strip()
+            ),
+            name=test_description[:60],
+            logs=st.session_state.test_logs
+        )
+        st.session_state.active_job_id = job.id
+        st.rerun()
+    
+    # Poll the running job
+    if st.session_state.active_job_id:
+        job = get_job_manager().get(st.session_state.active_job_id)
+        if job is None:
+            st.session_state.active_job_id = None
+            st.session_state.test_running = False
+        elif not job.done:
+            current, total, message = job.progress
+            st.markdown(f"""
             <div style="background: white; padding: 1rem; border-radius: 8px; margin: 1rem 0; border-left: 4px solid #6366f1;">
-                <h4>Progress: {current}/{total} ({progress_value*100:.1f}%)</h4>
-                <p><strong>Current Step:</strong> {message}</p>
+                <h4>Progress: {current}/{total} ({job.progress_fraction*100:.1f}%)</h4>
+                <p><strong>Current Step:</strong> {message or 'Planning test...'}</p>
             </div>
             """, unsafe_allow_html=True)
-            progress_container.progress(progress_value)
-        
-        def add_log(message):
-            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-            st.session_state.test_logs.append(f"[{timestamp}] {message}")
-            
-            # Display logs in real-time
-            log_html = f"""
-            <div class="log-container">
-                {''.join([f'<div class="log-entry">{log}</div>' for log in st.session_state.test_logs[-10:]])}
-            </div>
-            """
-            log_container.markdown(log_html, unsafe_allow_html=True)
-        
-        # Run the test
-        async def run_test_async():
-            try:
-                st.session_state.test_running = True
-                results = await st.session_state.test_runner.run_test_with_progress(
-                    full_test_description,
-                    progress_callback=update_progress,
-                    log_callback=add_log
-                )
-                st.session_state.test_results = results
-                st.session_state.test_running = False
-                progress_container.empty()
-                
-                # Show completion message
-                if results:
-                    passed = sum(1 for r in results if r.get('status') == 'passed')
-                    total = len(results)
-                    if passed == total:
-                        st.success(f"Test completed successfully! All {total} steps passed.")
-                    else:
-                        st.error(f"Test completed with issues. {passed}/{total} steps passed.")
-                
-            except Exception as e:
-                st.error(f"Test execution failed: {str(e)}")
-                st.session_state.test_running = False
-                progress_container.empty()
-        
-        # Execute the async function
-        try:
-            asyncio.run(run_test_async())
-        except Exception as e:
-            st.error(f"Failed to run test: {str(e)}")
-            st.session_state.test_running = False
-        finally:
+            st.progress(job.progress_fraction)
+            st.markdown(st.session_state.test_logs.render(), unsafe_allow_html=True)
+            if st.button("Cancel Test"):
+                get_job_manager().cancel(job.id)
+            time.sleep(POLL_INTERVAL)
             st.rerun()
+        else:
+            st.session_state.active_job_id = None
+            st.session_state.test_running = False
+            st.session_state.test_results = job.result or []
+            
+            # Show completion message
+            if job.status == 'cancelled':
+                st.warning("Test was cancelled.")
+            elif job.status == 'failed':
+                st.error(f"Test execution failed: {job.error}")
+            elif job.result:
+                passed = sum(1 for r in job.result if r.get('status') == 'passed')
+                total = len(job.result)
+                if passed == total:
+                    st.success(f"Test completed successfully! All {total} steps passed.")
+                else:
+                    st.error(f"Test completed with issues. {passed}/{total} steps passed.")
     
     # Display results
     if st.session_state.test_results is not None:
@@ -866,13 +949,11 @@ Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             with col3:
                 if st.button("Clear Screenshots"):
                     try:
-                        # Clean up screenshot directories
-                        import shutil
-                        if os.path.exists('screenshots'):
-                            shutil.rmtree('screenshots')
-                        if os.path.exists('error_screenshots'):
-                            shutil.rmtree('error_screenshots')
-                        st.success("Screenshot directories cleared!")
+                        # Drop only this session's handles: the content-addressed store shares
+                        # blobs across sessions and jobs, so unused ones age out via prune()
+                        for result in st.session_state.test_results:
+                            result['screenshot'] = None
+                        st.success("Screenshots cleared from this session!")
                     except Exception as e:
                         st.error(f"Failed to clear screenshots: {e}")
 
@@ -882,8 +963,7 @@ Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
         **Environment Details:**
         - Python Version: {sys.version}
         - Streamlit Version: {st.__version__}
-        - Screenshot Directory: `{os.path.abspath('screenshots')}`
-        - Error Screenshot Directory: `{os.path.abspath('error_screenshots')}`
+        - Artifact Directory: `{get_artifact_store().root.resolve()}`
         
         **Current Settings:**
         - Headless Mode: {st.session_state.get('headless_mode', False)}